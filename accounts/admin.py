@@ -1,6 +1,37 @@
 from django.contrib import admin
+from django.utils import timezone
+
+from .models import NotificationPreference, OutboxEmail
 
 # Admin branding
 admin.site.site_header = "HOUSE PHAKPHUM Administration"
 admin.site.site_title = "HOUSE PHAKPHUM Admin"
 admin.site.index_title = "จัดการระบบเว็บไซต์"
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+	list_display = ("subject", "recipients", "status", "attempts", "next_attempt_at", "sent_at")
+	list_filter = ("status", "created_at")
+	search_fields = ("subject", "to")
+	readonly_fields = ("created_at", "sent_at", "last_error", "attempts")
+	actions = ("retry_now",)
+
+	@admin.display(description="ผู้รับ")
+	def recipients(self, obj: OutboxEmail) -> str:
+		return ", ".join(obj.to)
+
+	@admin.action(description="ส่งอีกครั้งทันที")
+	def retry_now(self, request, queryset):
+		updated = queryset.exclude(status=OutboxEmail.Status.SENT).update(
+			status=OutboxEmail.Status.PENDING, attempts=0, next_attempt_at=timezone.now()
+		)
+		self.message_user(request, f"{updated} emails queued for the next run_outbox batch.")
+
+
+@admin.register(NotificationPreference)
+class NotificationPreferenceAdmin(admin.ModelAdmin):
+	list_display = ("user", "progress_digest", "updated_at")
+	list_filter = ("progress_digest",)
+	search_fields = ("user__username", "user__email")
+	autocomplete_fields = ("user",)
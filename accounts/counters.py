@@ -0,0 +1,140 @@
+"""Materialized dashboard counters.
+
+Each number the dashboards show is one row of :class:`~accounts.models.DashboardCounter`, so
+reading it is a primary-key lookup instead of a ``COUNT``/``AVG`` over the source table. The
+signals in :mod:`accounts.signals` apply ``F()`` deltas inside the transaction that changes a
+quote, inquiry or project; code that bypasses signals (``update()``, ``bulk_update()``) must call
+:func:`move` itself or run :func:`reconcile` afterwards.
+
+Keys:
+
+* ``quotes:pending`` and ``quotes:pending:user:<id>`` – quotes waiting for a price
+* ``inquiries:unhandled`` – estimate inquiries not yet handled
+* ``projects:count[:owner:<id>]`` and ``projects:progress[:owner:<id>]`` – number of
+  construction projects and the sum of their ``total_progress`` (average = sum / count)
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest
+
+from construction.models import ConstructionProject
+from quotes.models import EstimateInquiry, Quote
+
+from .models import DashboardCounter
+
+PENDING_QUOTES = 'quotes:pending'
+UNHANDLED_INQUIRIES = 'inquiries:unhandled'
+PROJECT_COUNT = 'projects:count'
+PROGRESS_SUM = 'projects:progress'
+
+Contributions = list[tuple[str, int]]
+
+
+def pending_quotes_key(user_id: int) -> str:
+	return f'{PENDING_QUOTES}:user:{user_id}'
+
+
+def project_count_key(owner_id: int) -> str:
+	return f'{PROJECT_COUNT}:owner:{owner_id}'
+
+
+def progress_sum_key(owner_id: int) -> str:
+	return f'{PROGRESS_SUM}:owner:{owner_id}'
+
+
+def adjust(key: str, delta: int) -> None:
+	"""Add ``delta`` to a counter without reading it; a missing row counts as zero."""
+	if not delta:
+		return
+	increment = Greatest(F('value') + delta, Value(0))
+	if DashboardCounter.objects.filter(pk=key).update(value=increment):
+		return
+	try:
+		# Savepoint, so losing a race to insert the same key does not break the outer transaction.
+		with transaction.atomic():
+			DashboardCounter.objects.create(key=key, value=max(delta, 0))
+	except IntegrityError:
+		DashboardCounter.objects.filter(pk=key).update(value=increment)
+
+
+def read(*keys: str) -> dict[str, int]:
+	"""Return every requested counter (zero when its row does not exist yet) in one query."""
+	values = dict(DashboardCounter.objects.filter(pk__in=keys).values_list('key', 'value'))
+	return {key: values.get(key, 0) for key in keys}
+
+
+def average(total: int, count: int) -> float:
+	return round(total / count, 1) if count else 0
+
+
+def quote_contributions(status: str | None, user_id: int | None) -> Contributions:
+	if status != Quote.Status.PENDING or user_id is None:
+		return []
+	return [(PENDING_QUOTES, 1), (pending_quotes_key(user_id), 1)]
+
+
+def inquiry_contributions(handled: bool | None) -> Contributions:
+	return [(UNHANDLED_INQUIRIES, 1)] if handled is False else []
+
+
+def project_contributions(owner_id: int | None, progress: int | None) -> Contributions:
+	if owner_id is None:
+		return []
+	progress = progress or 0
+	return [
+		(PROJECT_COUNT, 1),
+		(PROGRESS_SUM, progress),
+		(project_count_key(owner_id), 1),
+		(progress_sum_key(owner_id), progress),
+	]
+
+
+def move(before: Iterable[tuple[str, int]], after: Iterable[tuple[str, int]]) -> None:
+	"""Apply the change from one set of ``(key, amount)`` contributions to another."""
+	deltas: dict[str, int] = {}
+	for key, amount in before:
+		deltas[key] = deltas.get(key, 0) - amount
+	for key, amount in after:
+		deltas[key] = deltas.get(key, 0) + amount
+	for key in sorted(deltas):
+		# Sorted so concurrent transactions lock rows in the same order.
+		adjust(key, deltas[key])
+
+
+def compute() -> dict[str, int]:
+	"""Count every counter from the source tables."""
+	values: dict[str, int] = {}
+	pending = Quote.objects.filter(status=Quote.Status.PENDING).order_by()
+	values[PENDING_QUOTES] = pending.count()
+	for user_id, total in pending.values_list('requested_by').annotate(total=Count('pk')):
+		values[pending_quotes_key(user_id)] = total
+	values[UNHANDLED_INQUIRIES] = EstimateInquiry.objects.filter(handled=False).count()
+	totals = ConstructionProject.objects.aggregate(count=Count('pk'), progress=Sum('total_progress'))
+	values[PROJECT_COUNT] = totals['count']
+	values[PROGRESS_SUM] = totals['progress'] or 0
+	per_owner = ConstructionProject.objects.order_by().values_list('owner').annotate(
+		count=Count('pk'), progress=Sum('total_progress')
+	)
+	for owner_id, count, progress in per_owner:
+		values[project_count_key(owner_id)] = count
+		values[progress_sum_key(owner_id)] = progress or 0
+	return values
+
+
+def reconcile() -> tuple[int, list[str]]:
+	"""Rebuild the table from the source data; returns ``(rows written, keys that had drifted)``."""
+	with transaction.atomic():
+		expected = compute()
+		current = dict(DashboardCounter.objects.select_for_update().values_list('key', 'value'))
+		drifted = sorted(key for key in set(expected) | set(current) if expected.get(key, 0) != current.get(key, 0))
+		DashboardCounter.objects.all().delete()
+		DashboardCounter.objects.bulk_create(
+			[DashboardCounter(key=key, value=value) for key, value in expected.items() if value],
+			batch_size=1000,
+		)
+	return len([value for value in expected.values() if value]), drifted
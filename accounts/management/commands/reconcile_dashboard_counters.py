@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from accounts import counters
+
+
+class Command(BaseCommand):
+    help = "Recount the materialized dashboard counters from the quote, inquiry and project tables."
+
+    def handle(self, *args, **options):
+        written, drifted = counters.reconcile()
+        for key in drifted:
+            self.stdout.write(self.style.WARNING(f"Corrected drifted counter {key}"))
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {written} counters ({len(drifted)} corrected)."))
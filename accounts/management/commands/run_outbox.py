@@ -0,0 +1,39 @@
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts import outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver queued emails from the outbox in batches, one mail server connection per batch."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Messages sent per connection (default: EMAIL_OUTBOX_BATCH_SIZE).")
+        parser.add_argument("--poll-interval", type=float, default=5.0, help="Seconds to wait when nothing is due.")
+        parser.add_argument("--once", action="store_true", help="Exit once no message is due instead of polling.")
+        parser.add_argument(
+            "--smtp",
+            metavar="HOST:PORT",
+            help="Send through this plain SMTP server instead of EMAIL_BACKEND, e.g. a local stand-in "
+            "started with `python -m aiosmtpd -n -l localhost:1025`.",
+        )
+
+    def handle(self, *args, **options):
+        connection = None
+        if options["smtp"]:
+            host, _, port = options["smtp"].rpartition(":")
+            if not host or not port.isdigit():
+                raise CommandError("--smtp must look like HOST:PORT.")
+            connection = get_connection(
+                "django.core.mail.backends.smtp.EmailBackend", host=host, port=int(port), use_tls=False, use_ssl=False
+            )
+        try:
+            sent, failed = outbox.run(
+                size=options["batch_size"],
+                poll_interval=options["poll_interval"],
+                once=options["once"],
+                connection=connection,
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f"Sent {sent} emails; {failed} attempts failed and will be retried."))
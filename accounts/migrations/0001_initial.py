@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:51
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_counters(apps, schema_editor):
+    # Same counts as accounts.counters.compute(), against the historical models.
+    DashboardCounter = apps.get_model('accounts', 'DashboardCounter')
+    Quote = apps.get_model('quotes', 'Quote')
+    EstimateInquiry = apps.get_model('quotes', 'EstimateInquiry')
+    ConstructionProject = apps.get_model('construction', 'ConstructionProject')
+    values = {}
+    pending = Quote.objects.filter(status='pending').order_by()
+    values['quotes:pending'] = pending.count()
+    for user_id, total in pending.values_list('requested_by').annotate(total=Count('pk')):
+        values[f'quotes:pending:user:{user_id}'] = total
+    values['inquiries:unhandled'] = EstimateInquiry.objects.filter(handled=False).count()
+    projects = ConstructionProject.objects.order_by()
+    totals = projects.aggregate(count=Count('pk'), progress=Sum('total_progress'))
+    values['projects:count'] = totals['count']
+    values['projects:progress'] = totals['progress'] or 0
+    for owner_id, count, progress in projects.values_list('owner').annotate(count=Count('pk'), progress=Sum('total_progress')):
+        values[f'projects:count:owner:{owner_id}'] = count
+        values[f'projects:progress:owner:{owner_id}'] = progress or 0
+    DashboardCounter.objects.bulk_create(
+        [DashboardCounter(key=key, value=value) for key, value in values.items() if value], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('construction', '0001_initial'),
+        ('quotes', '0006_estimateinquiry_bands'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,71 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+
+class DashboardCounter(models.Model):
+	"""A materialized count read by the dashboards (see ``accounts.counters`` for the keys).
+
+	Rows are adjusted with ``F()`` updates inside the transaction that changes the underlying
+	data, and can be rebuilt from scratch with ``manage.py reconcile_dashboard_counters``.
+	"""
+
+	key = models.CharField(max_length=64, primary_key=True)
+	value = models.BigIntegerField(default=0)
+
+	def __str__(self) -> str:
+		return f"{self.key} = {self.value}"
+
+
+class OutboxEmail(models.Model):
+	"""An email waiting for (or done with) delivery by ``manage.py run_outbox``."""
+
+	class Status(models.TextChoices):
+		PENDING = 'pending', 'Pending'
+		SENDING = 'sending', 'Sending'
+		SENT = 'sent', 'Sent'
+		FAILED = 'failed', 'Failed'
+
+	subject = models.CharField(max_length=255)
+	body = models.TextField()
+	html_body = models.TextField(blank=True)
+	from_email = models.CharField(max_length=254)
+	to = models.JSONField(default=list)
+	status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+	attempts = models.PositiveSmallIntegerField(default=0)
+	# When the message is next due; while it is SENDING, when the worker's claim on it expires.
+	next_attempt_at = models.DateTimeField(default=timezone.now)
+	last_error = models.TextField(blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	sent_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ['next_attempt_at', 'pk']
+		indexes = [
+			models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+		]
+
+	def __str__(self) -> str:
+		return f"{self.subject} → {', '.join(self.to)} ({self.get_status_display()})"
+
+
+class NotificationPreference(models.Model):
+	"""Per-user email preferences; users without a row get the defaults."""
+
+	user = models.OneToOneField(
+		settings.AUTH_USER_MODEL,
+		on_delete=models.CASCADE,
+		primary_key=True,
+		related_name='notification_preference',
+	)
+	# Collect construction progress updates into one daily email instead of one email per update.
+	progress_digest = models.BooleanField(default=True)
+	updated_at = models.DateTimeField(auto_now=True)
+
+	def __str__(self) -> str:
+		return f"Notification preferences of {self.user}"
+
+	@classmethod
+	def wants_progress_digest(cls, user_id: int) -> bool:
+		value = cls.objects.filter(user_id=user_id).values_list('progress_digest', flat=True).first()
+		return True if value is None else value
@@ -0,0 +1,201 @@
+"""Transactional email outbox.
+
+Application code calls :func:`send_mail` (same arguments as Django's) instead of talking to the
+mail server inside the request. The message is written to :class:`~accounts.models.OutboxEmail`
+in the caller's transaction, so a rolled-back change never sends mail and a committed one never
+loses its message; a slow or unreachable SMTP server never slows down or breaks a request. When
+the transaction commits, a background thread drains the outbox (``EMAIL_OUTBOX_DRAIN_ON_COMMIT``);
+``manage.py run_outbox`` delivers whatever is left in batches over a single connection and
+retries failures with exponential backoff.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import connection as db_connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between two attempts at the same message.
+MAX_RETRY_DELAY = 6 * 60 * 60
+
+# Held while this process drains the outbox, so commits in quick succession start one thread.
+_draining = threading.Lock()
+
+
+def batch_size() -> int:
+	return getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+
+
+def max_attempts() -> int:
+	return getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 8)
+
+
+def retry_delay(attempts: int) -> timedelta:
+	base = getattr(settings, 'EMAIL_OUTBOX_RETRY_DELAY', 30)
+	return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), MAX_RETRY_DELAY))
+
+
+def admin_recipients() -> list[str]:
+	"""Email addresses of the superusers.
+
+	Read from the database on every call, which happens when a notification is queued, so a
+	change to the superusers made by any process applies to the next message.
+	"""
+	User = get_user_model()
+	emails = [email for email in User.objects.filter(is_superuser=True).values_list('email', flat=True) if email]
+	return emails or [settings.DEFAULT_FROM_EMAIL]
+
+
+def send_mail(subject: str, message: str, from_email: str | None, recipient_list: list[str], html_message: str | None = None) -> None:
+	"""Queue an email in the current transaction; it is delivered once the transaction commits."""
+	recipients = [address for address in recipient_list if address]
+	if not recipients:
+		return
+	values = {
+		'subject': subject[:255],
+		'body': message,
+		'html_body': html_message or '',
+		'from_email': from_email or settings.DEFAULT_FROM_EMAIL,
+		'to': recipients,
+	}
+	OutboxEmail.objects.create(**values)
+	transaction.on_commit(drain_soon)
+
+
+def drain_soon() -> bool:
+	"""Deliver due messages on a background thread; returns whether a thread was started.
+
+	Does nothing while this process is already draining: messages committed meanwhile are left
+	for the next drain or for ``run_outbox``.
+	"""
+	if not getattr(settings, 'EMAIL_OUTBOX_DRAIN_ON_COMMIT', False):
+		return False
+	if not _draining.acquire(blocking=False):
+		return False
+	try:
+		threading.Thread(target=_drain, name='outbox-drain', daemon=True).start()
+	except BaseException:
+		_draining.release()
+		raise
+	return True
+
+
+def _drain() -> None:
+	try:
+		run(once=True)
+	except Exception:
+		logger.exception('Could not drain the email outbox')
+	finally:
+		# The thread has its own database connection.
+		db_connection.close()
+		_draining.release()
+
+
+def _due() -> Q:
+	# SENDING rows whose claim has expired belong to a worker that died mid-batch.
+	return Q(status__in=[OutboxEmail.Status.PENDING, OutboxEmail.Status.SENDING], next_attempt_at__lte=timezone.now())
+
+
+def claim(limit: int, lease: int = 300) -> list[OutboxEmail]:
+	"""Mark up to ``limit`` due messages as SENDING for ``lease`` seconds; safe with several workers."""
+	claimed = []
+	for message in OutboxEmail.objects.filter(_due()).order_by('next_attempt_at', 'pk')[:limit]:
+		expires = timezone.now() + timedelta(seconds=lease)
+		if OutboxEmail.objects.filter(
+			pk=message.pk, status=message.status, next_attempt_at=message.next_attempt_at
+		).update(status=OutboxEmail.Status.SENDING, next_attempt_at=expires):
+			claimed.append(message)
+	return claimed
+
+
+def _as_email(message: OutboxEmail, connection) -> EmailMultiAlternatives:
+	email = EmailMultiAlternatives(message.subject, message.body, message.from_email, message.to, connection=connection)
+	if message.html_body:
+		email.attach_alternative(message.html_body, 'text/html')
+	return email
+
+
+def _failed(message: OutboxEmail, error: Exception) -> None:
+	message.attempts += 1
+	message.last_error = f'{error.__class__.__name__}: {error}'[:2000]
+	if message.attempts >= max_attempts():
+		message.status = OutboxEmail.Status.FAILED
+		logger.error('Giving up on outbox email %s after %s attempts: %s', message.pk, message.attempts, message.last_error)
+	else:
+		message.status = OutboxEmail.Status.PENDING
+		message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+	message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def deliver(messages: list[OutboxEmail], connection=None) -> tuple[int, int]:
+	"""Send ``messages`` over one connection; returns ``(sent, failed)``."""
+	connection = connection or get_connection()
+	sent = failed = 0
+	try:
+		connection.open()
+	except Exception as exc:
+		# The server is unreachable: every message in the batch is retried later.
+		logger.warning('Could not connect to the mail server: %s', exc)
+		for message in messages:
+			_failed(message, exc)
+		return 0, len(messages)
+	try:
+		for position, message in enumerate(messages):
+			try:
+				_as_email(message, connection).send()
+			except Exception as exc:
+				_failed(message, exc)
+				failed += 1
+				# Replace a connection the error may have broken with one fresh connection for the
+				# rest of the batch (a closed backend would otherwise reconnect for every message).
+				try:
+					connection.close()
+				except Exception:
+					pass
+				try:
+					connection.open()
+				except Exception as reconnect_error:
+					logger.warning('Could not reconnect to the mail server: %s', reconnect_error)
+					for rest in messages[position + 1:]:
+						_failed(rest, reconnect_error)
+					failed += len(messages) - position - 1
+					break
+				continue
+			OutboxEmail.objects.filter(pk=message.pk).update(
+				status=OutboxEmail.Status.SENT, attempts=message.attempts + 1, sent_at=timezone.now(), last_error=''
+			)
+			sent += 1
+	finally:
+		try:
+			connection.close()
+		except Exception:
+			pass
+	return sent, failed
+
+
+def run(size: int | None = None, poll_interval: float = 5.0, once: bool = False, connection=None) -> tuple[int, int]:
+	"""Deliver batches until interrupted (or until nothing is due with ``once``)."""
+	size = size or batch_size()
+	totals = [0, 0]
+	while True:
+		messages = claim(size)
+		if messages:
+			sent, failed = deliver(messages, connection)
+			totals[0] += sent
+			totals[1] += failed
+			continue
+		if once:
+			return totals[0], totals[1]
+		time.sleep(poll_interval)
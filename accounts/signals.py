@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from construction.models import ConstructionProject
+from quotes.models import EstimateInquiry, Quote
+
+from . import counters
+
+# Per model: the fields the counters depend on and how they map to counter contributions.
+TRACKED = {
+    Quote: (("status", "requested_by_id"), counters.quote_contributions),
+    EstimateInquiry: (("handled",), counters.inquiry_contributions),
+    ConstructionProject: (("owner_id", "total_progress"), counters.project_contributions),
+}
+DEFERRED = object()
+
+
+def _current(instance) -> tuple:
+    fields, _ = TRACKED[type(instance)]
+    return tuple(getattr(instance, field) for field in fields)
+
+
+@receiver(post_init, sender=Quote)
+@receiver(post_init, sender=EstimateInquiry)
+@receiver(post_init, sender=ConstructionProject)
+def remember_counted_fields(sender, instance, **kwargs):
+    fields, _ = TRACKED[sender]
+    instance._counted_fields = tuple(instance.__dict__.get(field, DEFERRED) for field in fields)
+
+
+@receiver(pre_save, sender=Quote)
+@receiver(pre_save, sender=EstimateInquiry)
+@receiver(pre_save, sender=ConstructionProject)
+@receiver(pre_delete, sender=Quote)
+@receiver(pre_delete, sender=EstimateInquiry)
+@receiver(pre_delete, sender=ConstructionProject)
+def load_deferred_counted_fields(sender, instance, **kwargs):
+    # An instance loaded with only()/defer() does not know the stored values it replaces or removes.
+    if instance.pk is None or DEFERRED not in instance._counted_fields:
+        return
+    fields, _ = TRACKED[sender]
+    stored = sender._base_manager.filter(pk=instance.pk).values_list(*fields).first()
+    instance._counted_fields = tuple(stored) if stored is not None else (None,) * len(fields)
+
+
+@receiver(post_save, sender=Quote)
+@receiver(post_save, sender=EstimateInquiry)
+@receiver(post_save, sender=ConstructionProject)
+def update_counters_on_save(sender, instance, created: bool, **kwargs):
+    _, contributions = TRACKED[sender]
+    current = _current(instance)
+    before = [] if created else contributions(*instance._counted_fields)
+    counters.move(before, contributions(*current))
+    instance._counted_fields = current
+
+
+@receiver(post_delete, sender=Quote)
+@receiver(post_delete, sender=EstimateInquiry)
+@receiver(post_delete, sender=ConstructionProject)
+def update_counters_on_delete(sender, instance, **kwargs):
+    _, contributions = TRACKED[sender]
+    counters.move(contributions(*instance._counted_fields), [])
@@ -1,3 +1,97 @@
-from django.test import TestCase
+from smtplib import SMTPServerDisconnected
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from . import outbox
+from .models import OutboxEmail
+
+
+class FlakyConnection:
+	"""Mail backend stand-in whose first ``failures`` sends raise."""
+
+	def __init__(self, failures: int = 0, refuse_reconnect: bool = False) -> None:
+		self.failures = failures
+		self.refuse_reconnect = refuse_reconnect
+		self.opened = 0
+		self.sent = []
+
+	def open(self):
+		if self.opened and self.refuse_reconnect:
+			raise ConnectionRefusedError('mail server went away')
+		self.opened += 1
+		return True
+
+	def close(self):
+		pass
+
+	def send_messages(self, messages):
+		if self.failures:
+			self.failures -= 1
+			raise SMTPServerDisconnected('connection dropped')
+		self.sent.extend(messages)
+		return len(messages)
+
+
+def queue(count: int) -> list[OutboxEmail]:
+	for index in range(count):
+		outbox.send_mail(f'Message {index}', 'Body', None, ['customer@example.com'])
+	return outbox.claim(count)
+
+
+class OutboxTests(TestCase):
+	def test_message_is_written_in_the_callers_transaction(self):
+		with self.captureOnCommitCallbacks() as callbacks:
+			outbox.send_mail('Hello', 'Body', None, ['customer@example.com', ''])
+			self.assertEqual(OutboxEmail.objects.get().to, ['customer@example.com'])
+		self.assertEqual(callbacks, [outbox.drain_soon])
+
+	def test_rolled_back_transaction_sends_nothing(self):
+		with self.captureOnCommitCallbacks() as callbacks:
+			with transaction.atomic():
+				outbox.send_mail('Hello', 'Body', None, ['customer@example.com'])
+				transaction.set_rollback(True)
+		self.assertFalse(OutboxEmail.objects.exists())
+		self.assertEqual(callbacks, [])
+
+	@override_settings(DEFAULT_FROM_EMAIL='office@example.com')
+	def test_admin_recipients_follow_changes_made_without_signals(self):
+		self.assertEqual(outbox.admin_recipients(), ['office@example.com'])
+		User = get_user_model()
+		User.objects.create_user('owner', 'owner@example.com', 'secret')
+		# Stands in for another process promoting a user: no signal reaches this one.
+		User.objects.filter(username='owner').update(is_superuser=True)
+		self.assertEqual(outbox.admin_recipients(), ['owner@example.com'])
+
+	@override_settings(EMAIL_OUTBOX_DRAIN_ON_COMMIT=False)
+	def test_drain_can_be_switched_off(self):
+		self.assertFalse(outbox.drain_soon())
+
+	def test_failed_send_reconnects_once_and_reuses_the_connection(self):
+		connection = FlakyConnection(failures=1)
+		self.assertEqual(outbox.deliver(queue(3), connection), (2, 1))
+		self.assertEqual(connection.opened, 2)
+		self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.Status.SENT).count(), 2)
+		retry = OutboxEmail.objects.get(status=OutboxEmail.Status.PENDING)
+		self.assertEqual((retry.subject, retry.attempts), ('Message 0', 1))
+		self.assertIn('connection dropped', retry.last_error)
+
+	def test_failed_reconnect_defers_the_rest_of_the_batch(self):
+		connection = FlakyConnection(failures=1, refuse_reconnect=True)
+		with self.assertLogs('accounts.outbox', 'WARNING'):
+			self.assertEqual(outbox.deliver(queue(3), connection), (0, 3))
+		self.assertEqual(OutboxEmail.objects.filter(status=OutboxEmail.Status.PENDING, attempts=1).count(), 3)
+
+	@override_settings(EMAIL_OUTBOX_MAX_ATTEMPTS=2, EMAIL_OUTBOX_RETRY_DELAY=30)
+	def test_retries_back_off_then_give_up(self):
+		message = queue(1)[0]
+		outbox.deliver([message], FlakyConnection(failures=1))
+		message.refresh_from_db()
+		self.assertEqual(message.status, OutboxEmail.Status.PENDING)
+		self.assertFalse(outbox.claim(1))  # not due for another 30 seconds
+		OutboxEmail.objects.update(next_attempt_at=message.created_at)
+		with self.assertLogs('accounts.outbox', 'ERROR'):
+			outbox.deliver(outbox.claim(1), FlakyConnection(failures=1))
+		message.refresh_from_db()
+		self.assertEqual((message.status, message.attempts), (OutboxEmail.Status.FAILED, 2))
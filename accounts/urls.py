@@ -6,6 +6,7 @@ from .views import (
     UserLogoutView,
     UserRegisterView,
     email_my_data,
+    progress_digest_preference,
 )
 
 app_name = "accounts"
@@ -16,4 +17,5 @@ urlpatterns = [
     path("register/", UserRegisterView.as_view(), name="register"),
     path("dashboard/", DashboardView.as_view(), name="dashboard"),
     path("privacy/email-my-data/", email_my_data, name="email_my_data"),
+    path("notifications/progress-digest/", progress_digest_preference, name="progress_digest"),
 ]
@@ -7,22 +7,24 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView, LogoutView
 from django.core.exceptions import ObjectDoesNotExist
-from django.core.mail import EmailMultiAlternatives
-from django.db.models import Avg
 from django.http import HttpResponseNotAllowed
 from django.shortcuts import redirect
 from django.template.loader import render_to_string
 from django.templatetags.static import static
 from django.urls import reverse, reverse_lazy
 from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.utils.html import strip_tags
 from django.views.generic import FormView, TemplateView
 
+from catalog.facets import BUDGET_LABELS, get_facet_index
 from designs.models import HouseDesign
 from quotes.models import EstimateInquiry, Quote
 from construction.models import ConstructionProject
 
+from . import counters, outbox
 from .forms import UserRegistrationForm
+from .models import NotificationPreference
 
 
 class UserRegisterView(FormView):
@@ -77,21 +79,37 @@ class DashboardView(TemplateView):
 				project_qs = ConstructionProject.objects.filter(owner=user)
 			
 			projects_qs = project_qs.select_related('quote__design', 'quote__catalog_design').prefetch_related('updates')
-			progress_agg = projects_qs.aggregate(avg_progress=Avg('total_progress'))
-			context['average_progress'] = round(progress_agg['avg_progress'] or 0, 1)
+			if user.is_superuser:
+				keys = (counters.PENDING_QUOTES, counters.PROJECT_COUNT, counters.PROGRESS_SUM, counters.UNHANDLED_INQUIRIES)
+			else:
+				keys = (
+					counters.pending_quotes_key(user.pk),
+					counters.project_count_key(user.pk),
+					counters.progress_sum_key(user.pk),
+				)
+			values = counters.read(*keys)
+			context['pending_quotes_count'] = values[keys[0]]
+			context['average_progress'] = counters.average(values[keys[2]], values[keys[1]])
+			if user.is_superuser:
+				context['pending_estimate_inquiry_count'] = values[counters.UNHANDLED_INQUIRIES]
 		else:
 			designs_qs = HouseDesign.objects.none()
 			quotes_qs = Quote.objects.none()
 			projects_qs = ConstructionProject.objects.none()
 			context['average_progress'] = 0
-
+			context['pending_quotes_count'] = 0
+
+		catalog_facets = get_facet_index().counts()
+		context['catalog_facets'] = catalog_facets
+		context['budget_presets'] = [
+			{'value': key, 'label': label, 'count': catalog_facets['budget'][key]}
+			for key, label in BUDGET_LABELS.items()
+		]
 		context['designs'] = designs_qs
 		context['quotes'] = quotes_qs
 		context['projects'] = projects_qs
-		context['pending_quotes_count'] = quotes_qs.filter(status=Quote.Status.PENDING).count() if user.is_authenticated else 0
 		if user.is_superuser:
 			pending_inquiries_qs = EstimateInquiry.objects.filter(handled=False).select_related('user')
-			context['pending_estimate_inquiry_count'] = pending_inquiries_qs.count()
 			context['pending_estimate_inquiries'] = pending_inquiries_qs[:5]
 			try:
 				context['estimate_inquiry_admin_url'] = reverse('admin:quotes_estimateinquiry_changelist')
@@ -177,9 +195,23 @@ def email_my_data(request):
 	text_body = strip_tags(html_body)
 	subject = 'Your Personal Data Summary'
 	from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'no-reply@housephakphum.local')
-	email = EmailMultiAlternatives(subject, text_body, from_email, [user.email])
-	email.attach_alternative(html_body, 'text/html')
-	email.send()
+	outbox.send_mail(subject, text_body, from_email, [user.email], html_message=html_body)
 	messages.success(request, 'เราได้ส่งข้อมูลส่วนตัวไปยังอีเมลของคุณเรียบร้อยแล้ว')
 	redirect_to = request.POST.get('next') or 'dashboard'
 	return redirect(redirect_to)
+
+
+@login_required
+def progress_digest_preference(request):
+	if request.method != 'POST':
+		return HttpResponseNotAllowed(['POST'])
+	enabled = request.POST.get('progress_digest') == 'on'
+	NotificationPreference.objects.update_or_create(user=request.user, defaults={'progress_digest': enabled})
+	if enabled:
+		messages.success(request, 'คุณจะได้รับสรุปความคืบหน้างานก่อสร้างวันละครั้ง')
+	else:
+		messages.success(request, 'คุณจะได้รับอีเมลทันทีเมื่อมีอัปเดตงานก่อสร้าง')
+	redirect_to = request.POST.get('next')
+	if not redirect_to or not url_has_allowed_host_and_scheme(redirect_to, allowed_hosts={request.get_host()}):
+		redirect_to = 'dashboard'
+	return redirect(redirect_to)
@@ -18,6 +18,8 @@ class CatalogDesignAdmin(admin.ModelAdmin):
         "bedrooms",
         "bathrooms",
         "is_featured",
+        "quotes_count",
+        "recent_quotes_count",
         "created_at",
     )
     list_filter = ("is_featured", "bedrooms", "bathrooms", "created_at")
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import threading
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Iterable, Mapping
+
+from django.db.models import Q
+
+# Inclusive (low, high) bounds, mirroring the dashboard presets used by the catalog filters.
+BUDGET_BANDS: dict[str, tuple[int | None, int | None]] = {
+    "3m": (None, 3_000_000),
+    "3-5m": (3_000_000, 5_000_000),
+    "5-10m": (5_000_000, 10_000_000),
+    "10m+": (10_000_000, None),
+}
+BUDGET_LABELS = {
+    "3m": "ไม่เกิน 3 ล้านบาท",
+    "3-5m": "3 - 5 ล้านบาท",
+    "5-10m": "5 - 10 ล้านบาท",
+    "10m+": "10 ล้านบาทขึ้นไป",
+}
+AREA_BANDS: dict[str, tuple[int | None, int | None]] = {
+    "s": (None, 149),
+    "m": (150, 250),
+    "l": (251, None),
+}
+FACETS = ("style", "bedrooms", "budget", "area")
+# Design fields the index is built from; saving any other field leaves the index current.
+INDEXED_FIELDS = ("style", "bedrooms", "base_price", "area_sqm")
+# Filter combinations whose counts are kept per index version; the cache is emptied when full.
+MAX_CACHED_COUNTS = 1024
+
+
+def _bands_for(value: Any, bands: Mapping[str, tuple[int | None, int | None]]) -> tuple[str, ...]:
+    # Bands share their boundaries (e.g. exactly 3m is in both "3m" and "3-5m"), so a value may
+    # belong to more than one bucket, exactly like the chained queryset filters it replaces.
+    matched = []
+    for key, (low, high) in bands.items():
+        if low is not None and value < low:
+            continue
+        if high is not None and value > high:
+            continue
+        matched.append(key)
+    return tuple(matched)
+
+
+def parse_facet_filters(params: Mapping[str, str]) -> dict[str, Any]:
+    """Extract the facet-backed filters from catalog GET parameters, ignoring invalid values."""
+    filters: dict[str, Any] = {}
+    style = params.get("style")
+    if style:
+        filters["style"] = style
+    budget = params.get("budget")
+    if budget in BUDGET_BANDS:
+        filters["budget"] = budget
+    area = params.get("area")
+    if area in AREA_BANDS:
+        filters["area"] = area
+    bedrooms = params.get("bedrooms")
+    if bedrooms:
+        try:
+            filters["bedrooms"] = int(bedrooms)
+        except ValueError:
+            pass
+    return filters
+
+
+def filter_q(filters: Mapping[str, Any]) -> Q:
+    """SQL equivalent of :meth:`CatalogFacetIndex.select`, for filtering querysets."""
+    q = Q()
+    if "style" in filters:
+        q &= Q(style=filters["style"])
+    if "bedrooms" in filters:
+        q &= Q(bedrooms__gte=filters["bedrooms"])
+    for facet, field, bands in (("budget", "base_price", BUDGET_BANDS), ("area", "area_sqm", AREA_BANDS)):
+        if facet in filters:
+            low, high = bands[filters[facet]]
+            if low is not None:
+                q &= Q(**{f"{field}__gte": low})
+            if high is not None:
+                q &= Q(**{f"{field}__lte": high})
+    return q
+
+
+class CatalogFacetIndex:
+    """In-memory inverted index of catalog designs per facet bucket, used for facet counts.
+
+    Each bucket holds the set of design ids that fall into it, so counting any filter
+    combination is a set intersection; results are kept until the index is rebuilt. The
+    database is only read to build the index and to check its version (see
+    :func:`get_facet_index`).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._buckets: dict[str, defaultdict[Any, set[int]]] = {
+            facet: defaultdict(set) for facet in FACETS
+        }
+        self._memberships: dict[int, dict[str, tuple[Any, ...]]] = {}
+        self._cached_counts: dict[tuple, Any] = {}
+        self.version: int | None = None
+
+    @staticmethod
+    def memberships_for(style: str, bedrooms: int, base_price: Decimal, area_sqm: int) -> dict[str, tuple[Any, ...]]:
+        return {
+            "style": (style,),
+            "bedrooms": (bedrooms,),
+            "budget": _bands_for(base_price, BUDGET_BANDS),
+            "area": _bands_for(area_sqm, AREA_BANDS),
+        }
+
+    def build(self, rows: Iterable[tuple[int, str, int, Decimal, int]], version: int) -> None:
+        with self._lock:
+            for buckets in self._buckets.values():
+                buckets.clear()
+            self._memberships.clear()
+            self._cached_counts.clear()
+            for pk, style, bedrooms, base_price, area_sqm in rows:
+                self._add(pk, self.memberships_for(style, bedrooms, base_price, area_sqm))
+            # The unfiltered counts back the dashboard; compute them once per version.
+            self.counts()
+            self.version = version
+
+    def _add(self, pk: int, memberships: dict[str, tuple[Any, ...]]) -> None:
+        for facet, keys in memberships.items():
+            for key in keys:
+                self._buckets[facet][key].add(pk)
+        self._memberships[pk] = memberships
+
+    def _cached(self, key: tuple, compute):
+        with self._lock:
+            if key not in self._cached_counts:
+                if len(self._cached_counts) >= MAX_CACHED_COUNTS:
+                    self._cached_counts.clear()
+                self._cached_counts[key] = compute()
+            return self._cached_counts[key]
+
+    def _ids_for(self, facet: str, value: Any) -> set[int]:
+        buckets = self._buckets[facet]
+        if facet == "bedrooms":
+            # The bedroom filter means "at least N bedrooms".
+            matched: set[int] = set()
+            for key, ids in buckets.items():
+                if key >= value:
+                    matched |= ids
+            return matched
+        return buckets.get(value, set())
+
+    def select(self, filters: Mapping[str, Any], exclude: str | None = None) -> set[int]:
+        """Return the ids matching every filter, optionally ignoring one facet."""
+        with self._lock:
+            result: set[int] | None = None
+            for facet, value in filters.items():
+                if facet == exclude or facet not in self._buckets:
+                    continue
+                ids = self._ids_for(facet, value)
+                result = set(ids) if result is None else result & ids
+                if not result:
+                    return set()
+            return set(self._memberships) if result is None else result
+
+    def count(self, filters: Mapping[str, Any], facet: str, value: Any) -> int:
+        """Number of results if ``facet`` were set to ``value`` on top of the other filters."""
+        return self._cached(
+            ("count", frozenset(filters.items()), facet, value),
+            lambda: len(self.select(filters, exclude=facet) & self._ids_for(facet, value)),
+        )
+
+    def counts(self, filters: Mapping[str, Any] | None = None) -> dict[str, dict[Any, int]]:
+        """Bucket counts per facet for the given filter combination.
+
+        Each facet is counted against the other facets' filters only, so the numbers answer
+        "how many results if I pick this bucket instead". Bedroom counts are cumulative
+        ("N or more") to match the bedroom filter.
+        """
+        filters = filters or {}
+        return self._cached(("counts", frozenset(filters.items())), lambda: self._counts(filters))
+
+    def _counts(self, filters: Mapping[str, Any]) -> dict[str, dict[Any, int]]:
+        with self._lock:
+            counts: dict[str, dict[Any, int]] = {}
+            for facet in FACETS:
+                base = self.select(filters, exclude=facet)
+                buckets = self._buckets[facet]
+                if facet == "bedrooms":
+                    counts[facet] = {
+                        key: len(base & self._ids_for(facet, key)) for key in sorted(buckets)
+                    }
+                else:
+                    counts[facet] = {key: len(base & ids) for key, ids in buckets.items()}
+            for facet, bands in (("budget", BUDGET_BANDS), ("area", AREA_BANDS)):
+                counts[facet] = {key: counts[facet].get(key, 0) for key in bands}
+            return counts
+
+
+facet_index = CatalogFacetIndex()
+
+
+def current_version() -> int:
+    """The facet index version, read from the database so every process sees a bump."""
+    from . import versions
+
+    return versions.current(versions.FACETS)
+
+
+def bump_version() -> None:
+    """Make every process rebuild its facet index on its next request.
+
+    The catalog signals call this after a design is saved or deleted; code that changes a facet
+    field without ``save()`` (``update()``, ``bulk_create()``) must call it itself.
+    """
+    from . import versions
+
+    versions.bump(versions.FACETS)
+
+
+def get_facet_index() -> CatalogFacetIndex:
+    """Return the process-wide facet index, rebuilding it if the catalog changed."""
+    from .models import CatalogDesign
+
+    version = current_version()
+    if facet_index.version != version:
+        rows = CatalogDesign.objects.values_list("pk", *INDEXED_FIELDS)
+        facet_index.build(rows.iterator(), version)
+    return facet_index
@@ -0,0 +1,59 @@
+import csv
+import json
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.models import CatalogDesign
+from catalog.transfer import COLUMNS, copy_images, detect_format, export_row
+
+
+class Command(BaseCommand):
+    help = "Export catalog designs to CSV or JSON Lines, optionally with their images."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Output CSV or JSONL file.")
+        parser.add_argument("--format", choices=("csv", "jsonl"), help="Output format (guessed from the extension).")
+        parser.add_argument("--images", help="Directory or .zip file to copy the referenced images into.")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Rows fetched per database round trip.")
+        parser.add_argument("--workers", type=int, default=8, help="Threads used to read images.")
+
+    def handle(self, *args, **options):
+        fmt = detect_format(options["path"], options["format"])
+        batch_size = max(1, options["batch_size"])
+        images = Path(options["images"]) if options["images"] else None
+        exported = 0
+        copied = 0
+        try:
+            handle = open(options["path"], "w", encoding="utf-8", newline="")
+        except OSError as exc:
+            raise CommandError(f"Cannot write {options['path']}: {exc}") from exc
+
+        with ExitStack() as stack:
+            stack.enter_context(handle)
+            archive = None
+            if images and images.suffix == ".zip":
+                archive = stack.enter_context(zipfile.ZipFile(images, "w", zipfile.ZIP_STORED))
+            executor = stack.enter_context(ThreadPoolExecutor(max_workers=max(1, options["workers"])))
+            writer = csv.DictWriter(handle, fieldnames=COLUMNS) if fmt == "csv" else None
+            if writer:
+                writer.writeheader()
+            batch = []
+            for design in CatalogDesign.objects.order_by("pk").iterator(chunk_size=batch_size):
+                row = export_row(design)
+                if writer:
+                    writer.writerow(row)
+                else:
+                    handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+                exported += 1
+                if images:
+                    batch.append(design)
+                    if len(batch) >= batch_size:
+                        copied += copy_images(batch, images, executor, archive)
+                        batch = []
+            if images and batch:
+                copied += copy_images(batch, images, executor, archive)
+        self.stdout.write(self.style.SUCCESS(f"Exported {exported} designs and {copied} images."))
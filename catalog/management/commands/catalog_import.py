@@ -0,0 +1,72 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import facets, page_cache, recommendations, search
+from catalog.transfer import ImageSource, RowError, detect_format, import_batch, parse_row, read_rows
+
+
+class Command(BaseCommand):
+    help = "Bulk-import catalog designs from a CSV or JSON Lines file plus an images directory or zip."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSONL file with one design per row.")
+        parser.add_argument("--format", choices=("csv", "jsonl"), help="Input format (guessed from the extension).")
+        parser.add_argument("--images", help="Directory or zip archive the image columns are relative to.")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows inserted per bulk_create.")
+        parser.add_argument("--workers", type=int, default=8, help="Threads used to copy images.")
+        parser.add_argument(
+            "--skip-related",
+            action="store_true",
+            help="Do not rebuild the related designs table afterwards (run rebuild_related_designs later).",
+        )
+
+    def handle(self, *args, **options):
+        source = ImageSource(options["images"])
+        fmt = detect_format(options["path"], options["format"])
+        batch_size = max(1, options["batch_size"])
+        created = 0
+        failures = 0
+        try:
+            handle = open(options["path"], encoding="utf-8-sig", newline="")
+        except OSError as exc:
+            raise CommandError(f"Cannot open {options['path']}: {exc}") from exc
+
+        # The executor exits first, so no thread is reading from the source when it is closed.
+        with handle, source, ThreadPoolExecutor(max_workers=max(1, options["workers"])) as executor:
+            batch = []
+            for line_number, raw in read_rows(handle, fmt):
+                try:
+                    row = parse_row(raw)
+                except RowError as exc:
+                    failures += 1
+                    self.stderr.write(f"line {line_number}: {exc}")
+                    continue
+                row["line"] = line_number
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    created_now, errors = self.flush(batch, source, executor)
+                    created += created_now
+                    failures += len(errors)
+                    batch = []
+            if batch:
+                created_now, errors = self.flush(batch, source, executor)
+                created += created_now
+                failures += len(errors)
+
+        # bulk_create skips model signals, so refresh the derived catalog data in one go.
+        page_cache.bump_version()
+        facets.bump_version()
+        if created and not options["skip_related"]:
+            recommendations.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Imported {created} designs ({failures} rows skipped)."))
+        if created:
+            self.stdout.write("Run generate_image_derivatives to create thumbnails for the imported images.")
+
+    def flush(self, batch, source, executor):
+        designs, errors = import_batch(batch, source, executor)
+        for line_number, message in errors:
+            self.stderr.write(f"line {line_number}: {message}")
+        search.index_designs(designs)
+        self.stdout.write(f"Imported {len(designs)} designs up to line {batch[-1]['line']}.")
+        return len(designs), errors
@@ -0,0 +1,76 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from house_management import imaging
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/JPEG derivatives for catalog, design and construction images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (defaults to the CPU count).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Regenerate derivatives that already exist.",
+        )
+
+    def iter_image_names(self, force: bool):
+        seen = set()
+        for model, fields in imaging.registry:
+            for field in fields:
+                names = (
+                    model._default_manager.exclude(**{field: ""})
+                    .exclude(**{f"{field}__isnull": True})
+                    .values_list(field, flat=True)
+                    .iterator()
+                )
+                for name in names:
+                    if name in seen:
+                        continue
+                    seen.add(name)
+                    if force or not imaging.has_derivatives(name):
+                        yield name
+
+    def handle(self, *args, **options):
+        names = list(self.iter_image_names(options["force"]))
+        if not names:
+            self.stdout.write("All images already have derivatives.")
+            return
+        try:
+            default_storage.path(names[0])
+        except NotImplementedError:
+            # Remote storages have no local paths to hand to worker processes.
+            written = sum(imaging.generate(name) for name in names)
+        else:
+            written = self.generate_in_workers(names, max(1, options["workers"]))
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} derivatives for {len(names)} images."))
+
+    def generate_in_workers(self, names, workers):
+        written = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(
+                    imaging.render_file,
+                    default_storage.path(name),
+                    [
+                        (default_storage.path(target), width, extension)
+                        for target, width, extension in imaging.derivative_targets(name)
+                    ],
+                ): name
+                for name in names
+            }
+            for future in as_completed(futures):
+                try:
+                    written += future.result()
+                except Exception as exc:  # keep going; one bad file should not abort the backfill
+                    self.stderr.write(f"{futures[future]}: {exc}")
+        return written
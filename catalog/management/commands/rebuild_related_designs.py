@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from catalog.recommendations import NEIGHBOURS, rebuild_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the nearest-neighbour table behind the related designs on catalog pages. "
+        "Run nightly: saves only refresh the lists they affect."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--neighbours",
+            type=int,
+            default=NEIGHBOURS,
+            help="Number of neighbours stored per design.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1024,
+            help="Designs per block of the distance matrix.",
+        )
+
+    def handle(self, *args, **options):
+        total = rebuild_all(batch_size=options["batch_size"], k=options["neighbours"])
+        self.stdout.write(self.style.SUCCESS(f"Computed related designs for {total} catalog designs."))
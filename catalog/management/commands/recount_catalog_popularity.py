@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from catalog.popularity import recount
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized quote counters on catalog designs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--recent-only",
+            action="store_true",
+            help="Only recompute the rolling 30-day counter (run daily to age out old quotes).",
+        )
+
+    def handle(self, *args, **options):
+        updated = recount(recent_only=options["recent_only"])
+        self.stdout.write(self.style.SUCCESS(f"Recounted quotes for {updated} catalog designs."))
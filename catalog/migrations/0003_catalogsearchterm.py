@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:29
+
+import django.db.models.deletion
+import unicodedata
+from collections import Counter
+
+from django.db import migrations, models
+
+# A frozen copy of the tokenizer in catalog.search as it stood when the index was introduced, so
+# later changes to that module cannot change (or break) this migration.
+NGRAM_SIZE = 3
+MAX_TERM_LENGTH = 32
+FIELD_WEIGHTS = {'name': 3, 'concept': 1}
+
+
+def tokenize(text):
+    terms = []
+    clusters = []
+    for char in unicodedata.normalize('NFC', text or '').casefold() + ' ':
+        if unicodedata.category(char).startswith('M'):
+            if clusters:
+                clusters[-1] += char
+        elif char.isalnum():
+            clusters.append(char)
+        elif clusters:
+            terms.extend(
+                ''.join(clusters[start:start + NGRAM_SIZE])[:MAX_TERM_LENGTH]
+                for start in range(len(clusters))
+            )
+            clusters = []
+    return terms
+
+
+def index_existing_designs(apps, schema_editor):
+    CatalogDesign = apps.get_model('catalog', 'CatalogDesign')
+    CatalogSearchTerm = apps.get_model('catalog', 'CatalogSearchTerm')
+    postings = []
+    for design in CatalogDesign.objects.only('pk', 'name', 'concept').iterator():
+        weights = Counter()
+        for field, field_weight in FIELD_WEIGHTS.items():
+            for term in tokenize(getattr(design, field)):
+                weights[term] += field_weight
+        postings.extend(
+            CatalogSearchTerm(design_id=design.pk, term=term, weight=weight)
+            for term, weight in weights.items()
+        )
+    CatalogSearchTerm.objects.bulk_create(postings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0002_catalogdesign_style'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=32)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('design', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='catalog.catalogdesign')),
+            ],
+            options={
+                'verbose_name': 'Catalog Search Term',
+                'verbose_name_plural': 'Catalog Search Terms',
+                'constraints': [models.UniqueConstraint(fields=('term', 'design'), name='unique_catalog_search_term')],
+            },
+        ),
+        migrations.RunPython(index_existing_designs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:31
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def backfill_quote_counters(apps, schema_editor):
+    CatalogDesign = apps.get_model('catalog', 'CatalogDesign')
+    Quote = apps.get_model('quotes', 'Quote')
+
+    def count_of(quotes):
+        counts = (
+            quotes.filter(catalog_design=OuterRef('pk'))
+            .order_by()
+            .values('catalog_design')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(counts), Value(0))
+
+    since = timezone.now() - timedelta(days=30)
+    CatalogDesign.objects.update(
+        quotes_count=count_of(Quote.objects.all()),
+        recent_quotes_count=count_of(Quote.objects.filter(created_at__gte=since)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_catalogsearchterm'),
+        ('quotes', '0003_alter_quote_unique_together_quote_catalog_design_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogdesign',
+            name='quotes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='catalogdesign',
+            name='recent_quotes_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='catalogdesign',
+            index=models.Index(fields=['-quotes_count', 'name'], name='catalog_popularity_idx'),
+        ),
+        migrations.RunPython(backfill_quote_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_catalogdesign_quote_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedDesign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveSmallIntegerField()),
+                ('distance', models.FloatField()),
+                ('design', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='catalog.catalogdesign')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='catalog.catalogdesign')),
+            ],
+            options={
+                'verbose_name': 'Related Design',
+                'verbose_name_plural': 'Related Designs',
+                'ordering': ['design', 'rank'],
+                'constraints': [models.UniqueConstraint(fields=('design', 'rank'), name='unique_related_design_rank')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_relateddesign'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogPageVersion',
+            fields=[
+                ('key', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Catalog Page Version',
+                'verbose_name_plural': 'Catalog Page Versions',
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_catalogpageversion'),
+    ]
+
+    operations = [
+        migrations.RenameModel(
+            old_name='CatalogPageVersion',
+            new_name='CatalogVersion',
+        ),
+        migrations.AlterModelOptions(
+            name='catalogversion',
+            options={'verbose_name': 'Catalog Version', 'verbose_name_plural': 'Catalog Versions'},
+        ),
+    ]
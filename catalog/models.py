@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import uuid
 from datetime import timedelta
 
 from django.conf import settings
@@ -8,6 +9,40 @@ from django.utils import timezone
 from django.utils.text import slugify
 
 
+def base_slug_for(name: str) -> str:
+    base_slug = slugify(name or "")
+    if not base_slug:
+        # Fallback when name is empty or slugifies to empty: use deterministic base with random token.
+        base_slug = f"design-{uuid.uuid4().hex[:8]}"
+    return base_slug[:240]
+
+
+def allocate_slugs(names: list[str], exclude_pk: int | None = None) -> list[str]:
+    """Return a unique slug for each name, reading the existing slugs with a single query.
+
+    Names sharing a base slug within the batch get increasing ``-2``, ``-3``... suffixes.
+    """
+    bases = [base_slug_for(name) for name in names]
+    # Slugs are ASCII, so every slug starting with ``base`` sorts between ``base`` and ``base~``.
+    condition = models.Q()
+    for base in set(bases):
+        condition |= models.Q(slug__gte=base, slug__lt=f"{base}~")
+    existing = CatalogDesign.objects.filter(condition)
+    if exclude_pk is not None:
+        existing = existing.exclude(pk=exclude_pk)
+    taken = set(existing.values_list("slug", flat=True))
+    slugs = []
+    for base in bases:
+        slug = base
+        suffix = 1
+        while slug in taken:
+            suffix += 1
+            slug = f"{base}-{suffix}"
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
 class CatalogDesign(models.Model):
     name = models.CharField(max_length=255)
     slug = models.SlugField(unique=True, max_length=255, blank=True)
@@ -34,11 +69,17 @@ class CatalogDesign(models.Model):
         verbose_name="House Style",
     )
     is_featured = models.BooleanField(default=False)
+    # Denormalized popularity counters, maintained by quote signals (see catalog.popularity).
+    quotes_count = models.PositiveIntegerField(default=0, editable=False)
+    recent_quotes_count = models.PositiveIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["-is_featured", "name"]
+        indexes = [
+            models.Index(fields=["-quotes_count", "name"], name="catalog_popularity_idx"),
+        ]
         verbose_name = "Catalog Design"
         verbose_name_plural = "Catalog Designs"
 
@@ -48,17 +89,7 @@ class CatalogDesign(models.Model):
     def save(self, *args, **kwargs):
         # Ensure slug is generated and non-empty. If name slugifies to empty, fallback to unique token.
         if not self.slug or not str(self.slug).strip():
-            base_slug = slugify(self.name or "")
-            if not base_slug:
-                # Fallback when name is empty or slugifies to empty: use deterministic base with random token.
-                import uuid
-                base_slug = f"design-{uuid.uuid4().hex[:8]}"
-            slug = base_slug
-            suffix = 1
-            while CatalogDesign.objects.filter(slug=slug).exclude(pk=self.pk).exists():
-                suffix += 1
-                slug = f"{base_slug}-{suffix}"
-            self.slug = slug
+            self.slug = allocate_slugs([self.name], exclude_pk=self.pk)[0]
         super().save(*args, **kwargs)
 
     def get_absolute_url(self) -> str:
@@ -100,3 +131,70 @@ class CatalogDesignImage(models.Model):
 
     def __str__(self) -> str:
         return f"Image for {self.design.name}"
+
+
+class CatalogSearchTerm(models.Model):
+    """One posting of the catalog search index: an n-gram and its weight within a design."""
+
+    design = models.ForeignKey(
+        CatalogDesign,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+    )
+    term = models.CharField(max_length=32)
+    weight = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "design"], name="unique_catalog_search_term"),
+        ]
+        verbose_name = "Catalog Search Term"
+        verbose_name_plural = "Catalog Search Terms"
+
+    def __str__(self) -> str:
+        return f"{self.term} → {self.design_id}"
+
+
+class RelatedDesign(models.Model):
+    """Precomputed nearest neighbour of a design, maintained by catalog.recommendations."""
+
+    design = models.ForeignKey(
+        CatalogDesign,
+        on_delete=models.CASCADE,
+        related_name="related_links",
+    )
+    related = models.ForeignKey(
+        CatalogDesign,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    rank = models.PositiveSmallIntegerField()
+    distance = models.FloatField()
+
+    class Meta:
+        ordering = ["design", "rank"]
+        constraints = [
+            models.UniqueConstraint(fields=["design", "rank"], name="unique_related_design_rank"),
+        ]
+        verbose_name = "Related Design"
+        verbose_name_plural = "Related Designs"
+
+    def __str__(self) -> str:
+        return f"{self.design_id} → {self.related_id} (#{self.rank})"
+
+
+class CatalogVersion(models.Model):
+    """A named counter shared by every process, bumped when a derived catalog cache goes stale.
+
+    See catalog.versions; the page cache and the facet index each use their own key.
+    """
+
+    key = models.CharField(max_length=32, primary_key=True)
+    value = models.BigIntegerField(default=1)
+
+    class Meta:
+        verbose_name = "Catalog Version"
+        verbose_name_plural = "Catalog Versions"
+
+    def __str__(self) -> str:
+        return f"{self.key} = {self.value}"
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Mapping
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse
+from django.utils.http import urlencode
+
+from . import versions
+
+STATS_CACHE_KEYS = {"hits": "catalog:pages:hits", "misses": "catalog:pages:misses"}
+CACHE_HEADER = "X-Catalog-Cache"
+
+
+def current_version() -> int:
+    return versions.current(versions.PAGES)
+
+
+def bump_version() -> None:
+    """Invalidate every cached catalog page at once by moving to a new key namespace."""
+    versions.bump(versions.PAGES)
+
+
+def _count(stat: str) -> None:
+    key = STATS_CACHE_KEYS[stat]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+def stats() -> dict[str, Any]:
+    values = cache.get_many(list(STATS_CACHE_KEYS.values()))
+    hits = values.get(STATS_CACHE_KEYS["hits"], 0)
+    misses = values.get(STATS_CACHE_KEYS["misses"], 0)
+    total = hits + misses
+    return {
+        "version": current_version(),
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+def normalize_params(params, defaults: Mapping[str, str]) -> str:
+    """Canonical query string: sorted, with parameters at their default removed.
+
+    Blank values are kept: a present-but-empty parameter can change the page (``?cursor=``
+    switches to keyset pagination), so it must not share a key with the parameter left out.
+    """
+    items = []
+    for key in sorted(params):
+        for value in sorted(value.strip() for value in params.getlist(key)):
+            if defaults.get(key) == value:
+                continue
+            items.append((key, value))
+    return urlencode(items)
+
+
+class CatalogPageCacheMixin:
+    """Serve fully rendered catalog pages to anonymous visitors from the cache.
+
+    Keys combine the view, its URL kwargs, the normalized query string and the catalog version
+    stamp, which catalog signals bump on every design or gallery change. The stamp lives in the
+    database, so one process's bump reaches every other; each cached response costs one query.
+    """
+
+    page_cache_defaults: Mapping[str, str] = {"page": "1"}
+
+    def get_page_cache_defaults(self) -> Mapping[str, str]:
+        return self.page_cache_defaults
+
+    def get_page_cache_key(self, request: HttpRequest) -> str:
+        query = normalize_params(request.GET, self.get_page_cache_defaults())
+        kwargs = urlencode(sorted(self.kwargs.items()))
+        digest = hashlib.md5(f"{kwargs}?{query}".encode(), usedforsecurity=False).hexdigest()
+        return f"catalog:page:{current_version()}:{type(self).__name__}:{digest}"
+
+    def can_use_page_cache(self, request: HttpRequest) -> bool:
+        if request.method not in ("GET", "HEAD") or request.user.is_authenticated:
+            return False
+        # Pending flash messages are rendered into the page, so they must not be cached or skipped.
+        return not len(get_messages(request))
+
+    def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        if not self.can_use_page_cache(request):
+            response = super().dispatch(request, *args, **kwargs)
+            response[CACHE_HEADER] = "BYPASS"
+            return response
+        key = self.get_page_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            _count("hits")
+            cached[CACHE_HEADER] = "HIT"
+            return cached
+        _count("misses")
+        response = super().dispatch(request, *args, **kwargs)
+        if hasattr(response, "render") and not response.is_rendered:
+            response.render()
+        if (
+            response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and not request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+        ):
+            cache.set(key, response, settings.CATALOG_PAGE_CACHE_TIMEOUT)
+        response[CACHE_HEADER] = "MISS"
+        return response
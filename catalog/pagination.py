@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import zlib
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Sequence
+
+from django.db.models import Q, QuerySet
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _parse_ordering(ordering: Sequence[str]) -> list[tuple[str, bool]]:
+    parsed = [(name.lstrip("-"), name.startswith("-")) for name in ordering]
+    if not any(name in ("id", "pk") for name, _ in parsed):
+        # The primary key makes every position unique, so pages never overlap or skip rows.
+        parsed.append(("id", False))
+    return parsed
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+@dataclass
+class CursorPage:
+    object_list: list[Any]
+    next_cursor: str | None
+    previous_cursor: str | None
+    count: int | None = None
+    count_is_approximate: bool = False
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Cursor-based pagination over a fixed ordering.
+
+    Instead of ``OFFSET`` the next page is selected with a ``WHERE`` on the sort key of the last
+    row seen, so the cost of a page does not grow with its depth. Cursors are opaque, URL-safe
+    strings carrying the sort key and ``id`` of the boundary row.
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        per_page: int,
+        ordering: Sequence[str],
+        count_limit: int | None = None,
+    ) -> None:
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = _parse_ordering(ordering)
+        self.count_limit = count_limit
+        self._signature = zlib.crc32(
+            ",".join(f"{'-' if desc else ''}{name}" for name, desc in self.ordering).encode()
+        )
+
+    def encode_cursor(self, obj: Any, direction: str) -> str:
+        values = [_jsonable(getattr(obj, name)) for name, _ in self.ordering]
+        payload = json.dumps({"d": direction, "s": self._signature, "v": values}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor: str) -> tuple[str, list[Any]]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            direction, signature, values = payload["d"], payload["s"], payload["v"]
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor("Malformed cursor.") from None
+        if direction not in (NEXT, PREVIOUS) or signature != self._signature:
+            raise InvalidCursor("Cursor does not belong to this ordering.")
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor("Malformed cursor.")
+        return direction, values
+
+    def _after(self, values: list[Any], reverse: bool) -> Q:
+        # (a, b, id) > (va, vb, vid) expanded into
+        # a > va OR (a = va AND b > vb) OR (a = va AND b = vb AND id > vid), per-field direction.
+        condition = Q()
+        equal_so_far = Q()
+        for (name, desc), value in zip(self.ordering, values):
+            lookup = "lt" if desc != reverse else "gt"
+            condition |= equal_so_far & Q(**{f"{name}__{lookup}": value})
+            equal_so_far &= Q(**{name: value})
+        return condition
+
+    def _order_by(self, reverse: bool) -> list[str]:
+        return [f"{'-' if desc != reverse else ''}{name}" for name, desc in self.ordering]
+
+    def count(self) -> tuple[int | None, bool]:
+        """Return ``(count, is_approximate)``; counting stops after ``count_limit`` rows."""
+        if self.count_limit is None:
+            return None, False
+        counted = self.queryset.order_by()[: self.count_limit + 1].count()
+        if counted > self.count_limit:
+            return self.count_limit, True
+        return counted, False
+
+    def page(self, cursor: str | None) -> CursorPage:
+        direction, values = (NEXT, None) if not cursor else self.decode_cursor(cursor)
+        reverse = direction == PREVIOUS
+        queryset = self.queryset.order_by(*self._order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+        rows = list(queryset[: self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+
+        if reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, values is not None
+        count, approximate = self.count()
+        return CursorPage(
+            object_list=rows,
+            next_cursor=self.encode_cursor(rows[-1], NEXT) if rows and has_next else None,
+            previous_cursor=self.encode_cursor(rows[0], PREVIOUS) if rows and has_previous else None,
+            count=count,
+            count_is_approximate=approximate,
+        )
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from quotes.models import Quote
+
+from .models import CatalogDesign
+
+RECENT_WINDOW = timedelta(days=30)
+
+
+def is_recent(created_at) -> bool:
+    return created_at is None or timezone.now() - created_at <= RECENT_WINDOW
+
+
+def adjust(design_id: int | None, delta: int, recent: bool) -> None:
+    """Atomically add ``delta`` to a design's counters without reading them first."""
+    if not design_id:
+        return
+    updates = {"quotes_count": Greatest(F("quotes_count") + delta, Value(0))}
+    if recent:
+        updates["recent_quotes_count"] = Greatest(F("recent_quotes_count") + delta, Value(0))
+    CatalogDesign.objects.filter(pk=design_id).update(**updates)
+
+
+def _count_subquery(quotes) -> Coalesce:
+    counts = (
+        quotes.filter(catalog_design=OuterRef("pk"))
+        .order_by()
+        .values("catalog_design")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    return Coalesce(Subquery(counts), Value(0))
+
+
+def recount(recent_only: bool = False) -> int:
+    """Recompute the counters for every design in a single UPDATE; returns the rows updated.
+
+    The rolling count only decays when it is recomputed, so this should run daily (at least
+    with ``recent_only``) to age out quotes older than the window.
+    """
+    since = timezone.now() - RECENT_WINDOW
+    updates = {"recent_quotes_count": _count_subquery(Quote.objects.filter(created_at__gte=since))}
+    if not recent_only:
+        updates["quotes_count"] = _count_subquery(Quote.objects.all())
+    return CatalogDesign.objects.update(**updates)
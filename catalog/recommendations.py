@@ -0,0 +1,159 @@
+"""Related designs: the nearest neighbours of every catalog design over its price, area, rooms and style.
+
+Features are normalized by the mean and spread of the whole catalog, so a single save shifts every
+design's coordinates a little. :func:`refresh_design` (run after each save) rewrites only the lists
+the changed design enters or leaves, judged on the current coordinates; the other lists keep the
+ranking of the last full rebuild. Run ``manage.py rebuild_related_designs`` nightly (and after bulk
+edits; ``catalog_import`` does it itself) to re-rank the whole table.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+import numpy as np
+from django.db import transaction
+
+from .models import CatalogDesign, RelatedDesign
+
+NEIGHBOURS = 6
+# One-hot style columns are scaled so that a style mismatch weighs about as much as one
+# standard deviation on a numeric attribute.
+STYLE_WEIGHT = 1.0
+FEATURE_FIELDS = ("base_price", "area_sqm", "bedrooms", "bathrooms", "style")
+STYLES = tuple(CatalogDesign.Style.values)
+
+
+def load_features() -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(ids, matrix)`` with one normalized feature row per design."""
+    rows = list(CatalogDesign.objects.order_by("pk").values_list("pk", *FEATURE_FIELDS))
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, 4 + len(STYLES)))
+    ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+    numeric = np.array([[float(row[1]), row[2], row[3], row[4]] for row in rows], dtype=np.float64)
+    # Prices and areas are compared on a log scale so 3M vs 4M counts more than 30M vs 31M.
+    numeric[:, :2] = np.log1p(numeric[:, :2])
+    std = numeric.std(axis=0)
+    std[std == 0] = 1.0
+    numeric = (numeric - numeric.mean(axis=0)) / std
+    style_index = {style: position for position, style in enumerate(STYLES)}
+    styles = np.zeros((len(rows), len(STYLES)))
+    for position, row in enumerate(rows):
+        column = style_index.get(row[5])
+        if column is not None:
+            styles[position, column] = STYLE_WEIGHT
+    return ids, np.hstack([numeric, styles])
+
+
+def _distances(queries: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    # Squared euclidean distances for every (query, design) pair: |q|^2 + |m|^2 - 2 q.m
+    squared = (
+        np.einsum("ij,ij->i", queries, queries)[:, None]
+        + np.einsum("ij,ij->i", matrix, matrix)[None, :]
+        - 2.0 * queries @ matrix.T
+    )
+    return np.sqrt(np.maximum(squared, 0.0))
+
+
+def _nearest(ids: np.ndarray, matrix: np.ndarray, positions: np.ndarray, k: int) -> list[RelatedDesign]:
+    if not len(positions) or len(ids) < 2:
+        return []
+    distances = _distances(matrix[positions], matrix)
+    distances[np.arange(len(positions)), positions] = np.inf  # a design is not related to itself
+    k = min(k, len(ids) - 1)
+    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    links = []
+    for row, position in enumerate(positions):
+        candidates = nearest[row]
+        # Ties are broken by id so the table is stable across rebuilds.
+        order = np.lexsort((ids[candidates], distances[row, candidates]))
+        for rank, candidate in enumerate(candidates[order]):
+            links.append(
+                RelatedDesign(
+                    design_id=int(ids[position]),
+                    related_id=int(ids[candidate]),
+                    rank=rank,
+                    distance=float(distances[row, candidate]),
+                )
+            )
+    return links
+
+
+def _replace(design_ids: Iterable[int], links: list[RelatedDesign], length: int) -> None:
+    """Store the lists of ``design_ids``; each holds ``length`` links, ranks ``0..length - 1``."""
+    # Upserting by (design, rank) instead of delete + insert lets two refreshes that rewrite the
+    # same list run concurrently: the last one to commit wins rather than one failing on the
+    # unique constraint.
+    with transaction.atomic():
+        RelatedDesign.objects.bulk_create(
+            links,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=["design", "rank"],
+            update_fields=["related", "distance"],
+        )
+        RelatedDesign.objects.filter(design_id__in=list(design_ids), rank__gte=length).delete()
+
+
+def _list_length(ids: np.ndarray, k: int) -> int:
+    return max(min(k, len(ids) - 1), 0)
+
+
+def rebuild_all(batch_size: int = 1024, k: int = NEIGHBOURS) -> int:
+    """Recompute the neighbour table for the whole catalog; returns the number of designs."""
+    ids, matrix = load_features()
+    links: list[RelatedDesign] = []
+    # Row blocks keep the distance matrix at batch_size x n instead of n x n.
+    for start in range(0, len(ids), batch_size):
+        links.extend(_nearest(ids, matrix, np.arange(start, min(start + batch_size, len(ids))), k))
+    with transaction.atomic():
+        RelatedDesign.objects.all().delete()
+        RelatedDesign.objects.bulk_create(links, batch_size=1000)
+    return len(ids)
+
+
+def refresh_design(pk: int, k: int = NEIGHBOURS) -> int:
+    """Recompute the neighbours of ``pk`` and of every design whose list it enters or leaves.
+
+    Returns the number of neighbour lists rewritten.
+    """
+    ids, matrix = load_features()
+    found = np.flatnonzero(ids == pk)
+    if not len(found):
+        return 0
+    position = int(found[0])
+    to_design = _distances(matrix[position:position + 1], matrix)[0]
+
+    # Distance from every design to its current k-th (worst) neighbour, from a single query. It is
+    # measured on the current coordinates rather than read from the table, whose distances were
+    # computed before this save moved the normalization.
+    length = _list_length(ids, k)
+    worst = np.full(len(ids), np.inf)
+    index_of = {int(design_id): index for index, design_id in enumerate(ids)}
+    full_lists = RelatedDesign.objects.filter(rank=length - 1).values_list("design_id", "related_id")
+    pairs = [
+        (index_of[design_id], index_of[related_id])
+        for design_id, related_id in full_lists
+        if design_id in index_of and related_id in index_of
+    ]
+    if pairs:
+        rows, columns = np.array(pairs).T
+        worst[rows] = np.linalg.norm(matrix[rows] - matrix[columns], axis=1)
+    affected = to_design < worst
+    listing = RelatedDesign.objects.filter(related_id=pk).values_list("design_id", flat=True)
+    for design_id in listing:
+        index = index_of.get(design_id)
+        if index is not None:
+            affected[index] = True
+    affected[position] = True
+    positions = np.flatnonzero(affected)
+    _replace(ids[positions].tolist(), _nearest(ids, matrix, positions, k), length)
+    return len(positions)
+
+
+def refresh_designs(pks: Iterable[int], k: int = NEIGHBOURS) -> int:
+    """Recompute the neighbour lists of the given designs only (e.g. after a deletion)."""
+    ids, matrix = load_features()
+    positions = np.flatnonzero(np.isin(ids, np.fromiter(pks, dtype=np.int64)))
+    _replace(ids[positions].tolist(), _nearest(ids, matrix, positions, k), _list_length(ids, k))
+    return len(positions)
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import unicodedata
+from collections import Counter
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .models import CatalogDesign, CatalogSearchTerm
+
+NGRAM_SIZE = 3
+MAX_TERM_LENGTH = 32
+FIELD_WEIGHTS = {"name": 3, "concept": 1}
+# Upper bound used to turn a prefix lookup into an index-friendly range scan.
+_PREFIX_SENTINEL = "\U0010ffff"
+
+
+def runs(text: str) -> list[list[str]]:
+    """Split text into runs of letters/digits, grouping combining marks with their base character.
+
+    Thai is written without spaces and places vowels and tone marks (category M*) on top of or
+    below consonants, so a run is a list of clusters such as ``"บ้"`` rather than code points.
+    """
+    runs: list[list[str]] = []
+    current: list[str] = []
+    for char in unicodedata.normalize("NFC", text or "").casefold():
+        if unicodedata.category(char).startswith("M"):
+            if current:
+                current[-1] += char
+            continue
+        if char.isalnum():
+            current.append(char)
+            continue
+        if current:
+            runs.append(current)
+            current = []
+    if current:
+        runs.append(current)
+    return runs
+
+
+def _ngrams(clusters: list[str]) -> list[str]:
+    # Every start position yields a gram; the last ones are shorter so that any substring shorter
+    # than NGRAM_SIZE is still the prefix of some indexed term.
+    return [
+        "".join(clusters[start:start + NGRAM_SIZE])[:MAX_TERM_LENGTH]
+        for start in range(len(clusters))
+    ]
+
+
+def tokenize(text: str) -> list[str]:
+    terms: list[str] = []
+    for run in runs(text):
+        terms.extend(_ngrams(run))
+    return terms
+
+
+def parse_query(query: str) -> tuple[set[str], set[str]]:
+    """Return the full n-grams that must all match and the short fragments matched by prefix."""
+    grams: set[str] = set()
+    prefixes: set[str] = set()
+    for run in runs(query):
+        if len(run) < NGRAM_SIZE:
+            prefixes.add("".join(run)[:MAX_TERM_LENGTH])
+        else:
+            grams.update(
+                "".join(run[start:start + NGRAM_SIZE])[:MAX_TERM_LENGTH]
+                for start in range(len(run) - NGRAM_SIZE + 1)
+            )
+    return grams, prefixes
+
+
+def whole_words_q(query: str, fields: Iterable[str]) -> list[Q]:
+    """One condition per word of ``query`` long enough to be searched by n-grams.
+
+    Having every n-gram of a word does not mean having the word ("abcXbcd" has all the trigrams
+    of "abcd"), so the candidates an n-gram lookup leaves must also contain each whole word in one
+    of ``fields``.
+    """
+    fields = list(fields)
+    conditions = []
+    for run in runs(query):
+        if len(run) >= NGRAM_SIZE:
+            contains = Q()
+            for field in fields:
+                contains |= Q(**{f"{field}__icontains": "".join(run)})
+            conditions.append(contains)
+    return conditions
+
+
+def _prefix_q(prefix: str) -> Q:
+    return Q(term__gte=prefix, term__lt=prefix + _PREFIX_SENTINEL)
+
+
+def _terms_for(design: CatalogDesign) -> list[CatalogSearchTerm]:
+    weights: Counter[str] = Counter()
+    for field, field_weight in FIELD_WEIGHTS.items():
+        for term in tokenize(getattr(design, field)):
+            weights[term] += field_weight
+    return [
+        CatalogSearchTerm(design_id=design.pk, term=term, weight=weight)
+        for term, weight in weights.items()
+    ]
+
+
+def index_designs(designs: Iterable[CatalogDesign], batch_size: int = 1000) -> int:
+    """(Re)index the given designs, replacing their previous postings."""
+    designs = list(designs)
+    if not designs:
+        return 0
+    postings: list[CatalogSearchTerm] = []
+    for design in designs:
+        postings.extend(_terms_for(design))
+    with transaction.atomic():
+        CatalogSearchTerm.objects.filter(design_id__in=[design.pk for design in designs]).delete()
+        CatalogSearchTerm.objects.bulk_create(postings, batch_size=batch_size)
+    return len(postings)
+
+
+def index_design(design: CatalogDesign) -> int:
+    return index_designs([design])
+
+
+def rebuild_index(batch_size: int = 500) -> int:
+    """Rebuild the whole index in batches; returns the number of designs indexed."""
+    CatalogSearchTerm.objects.all().delete()
+    indexed = 0
+    batch: list[CatalogDesign] = []
+    for design in CatalogDesign.objects.only("pk", "name", "concept").order_by("pk").iterator(chunk_size=batch_size):
+        batch.append(design)
+        if len(batch) >= batch_size:
+            indexed += len(batch)
+            index_designs(batch)
+            batch = []
+    if batch:
+        indexed += len(batch)
+        index_designs(batch)
+    return indexed
+
+
+def search_designs(queryset: QuerySet, query: str) -> QuerySet:
+    """Filter ``queryset`` to designs matching ``query`` and annotate a ``search_rank``.
+
+    All lookups go through the ``(term, design)`` index, so the cost depends on the postings of
+    the query terms rather than on the size of the catalog.
+    """
+    grams, prefixes = parse_query(query)
+    if not grams and not prefixes:
+        return queryset.none()
+    if grams:
+        matching = (
+            CatalogSearchTerm.objects.filter(term__in=grams)
+            .values("design")
+            .annotate(matched=Count("id"))
+            .filter(matched=len(grams))
+            .values("design")
+        )
+        queryset = queryset.filter(pk__in=matching, *whole_words_q(query, FIELD_WEIGHTS))
+    for prefix in prefixes:
+        queryset = queryset.filter(
+            pk__in=CatalogSearchTerm.objects.filter(_prefix_q(prefix)).values("design")
+        )
+
+    rank_q = Q(term__in=grams)
+    for prefix in prefixes:
+        rank_q |= _prefix_q(prefix)
+    rank = (
+        CatalogSearchTerm.objects.filter(rank_q, design=OuterRef("pk"))
+        .values("design")
+        .annotate(total=Sum("weight"))
+        .values("total")[:1]
+    )
+    return queryset.annotate(
+        search_rank=Coalesce(Subquery(rank, output_field=IntegerField()), Value(0))
+    )
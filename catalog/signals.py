@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from house_management import imaging
+from quotes.models import Quote
+
+from . import facets, page_cache, popularity, recommendations, search
+from .models import CatalogDesign, CatalogDesignImage, RelatedDesign
+
+SEARCH_FIELDS = frozenset(search.FIELD_WEIGHTS)
+FEATURE_FIELDS = frozenset(recommendations.FEATURE_FIELDS)
+FACET_FIELDS = frozenset(facets.INDEXED_FIELDS)
+
+imaging.register(CatalogDesign, "cover_image", "floor_plan_image")
+imaging.register(CatalogDesignImage, "image")
+
+
+@receiver(post_save, sender=CatalogDesign)
+def reindex_design_on_save(sender, instance: CatalogDesign, update_fields=None, **kwargs):
+    # Postings of deleted designs go away through the foreign key cascade.
+    if update_fields is not None and not SEARCH_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(lambda: search.index_design(instance))
+
+
+@receiver(post_save, sender=CatalogDesign)
+def refresh_related_designs_on_save(sender, instance: CatalogDesign, update_fields=None, **kwargs):
+    if update_fields is not None and not FEATURE_FIELDS.intersection(update_fields):
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: recommendations.refresh_design(pk))
+
+
+@receiver(post_save, sender=CatalogDesign)
+def expire_facet_index_on_save(sender, update_fields=None, **kwargs):
+    if update_fields is not None and not FACET_FIELDS.intersection(update_fields):
+        return
+    transaction.on_commit(facets.bump_version)
+
+
+@receiver(post_delete, sender=CatalogDesign)
+def expire_facet_index_on_delete(sender, **kwargs):
+    transaction.on_commit(facets.bump_version)
+
+
+@receiver(pre_delete, sender=CatalogDesign)
+def remember_designs_listing_deleted(sender, instance: CatalogDesign, **kwargs):
+    instance._listed_by = list(
+        RelatedDesign.objects.filter(related=instance).values_list("design_id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=CatalogDesign)
+def refresh_related_designs_on_delete(sender, instance: CatalogDesign, **kwargs):
+    # The cascade removed the deleted design from these lists; refill them.
+    listed_by = getattr(instance, "_listed_by", [])
+    if listed_by:
+        transaction.on_commit(lambda: recommendations.refresh_designs(listed_by))
+
+
+@receiver(post_init, sender=Quote)
+def remember_quote_catalog_design(sender, instance: Quote, **kwargs):
+    instance._loaded_catalog_design_id = instance.catalog_design_id
+
+
+@receiver(post_save, sender=Quote)
+def count_quote_on_save(sender, instance: Quote, created: bool, **kwargs):
+    previous = None if created else instance._loaded_catalog_design_id
+    current = instance.catalog_design_id
+    if previous != current:
+        recent = popularity.is_recent(instance.created_at)
+        popularity.adjust(previous, -1, recent)
+        popularity.adjust(current, 1, recent)
+    instance._loaded_catalog_design_id = current
+
+
+@receiver(post_delete, sender=Quote)
+def count_quote_on_delete(sender, instance: Quote, **kwargs):
+    popularity.adjust(instance.catalog_design_id, -1, popularity.is_recent(instance.created_at))
+
+
+@receiver(post_save, sender=CatalogDesign)
+@receiver(post_delete, sender=CatalogDesign)
+@receiver(post_save, sender=CatalogDesignImage)
+@receiver(post_delete, sender=CatalogDesignImage)
+def expire_cached_catalog_pages(sender, **kwargs):
+    transaction.on_commit(page_cache.bump_version)
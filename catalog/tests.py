@@ -0,0 +1,303 @@
+import io
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.http import QueryDict
+from django.test import TestCase
+from django.urls import reverse
+
+from . import facets, page_cache, recommendations, search
+from . import transfer
+from .transfer import ImageSource
+from .models import CatalogDesign, RelatedDesign
+from .pagination import InvalidCursor, KeysetPaginator
+
+
+def make_design(name: str, **fields) -> CatalogDesign:
+    values = {
+        "concept": "แบบบ้านทดสอบ",
+        "base_price": Decimal("4000000"),
+        "area_sqm": 180,
+        "bedrooms": 3,
+        "bathrooms": 2,
+        "dimensions": "10 x 12 เมตร",
+        "cover_image": "catalog/covers/test.jpg",
+        "style": CatalogDesign.Style.MODERN,
+    }
+    values.update(fields)
+    return CatalogDesign.objects.create(name=name, **values)
+
+
+class FacetIndexTests(TestCase):
+    def setUp(self):
+        # The index is process-wide; start every test from an unbuilt one.
+        facets.facet_index.version = None
+        self.small = make_design("Small", base_price=Decimal("2500000"), area_sqm=120, bedrooms=2)
+        self.medium = make_design("Medium", base_price=Decimal("3000000"), area_sqm=150, bedrooms=3)
+        self.large = make_design(
+            "Large", base_price=Decimal("12000000"), area_sqm=400, bedrooms=5, style=CatalogDesign.Style.LUXURY
+        )
+
+    def test_sql_filter_matches_index_selection(self):
+        index = facets.get_facet_index()
+        combinations = [
+            {"budget": "3m"},
+            {"budget": "3-5m"},
+            {"area": "m", "bedrooms": 3},
+            {"style": "luxury", "budget": "10m+"},
+            {"bedrooms": 4},
+            {"style": "nordic"},
+        ]
+        for filters in combinations:
+            with self.subTest(filters=filters):
+                from_sql = set(CatalogDesign.objects.filter(facets.filter_q(filters)).values_list("pk", flat=True))
+                self.assertEqual(from_sql, index.select(filters))
+
+    def test_counts_follow_other_facets(self):
+        counts = facets.get_facet_index().counts({"style": "modern"})
+        # Exactly 3m sits on the boundary of both budget bands.
+        self.assertEqual(counts["budget"], {"3m": 2, "3-5m": 1, "5-10m": 0, "10m+": 0})
+        self.assertEqual(counts["style"], {"modern": 2, "luxury": 1})
+
+    def test_unchanged_catalog_reuses_index_and_counts(self):
+        facets.get_facet_index().counts()
+        with self.assertNumQueries(1):
+            counts = facets.get_facet_index().counts()
+        self.assertEqual(counts["style"]["modern"], 2)
+
+    def test_bedroom_counts_follow_non_facet_filters(self):
+        cache.clear()
+        url = reverse("catalog:list")
+        response = self.client.get(url, {"style": "modern"})
+        self.assertEqual(response.context["bedroom_options"], [("2", 2), ("3", 1), ("4", 0), ("5", 0)])
+        response = self.client.get(url, {"style": "modern", "bedrooms": "3", "price_max": "2800000"})
+        self.assertEqual(len(response.context["designs"]), 0)
+        self.assertEqual(response.context["bedroom_options"], [("2", 1), ("3", 0), ("4", 0), ("5", 0)])
+        self.assertIsNone(response.context["facet_counts"])
+
+    def test_design_changes_rebuild_the_index(self):
+        facets.get_facet_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            make_design("Nordic", style=CatalogDesign.Style.NORDIC)
+        self.assertEqual(facets.get_facet_index().counts()["style"]["nordic"], 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            CatalogDesign.objects.filter(pk=self.large.pk).delete()
+        self.assertNotIn("luxury", facets.get_facet_index().counts()["style"])
+
+    def test_saves_outside_facet_fields_keep_the_index(self):
+        facets.get_facet_index()
+        self.small.is_featured = True
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.small.save(update_fields=["is_featured"])
+        self.assertNotIn(facets.bump_version, callbacks)
+
+    def test_bump_from_another_process_is_seen(self):
+        # Stands in for catalog_import, whose bulk_create sends no signals.
+        facets.get_facet_index()
+        CatalogDesign.objects.filter(pk=self.small.pk).update(style=CatalogDesign.Style.NORDIC)
+        facets.bump_version()
+        self.assertEqual(facets.get_facet_index().counts()["style"]["nordic"], 1)
+
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_design("Small", base_price=Decimal("2500000"))
+
+    def test_blank_parameters_stay_in_the_key(self):
+        defaults = {"page": "1", "sort": "featured"}
+        self.assertEqual(page_cache.normalize_params(QueryDict("cursor="), defaults), "cursor=")
+        self.assertEqual(page_cache.normalize_params(QueryDict("page=1&sort=featured"), defaults), "")
+        self.assertEqual(page_cache.normalize_params(QueryDict("b=2&a= 1 "), defaults), "a=1&b=2")
+
+    def test_cursor_page_does_not_share_the_offset_key(self):
+        url = reverse("catalog:list")
+        self.assertEqual(self.client.get(url)["X-Catalog-Cache"], "MISS")
+        response = self.client.get(url, {"cursor": ""})
+        self.assertEqual(response["X-Catalog-Cache"], "MISS")
+        self.assertTrue(response.context["cursor_pagination"])
+        self.assertEqual(self.client.get(url)["X-Catalog-Cache"], "HIT")
+
+    def test_version_lives_in_the_database(self):
+        url = reverse("catalog:list")
+        self.client.get(url)
+        version = page_cache.current_version()
+        # Another process bumping the version is only visible through the database row.
+        page_cache.bump_version()
+        self.assertEqual(page_cache.current_version(), version + 1)
+        self.assertEqual(self.client.get(url)["X-Catalog-Cache"], "MISS")
+
+    def test_design_change_expires_pages(self):
+        url = reverse("catalog:list")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_design("Medium")
+        response = self.client.get(url)
+        self.assertEqual(response["X-Catalog-Cache"], "MISS")
+        self.assertContains(response, "Medium")
+
+    def test_popularity_sort_is_not_cached(self):
+        url = reverse("catalog:list")
+        self.client.get(url, {"sort": "popularity"})
+        self.assertEqual(self.client.get(url, {"sort": "popularity"})["X-Catalog-Cache"], "BYPASS")
+
+
+class RelatedDesignTests(TestCase):
+    def setUp(self):
+        self.designs = [
+            make_design(f"Design {index}", base_price=Decimal(2000000 + index * 700000), area_sqm=100 + index * 30)
+            for index in range(8)
+        ]
+
+    def related(self, design: CatalogDesign) -> list[int]:
+        return list(RelatedDesign.objects.filter(design=design).values_list("related_id", flat=True))
+
+    def test_refresh_matches_a_full_rebuild_for_the_changed_design(self):
+        recommendations.rebuild_all()
+        changed = self.designs[0]
+        changed.base_price = Decimal("6500000")
+        changed.area_sqm = 280
+        changed.save()
+        recommendations.refresh_design(changed.pk)
+        refreshed = self.related(changed)
+        recommendations.rebuild_all()
+        self.assertEqual(refreshed, self.related(changed))
+
+    def test_rewriting_lists_in_place_keeps_ranks_unique(self):
+        recommendations.rebuild_all(k=3)
+        # Refreshing the same lists again (as a concurrent refresh would) upserts them.
+        recommendations.refresh_designs([design.pk for design in self.designs], k=3)
+        self.assertEqual(RelatedDesign.objects.count(), 8 * 3)
+
+    def test_lists_shrink_with_the_catalog(self):
+        recommendations.rebuild_all()
+        CatalogDesign.objects.filter(pk__in=[design.pk for design in self.designs[3:]]).delete()
+        recommendations.refresh_designs([design.pk for design in self.designs[:3]])
+        self.assertEqual(
+            sorted(RelatedDesign.objects.values_list("rank", flat=True)), [0, 0, 0, 1, 1, 1]
+        )
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.match = make_design("บ้านสวนริมน้ำ", concept="Garden house by the river")
+        self.scattered = make_design("Gardxarden", concept="ใกล้สวนสาธารณะ")
+        search.index_designs([self.match, self.scattered])
+
+    def found(self, query: str) -> list[str]:
+        return list(search.search_designs(CatalogDesign.objects.order_by("name"), query).values_list("name", flat=True))
+
+    def test_words_must_be_contiguous(self):
+        # "Gardxarden" holds every trigram of "garden" but not the word.
+        self.assertEqual(self.found("garden"), ["บ้านสวนริมน้ำ"])
+
+    def test_thai_and_short_fragments(self):
+        self.assertEqual(self.found("ริมน้ำ"), ["บ้านสวนริมน้ำ"])
+        self.assertEqual(self.found("สวน"), ["Gardxarden", "บ้านสวนริมน้ำ"])
+        self.assertEqual(self.found("ri"), ["บ้านสวนริมน้ำ"])
+
+
+class ImageSourceTests(TestCase):
+    def test_archive_handles_of_every_thread_are_closed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "images.zip"
+            with zipfile.ZipFile(path, "w") as archive:
+                for index in range(8):
+                    archive.writestr(f"covers/{index}.jpg", b"jpeg")
+            opened = []
+            real_zipfile = zipfile.ZipFile
+
+            def open_archive(*args, **kwargs):
+                opened.append(real_zipfile(*args, **kwargs))
+                return opened[-1]
+
+            with mock.patch("catalog.transfer.zipfile.ZipFile", side_effect=open_archive):
+                with ImageSource(path) as source, ThreadPoolExecutor(max_workers=4) as executor:
+                    contents = list(executor.map(source.read, [f"covers/{index}.jpg" for index in range(8)]))
+            self.assertEqual(contents, [b"jpeg"] * 8)
+            self.assertTrue(opened)
+            self.assertTrue(all(archive.fp is None for archive in opened))
+
+
+class ExportImagesTests(TestCase):
+    def setUp(self):
+        self.designs = [make_design(f"Design {index}", cover_image=f"catalog/covers/{index}.jpg") for index in range(7)]
+
+    def test_archive_holds_a_bounded_number_of_reads(self):
+        opened = []
+        in_flight = []
+
+        def open_image(name, mode):
+            opened.append(name)
+            in_flight.append(len(opened) - len(archive.NameToInfo))
+            return io.BytesIO(name.encode())
+
+        with tempfile.TemporaryDirectory() as directory:
+            with zipfile.ZipFile(Path(directory) / "images.zip", "w") as archive:
+                with mock.patch.object(transfer, "MAX_PENDING_READS", 2), \
+                        mock.patch.object(transfer.default_storage, "open", side_effect=open_image), \
+                        ThreadPoolExecutor(max_workers=4) as executor:
+                    copied = transfer.copy_images(self.designs, Path(directory), executor, archive)
+                self.assertEqual(copied, 7)
+                self.assertEqual(archive.read("catalog/covers/6.jpg"), b"catalog/covers/6.jpg")
+        self.assertLessEqual(max(in_flight), 2)
+
+    def test_failed_export_closes_the_archive(self):
+        with tempfile.TemporaryDirectory() as directory:
+            images = Path(directory) / "images.zip"
+            with mock.patch.object(transfer.default_storage, "open", side_effect=OSError("gone")):
+                with self.assertRaises(OSError):
+                    call_command("catalog_export", str(Path(directory) / "designs.csv"), images=str(images))
+            # A closed archive has its central directory written and can be opened again.
+            with zipfile.ZipFile(images) as archive:
+                self.assertEqual(archive.namelist(), [])
+
+
+class KeysetPaginatorTests(TestCase):
+    def setUp(self):
+        # Repeated prices, so pages must fall back on the id to split ties.
+        for index, price in enumerate([3, 1, 2, 2, 2, 1, 3]):
+            make_design(f"Design {index}", base_price=Decimal(price * 1000000))
+        self.ordering = ("-base_price", "name")
+        self.expected = list(CatalogDesign.objects.order_by(*self.ordering, "id").values_list("pk", flat=True))
+
+    def paginator(self, **kwargs) -> KeysetPaginator:
+        return KeysetPaginator(CatalogDesign.objects.all(), 2, ordering=self.ordering, **kwargs)
+
+    def test_walking_forward_and_back_visits_every_row_once(self):
+        paginator = self.paginator()
+        pages = [paginator.page(None)]
+        while pages[-1].has_next():
+            pages.append(paginator.page(pages[-1].next_cursor))
+        self.assertEqual([design.pk for page in pages for design in page], self.expected)
+        self.assertFalse(pages[0].has_previous())
+
+        backwards = [pages[-1]]
+        while backwards[-1].has_previous():
+            backwards.append(paginator.page(backwards[-1].previous_cursor))
+        self.assertEqual(
+            [[design.pk for design in page] for page in reversed(backwards)],
+            [[design.pk for design in page] for page in pages],
+        )
+
+    def test_cursors_are_tied_to_their_ordering(self):
+        cursor = self.paginator().page(None).next_cursor
+        other = KeysetPaginator(CatalogDesign.objects.all(), 2, ordering=("name",))
+        for bad in (cursor[:-3], "not-a-cursor"):
+            with self.subTest(cursor=bad), self.assertRaises(InvalidCursor):
+                self.paginator().page(bad)
+        with self.assertRaises(InvalidCursor):
+            other.page(cursor)
+
+    def test_count_stops_at_the_limit(self):
+        self.assertEqual(self.paginator(count_limit=5).count(), (5, True))
+        self.assertEqual(self.paginator(count_limit=10).count(), (7, False))
+
+    def test_list_view_rejects_a_bad_cursor(self):
+        self.assertEqual(self.client.get(reverse("catalog:list"), {"cursor": "bogus"}).status_code, 404)
@@ -0,0 +1,243 @@
+"""Streaming import/export of catalog designs (CSV or JSON Lines) with their images."""
+
+from __future__ import annotations
+
+import csv
+import json
+import posixpath
+import threading
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from contextlib import ExitStack
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import CatalogDesign, allocate_slugs
+
+COLUMNS = (
+    "slug",
+    "name",
+    "concept",
+    "base_price",
+    "area_sqm",
+    "bedrooms",
+    "bathrooms",
+    "dimensions",
+    "style",
+    "is_featured",
+    "cover_image",
+    "floor_plan_image",
+)
+IMAGE_COLUMNS = ("cover_image", "floor_plan_image")
+REQUIRED_COLUMNS = ("name", "concept", "base_price", "area_sqm", "bedrooms", "bathrooms", "dimensions", "cover_image")
+TRUE_VALUES = {"1", "true", "yes", "y", "on"}
+# Image reads submitted but not yet written to an export archive.
+MAX_PENDING_READS = 16
+
+
+class RowError(ValueError):
+    pass
+
+
+def detect_format(path: str | Path, explicit: str | None = None) -> str:
+    if explicit:
+        return explicit
+    return "jsonl" if str(path).lower().endswith((".jsonl", ".ndjson", ".json")) else "csv"
+
+
+def read_rows(handle, fmt: str) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Yield ``(line_number, row)`` pairs without loading the whole file."""
+    if fmt == "csv":
+        reader = csv.DictReader(handle)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(handle, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, {"__error__": f"invalid JSON: {exc.msg}"}
+
+
+def _int(value: Any, column: str) -> int:
+    try:
+        parsed = int(str(value).strip())
+    except (TypeError, ValueError):
+        raise RowError(f"{column} must be a whole number") from None
+    if parsed < 0:
+        raise RowError(f"{column} must not be negative")
+    return parsed
+
+
+def parse_row(row: dict[str, Any]) -> dict[str, Any]:
+    """Validate one input row and convert it to model field values."""
+    if "__error__" in row:
+        raise RowError(row["__error__"])
+    missing = [column for column in REQUIRED_COLUMNS if not str(row.get(column) or "").strip()]
+    if missing:
+        raise RowError(f"missing {', '.join(missing)}")
+    try:
+        base_price = Decimal(str(row["base_price"]).strip())
+    except InvalidOperation:
+        raise RowError("base_price must be a number") from None
+    style = str(row.get("style") or CatalogDesign.Style.MODERN).strip().lower()
+    if style not in CatalogDesign.Style.values:
+        raise RowError(f"unknown style {style!r}")
+    featured = row.get("is_featured")
+    return {
+        "slug": str(row.get("slug") or "").strip(),
+        "name": str(row["name"]).strip(),
+        "concept": str(row["concept"]),
+        "base_price": base_price,
+        "area_sqm": _int(row["area_sqm"], "area_sqm"),
+        "bedrooms": _int(row["bedrooms"], "bedrooms"),
+        "bathrooms": _int(row["bathrooms"], "bathrooms"),
+        "dimensions": str(row["dimensions"]).strip(),
+        "style": style,
+        "is_featured": featured is True or str(featured or "").strip().lower() in TRUE_VALUES,
+        "cover_image": str(row["cover_image"]).strip(),
+        "floor_plan_image": str(row.get("floor_plan_image") or "").strip(),
+    }
+
+
+class ImageSource:
+    """Reads images referenced by import rows from a directory or a zip archive.
+
+    Use it as a context manager (or call :meth:`close`) once every reader thread is done, so the
+    archive handles those threads opened are closed.
+    """
+
+    def __init__(self, location: str | Path | None) -> None:
+        self.location = Path(location) if location else None
+        self.is_zip = bool(self.location and zipfile.is_zipfile(self.location))
+        self._local = threading.local()
+        self._archives = ExitStack()
+        self._archives_lock = threading.Lock()
+
+    def __enter__(self) -> ImageSource:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._archives_lock:
+            self._archives.close()
+
+    def read(self, relative: str) -> bytes:
+        if self.location is None:
+            raise RowError("no --images directory or zip given")
+        relative = relative.replace("\\", "/").lstrip("/")
+        if self.is_zip:
+            # ZipFile handles are not safe to share between threads, so each thread opens its own.
+            archive = getattr(self._local, "archive", None)
+            if archive is None:
+                archive = self._local.archive = zipfile.ZipFile(self.location)
+                with self._archives_lock:
+                    self._archives.enter_context(archive)
+            try:
+                return archive.read(relative)
+            except KeyError:
+                raise RowError(f"image {relative} not found in archive") from None
+        path = (self.location / relative).resolve()
+        if self.location.resolve() not in path.parents:
+            raise RowError(f"image {relative} is outside the images directory")
+        try:
+            return path.read_bytes()
+        except OSError:
+            raise RowError(f"image {relative} not found") from None
+
+
+def _store_image(source: ImageSource, relative: str, upload_to: str) -> str:
+    content = source.read(relative)
+    return default_storage.save(posixpath.join(upload_to, posixpath.basename(relative)), ContentFile(content))
+
+
+def import_batch(rows: list[dict[str, Any]], source: ImageSource, executor: ThreadPoolExecutor) -> tuple[list[CatalogDesign], list[tuple[int, str]]]:
+    """Store images and insert one batch; returns the created designs and per-row errors."""
+    upload_to = {name: CatalogDesign._meta.get_field(name).upload_to for name in IMAGE_COLUMNS}
+    # Rows sharing an image (e.g. a common floor plan) store it once per batch.
+    jobs = {}
+    for row in rows:
+        for column in IMAGE_COLUMNS:
+            key = (row[column], column)
+            if row[column] and key not in jobs:
+                jobs[key] = executor.submit(_store_image, source, row[column], upload_to[column])
+    errors: list[tuple[int, str]] = []
+    failed: set[int] = set()
+    stored: dict[tuple[int, str], str] = {}
+    for index, row in enumerate(rows):
+        for column in IMAGE_COLUMNS:
+            if not row[column]:
+                continue
+            try:
+                stored[(index, column)] = jobs[(row[column], column)].result()
+            except RowError as exc:
+                errors.append((row["line"], str(exc)))
+                failed.add(index)
+                break
+
+    valid = [index for index in range(len(rows)) if index not in failed]
+    slugs = allocate_slugs([rows[index]["slug"] or rows[index]["name"] for index in valid])
+    designs = []
+    for index, slug in zip(valid, slugs):
+        values = {key: value for key, value in rows[index].items() if key not in ("line", "slug")}
+        for column in IMAGE_COLUMNS:
+            values[column] = stored.get((index, column)) or None
+        designs.append(CatalogDesign(slug=slug, **values))
+    with transaction.atomic():
+        CatalogDesign.objects.bulk_create(designs)
+    return designs, errors
+
+
+def export_row(design: CatalogDesign) -> dict[str, Any]:
+    row = {column: getattr(design, column) for column in COLUMNS}
+    row["base_price"] = str(design.base_price)
+    for column in IMAGE_COLUMNS:
+        row[column] = row[column].name if row[column] else ""
+    return row
+
+
+def copy_images(designs: Iterable[CatalogDesign], target: Path, executor: ThreadPoolExecutor, archive: zipfile.ZipFile | None) -> int:
+    """Copy the images of ``designs`` into a directory or an open zip archive."""
+
+    def read(name: str) -> tuple[str, bytes]:
+        with default_storage.open(name, "rb") as handle:
+            return name, handle.read()
+
+    def write_file(name: str) -> None:
+        destination = target / name
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        with default_storage.open(name, "rb") as handle:
+            destination.write_bytes(handle.read())
+
+    names = list(dict.fromkeys(
+        getattr(design, column).name
+        for design in designs
+        for column in IMAGE_COLUMNS
+        if getattr(design, column)
+    ))
+    if archive is None:
+        list(executor.map(write_file, names))
+    else:
+        # Reads run in parallel; the archive itself is written from this thread only, as each read
+        # completes, with at most MAX_PENDING_READS images held in memory.
+        names = [name for name in names if name not in archive.NameToInfo]
+        pending = set()
+        for name in names:
+            if len(pending) >= MAX_PENDING_READS:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    archive.writestr(*future.result())
+            pending.add(executor.submit(read, name))
+        for future in as_completed(pending):
+            archive.writestr(*future.result())
+    return len(names)
@@ -1,6 +1,7 @@
 from django.urls import path
 
 from .views import (
+    CatalogCacheStatsView,
     CatalogDesignCreateView,
     CatalogDesignDeleteView,
     CatalogDesignDetailView,
@@ -13,6 +14,7 @@ app_name = "catalog"
 urlpatterns = [
     path("", CatalogDesignListView.as_view(), name="list"),
     path("create/", CatalogDesignCreateView.as_view(), name="create"),
+    path("cache-stats/", CatalogCacheStatsView.as_view(), name="cache_stats"),
     path("<slug:slug>/", CatalogDesignDetailView.as_view(), name="design_detail"),
     path("<slug:slug>/quote/", CatalogDesignQuoteView.as_view(), name="get_quote"),
     path("<slug:slug>/delete/", CatalogDesignDeleteView.as_view(), name="delete"),
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import CatalogVersion
+
+PAGES = "pages"
+FACETS = "facets"
+
+
+def current(key: str) -> int:
+    # Read from the database on every call so a bump in one process is seen by every other
+    # process (and by management commands) on their next request.
+    version = CatalogVersion.objects.filter(pk=key).values_list("value", flat=True).first()
+    return version or 1
+
+
+def bump(key: str) -> None:
+    increment = F("value") + 1
+    if CatalogVersion.objects.filter(pk=key).update(value=increment):
+        return
+    try:
+        # Savepoint, so losing a race to insert the row does not break the outer transaction.
+        with transaction.atomic():
+            CatalogVersion.objects.create(key=key, value=2)
+    except IntegrityError:
+        CatalogVersion.objects.filter(pk=key).update(value=increment)
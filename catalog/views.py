@@ -2,10 +2,11 @@ from __future__ import annotations
 
 from typing import Any
 
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.db.models import Count, Q
-from django.http import HttpRequest, HttpResponse
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
 from django.views import View
@@ -14,56 +15,53 @@ from django.views.generic import CreateView, DeleteView, DetailView, ListView
 from designs.models import HouseDesign
 from quotes.models import Quote
 
+from .page_cache import CatalogPageCacheMixin, stats as page_cache_stats
+from .facets import filter_q, get_facet_index, parse_facet_filters
 from .forms import CatalogDesignForm
-from .models import CatalogDesign
-
-
-class CatalogDesignListView(ListView):
+from .models import CatalogDesign, RelatedDesign
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import search_designs
+
+SORT_ORDERINGS = {
+    "featured": ("-is_featured", "name"),
+    "price_asc": ("base_price",),
+    "price_desc": ("-base_price",),
+    "popularity": ("-quotes_count", "name"),
+    "relevance": ("-search_rank", "-is_featured", "name"),
+}
+BEDROOM_OPTIONS = (2, 3, 4, 5)
+# Filters the facet index cannot apply, so facet counts taken from it would not match the results.
+NON_FACET_FILTERS = ("q", "price_min", "price_max", "area_min", "area_max")
+
+
+class CatalogDesignListView(CatalogPageCacheMixin, ListView):
     model = CatalogDesign
     template_name = "catalog/catalog_list.html"
     context_object_name = "designs"
     paginate_by = 9
 
     def get_queryset(self):
-        queryset = (
-            CatalogDesign.objects.all()
-            .prefetch_related("gallery_images")
-            .annotate(quotes_count=Count("quotes", distinct=True))
-        )
+        queryset = CatalogDesign.objects.all().prefetch_related("gallery_images")
+        queryset = self.filter_designs(queryset, parse_facet_filters(self.request.GET))
+
+        sort = self.get_sort()
+        if sort == "relevance" and not self.request.GET.get("q", "").strip():
+            sort = "featured"
+        return queryset.order_by(*SORT_ORDERINGS.get(sort, SORT_ORDERINGS["featured"]))
+
+    def filter_designs(self, queryset, facet_filters: dict[str, Any]):
         params = self.request.GET
         search = params.get("q", "").strip()
         price_min = params.get("price_min")
         price_max = params.get("price_max")
         area_min = params.get("area_min")
         area_max = params.get("area_max")
-        bedrooms = params.get("bedrooms")
 
         if search:
-            queryset = queryset.filter(Q(name__icontains=search) | Q(concept__icontains=search))
-        # Handle Dashboard Presets (Budget)
-        budget = params.get("budget")
-        if budget == "3m":
-            queryset = queryset.filter(base_price__lte=3000000)
-        elif budget == "3-5m":
-            queryset = queryset.filter(base_price__gte=3000000, base_price__lte=5000000)
-        elif budget == "5-10m":
-            queryset = queryset.filter(base_price__gte=5000000, base_price__lte=10000000)
-        elif budget == "10m+":
-            queryset = queryset.filter(base_price__gte=10000000)
-
-        # Handle Dashboard Presets (Area)
-        area = params.get("area")
-        if area == "s":
-            queryset = queryset.filter(area_sqm__lt=150)
-        elif area == "m":
-            queryset = queryset.filter(area_sqm__gte=150, area_sqm__lte=250)
-        elif area == "l":
-            queryset = queryset.filter(area_sqm__gt=250)
-
-        # Handle Style
-        style = params.get("style")
-        if style:
-            queryset = queryset.filter(style=style)
+            queryset = search_designs(queryset, search)
+        # Dashboard presets (budget, area), style and bedrooms; the facet index only provides counts.
+        if facet_filters:
+            queryset = queryset.filter(filter_q(facet_filters))
 
         # Fallback/Advanced Filters (Manual inputs)
         if price_min:
@@ -86,30 +84,59 @@ class CatalogDesignListView(ListView):
                 queryset = queryset.filter(area_sqm__lte=int(area_max))
             except ValueError:
                 pass
-        if bedrooms:
-            try:
-                queryset = queryset.filter(bedrooms__gte=int(bedrooms))
-            except ValueError:
-                pass
-
-        sort = params.get("sort", "featured")
-        if sort == "price_asc":
-            queryset = queryset.order_by("base_price")
-        elif sort == "price_desc":
-            queryset = queryset.order_by("-base_price")
-        elif sort == "popularity":
-            queryset = queryset.order_by("-quotes_count", "name")
-        else:
-            queryset = queryset.order_by("-is_featured", "name")
-
         return queryset
 
+    def has_non_facet_filters(self) -> bool:
+        return any(self.request.GET.get(key, "").strip() for key in NON_FACET_FILTERS)
+
+    def get_bedroom_options(self, facet_filters: dict[str, Any]) -> list[tuple[str, int]]:
+        if not self.has_non_facet_filters():
+            index = get_facet_index()
+            return [(str(option), index.count(facet_filters, "bedrooms", option)) for option in BEDROOM_OPTIONS]
+        # The facet index only knows the facet filters; count the search and price/area results in SQL.
+        others = {facet: value for facet, value in facet_filters.items() if facet != "bedrooms"}
+        counts = self.filter_designs(CatalogDesign.objects.all(), others).aggregate(
+            **{str(option): Count("pk", filter=Q(bedrooms__gte=option)) for option in BEDROOM_OPTIONS}
+        )
+        return [(str(option), counts[str(option)]) for option in BEDROOM_OPTIONS]
+
+    def get_page_cache_defaults(self) -> dict[str, str]:
+        default_sort = "relevance" if self.request.GET.get("q", "").strip() else "featured"
+        return {"page": "1", "sort": default_sort}
+
+    def can_use_page_cache(self, request) -> bool:
+        # Quote signals move the popularity counters with update(), which does not bump the page
+        # version, so pages in that order are always rendered fresh.
+        return super().can_use_page_cache(request) and self.get_sort() != "popularity"
+
+    def get_sort(self) -> str:
+        return self.request.GET.get("sort") or ("relevance" if self.request.GET.get("q", "").strip() else "featured")
+
+    def use_cursor_pagination(self) -> bool:
+        return settings.CATALOG_PAGINATION == "cursor" or "cursor" in self.request.GET
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = KeysetPaginator(
+            queryset,
+            page_size,
+            ordering=queryset.query.order_by,
+            count_limit=settings.CATALOG_APPROXIMATE_COUNT_LIMIT,
+        )
+        try:
+            page = paginator.page(self.request.GET.get("cursor"))
+        except InvalidCursor as exc:
+            raise Http404("Invalid cursor.") from exc
+        return (paginator, page, page.object_list, page.has_other_pages())
+
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
         params_copy = self.request.GET.copy()
-        if "page" in params_copy:
-            params_copy.pop("page")
+        for key in ("page", "cursor"):
+            params_copy.pop(key, None)
         context["query_string"] = params_copy.urlencode()
+        context["cursor_pagination"] = self.use_cursor_pagination()
         context["filters"] = {
             "q": self.request.GET.get("q", ""),
             "price_min": self.request.GET.get("price_min", ""),
@@ -117,13 +144,16 @@ class CatalogDesignListView(ListView):
             "area_min": self.request.GET.get("area_min", ""),
             "area_max": self.request.GET.get("area_max", ""),
             "bedrooms": self.request.GET.get("bedrooms", ""),
-            "sort": self.request.GET.get("sort", "featured"),
+            "sort": self.get_sort(),
         }
-        context["bedroom_options"] = ("2", "3", "4", "5")
+        facet_filters = parse_facet_filters(self.request.GET)
+        # Index counts ignore search and price/area inputs, so they are left out when those are set.
+        context["facet_counts"] = None if self.has_non_facet_filters() else get_facet_index().counts(facet_filters)
+        context["bedroom_options"] = self.get_bedroom_options(facet_filters)
         return context
 
 
-class CatalogDesignDetailView(DetailView):
+class CatalogDesignDetailView(CatalogPageCacheMixin, DetailView):
     model = CatalogDesign
     template_name = "catalog/design_detail.html"
     context_object_name = "design"
@@ -132,13 +162,26 @@ class CatalogDesignDetailView(DetailView):
 
     def get_context_data(self, **kwargs: Any) -> dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        context["related_designs"] = (
-            CatalogDesign.objects.exclude(pk=self.object.pk)
-            .order_by("-is_featured", "name")[:3]
-        )
+        links = RelatedDesign.objects.filter(design=self.object).select_related("related")[:3]
+        related_designs = [link.related for link in links]
+        if not related_designs:
+            # Neighbours are computed after commit; fall back until the table catches up.
+            related_designs = (
+                CatalogDesign.objects.exclude(pk=self.object.pk)
+                .order_by("-is_featured", "name")[:3]
+            )
+        context["related_designs"] = related_designs
         return context
 
 
+class CatalogCacheStatsView(LoginRequiredMixin, UserPassesTestMixin, View):
+    def test_func(self) -> bool:
+        return self.request.user.is_staff
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        return JsonResponse(page_cache_stats())
+
+
 class CatalogDesignQuoteView(LoginRequiredMixin, View):
     def post(self, request: HttpRequest, slug: str, *args: Any, **kwargs: Any) -> HttpResponse:
         design = get_object_or_404(CatalogDesign, slug=slug)
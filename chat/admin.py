@@ -1,18 +1,47 @@
 from django.contrib import admin
 
-from .models import Conversation, Message
+from . import inbox, search
+from .models import Conversation, Message, ReadCursor
 
 
 @admin.register(Conversation)
 class ConversationAdmin(admin.ModelAdmin):
-    list_display = ("project", "customer", "created_at")
+    list_display = ("project", "customer", "last_message_at", "staff_unread", "customer_unread", "created_at")
+    readonly_fields = ("last_message_at", "last_message_preview", "last_message_sender", "staff_unread", "customer_unread")
     search_fields = ("project__id", "project__quote__design__title", "customer__username")
     autocomplete_fields = ("customer", "project")
 
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ("conversation", "sender", "timestamp", "is_read")
-    list_filter = ("is_read", "timestamp")
-    search_fields = ("conversation__project__quote__design__title", "sender__username", "content")
+    list_display = ("conversation", "sender", "timestamp")
+    list_filter = ("timestamp",)
+    search_fields = ("content",)
     autocomplete_fields = ("conversation", "sender")
+
+    def get_search_results(self, request, queryset, search_term):
+        # The n-gram index instead of a LIKE scan over every message (see chat.search).
+        if not search_term.strip():
+            return queryset, False
+        return search.search_messages(queryset, search_term), False
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change:
+            inbox.rebuild([obj.conversation_id])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        inbox.rebuild([obj.conversation_id])
+
+    def delete_queryset(self, request, queryset):
+        conversation_ids = list(queryset.values_list("conversation_id", flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        inbox.rebuild(conversation_ids)
+
+
+@admin.register(ReadCursor)
+class ReadCursorAdmin(admin.ModelAdmin):
+    list_display = ("conversation", "user", "last_read_message_id", "updated_at")
+    search_fields = ("user__username",)
+    readonly_fields = ("conversation", "user", "last_read_message_id", "updated_at")
@@ -0,0 +1,128 @@
+"""Per-participant read positions, written behind in batches.
+
+A :class:`~chat.models.ReadCursor` holds the id of the newest message a user has seen in a
+conversation and only ever moves forward. Opening a room, polling and the event stream call
+:func:`advance`, which just records the new position in this process's buffer; the buffer is
+written at most once every ``CHAT_READ_CURSOR_FLUSH_INTERVAL`` seconds (``0`` writes through), so
+a tab polling every few seconds no longer takes the SQLite write lock on each request. Flushing
+also recounts the unread counters of the affected conversations (see :mod:`chat.inbox`).
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import inbox
+from .models import Conversation, ReadCursor
+
+logger = logging.getLogger(__name__)
+
+# Positions already written by this process, so re-reading the same messages buffers nothing.
+# Cleared wholesale when it grows past this many entries.
+KNOWN_LIMIT = 10_000
+
+
+def flush_interval() -> float:
+    return getattr(settings, "CHAT_READ_CURSOR_FLUSH_INTERVAL", 5)
+
+
+class ReadCursorBuffer:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pending: dict[tuple[int, int], int] = {}
+        self._known: dict[tuple[int, int], int] = {}
+        self._timer: threading.Timer | None = None
+        self._timer_pid: int | None = None
+
+    def advance(self, conversation_id: int, user_id: int, message_id: int) -> bool:
+        """Move a cursor forward in the buffer; returns whether it moved."""
+        key = (conversation_id, user_id)
+        interval = flush_interval()
+        with self._lock:
+            if message_id <= max(self._pending.get(key, 0), self._known.get(key, 0)):
+                return False
+            self._pending[key] = message_id
+            if interval > 0:
+                self._schedule(interval)
+        if interval <= 0:
+            self.flush()
+        return True
+
+    def flush(self) -> int:
+        """Write every buffered position; returns the number of cursors written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+        if not pending:
+            return 0
+        try:
+            write(pending)
+        except Exception:
+            # Put the positions back (unless newer ones arrived meanwhile) for the next flush.
+            with self._lock:
+                for key, message_id in pending.items():
+                    if message_id > self._pending.get(key, 0):
+                        self._pending[key] = message_id
+            raise
+        with self._lock:
+            if len(self._known) + len(pending) > KNOWN_LIMIT:
+                self._known.clear()
+            for key, message_id in pending.items():
+                self._known[key] = max(message_id, self._known.get(key, 0))
+        return len(pending)
+
+    def _schedule(self, interval: float) -> None:
+        # A timer inherited from a parent process (e.g. a preloading server forking workers) never
+        # runs in the child, so it does not count as scheduled.
+        if self._timer is not None and self._timer_pid == os.getpid():
+            return
+        self._timer = threading.Timer(interval, self._flush_quietly)
+        self._timer.daemon = True
+        self._timer_pid = os.getpid()
+        self._timer.start()
+
+    def _flush_quietly(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Could not write chat read cursors")
+            if flush_interval() > 0:
+                with self._lock:
+                    self._schedule(flush_interval())
+        finally:
+            # Runs on the timer thread (or at exit), which has its own database connection.
+            connection.close()
+
+
+def write(positions: dict[tuple[int, int], int]) -> None:
+    """Store cursor positions, never moving an existing cursor backwards."""
+    now = timezone.now()
+    # A conversation deleted since it was read would fail the whole batch on its foreign key.
+    live = set(Conversation.objects.filter(pk__in={key[0] for key in positions}).values_list("pk", flat=True))
+    positions = {key: message_id for key, message_id in positions.items() if key[0] in live}
+    with transaction.atomic():
+        ReadCursor.objects.bulk_create(
+            [
+                ReadCursor(conversation_id=conversation_id, user_id=user_id, last_read_message_id=message_id)
+                for (conversation_id, user_id), message_id in positions.items()
+            ],
+            ignore_conflicts=True,
+        )
+        for (conversation_id, user_id), message_id in positions.items():
+            ReadCursor.objects.filter(
+                conversation_id=conversation_id, user_id=user_id, last_read_message_id__lt=message_id
+            ).update(last_read_message_id=message_id, updated_at=now)
+        inbox.recount(live)
+
+
+buffer = ReadCursorBuffer()
+advance = buffer.advance
+flush = buffer.flush
+atexit.register(buffer._flush_quietly)
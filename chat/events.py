@@ -0,0 +1,190 @@
+"""Server-sent events for chat rooms.
+
+``MessageCreateView`` publishes "conversation N has a new message" through a broker; every open
+event stream on that conversation wakes up, reads the messages after its cursor from the
+database and pushes them to the browser. Events only carry the conversation id, so the database
+stays the source of truth: ``Last-Event-ID`` resume, missed notifications and streams connected
+to another worker process are all handled by the same "messages after id N" query, which the
+stream also runs on every heartbeat.
+
+The broker is chosen by ``CHAT_EVENT_BROKER``. :class:`InProcessBroker` (the default) only
+reaches streams served by the same process; :class:`RedisBroker` shares events between worker
+processes through Redis pub/sub and needs the ``redis`` package.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+
+
+class Subscription:
+    """One stream's interest in one conversation."""
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait up to ``timeout`` seconds for an event; ``True`` if one arrived."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class Broker:
+    def publish(self, conversation_id: int) -> None:
+        """Announce a new message; called from synchronous views after the transaction commits."""
+        raise NotImplementedError
+
+    async def subscribe(self, conversation_id: int) -> Subscription:
+        raise NotImplementedError
+
+
+class _LocalSubscription(Subscription):
+    def __init__(self, broker: InProcessBroker, conversation_id: int) -> None:
+        self.broker = broker
+        self.conversation_id = conversation_id
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+
+    def notify(self) -> None:
+        # Publishers run in other threads; asyncio.Event is only safe to touch from its own loop.
+        self.loop.call_soon_threadsafe(self.event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        # Several messages arriving before the stream catches up collapse into one wake-up.
+        self.event.clear()
+        return True
+
+    async def close(self) -> None:
+        self.broker._remove(self)
+
+
+class InProcessBroker(Broker):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: dict[int, set[_LocalSubscription]] = defaultdict(set)
+
+    def publish(self, conversation_id: int) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(conversation_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.notify()
+            except RuntimeError:
+                pass  # the stream's event loop has shut down; close() will drop it
+
+    async def subscribe(self, conversation_id: int) -> Subscription:
+        subscription = _LocalSubscription(self, conversation_id)
+        with self._lock:
+            self._subscriptions[conversation_id].add(subscription)
+        return subscription
+
+    def _remove(self, subscription: _LocalSubscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.conversation_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.conversation_id]
+
+
+class _RedisSubscription(Subscription):
+    def __init__(self, pubsub) -> None:
+        self.pubsub = pubsub
+
+    async def wait(self, timeout: float) -> bool:
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return False
+        # Drain anything else already queued so a burst wakes the stream once.
+        while await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=0) is not None:
+            pass
+        return True
+
+    async def close(self) -> None:
+        await self.pubsub.aclose()
+
+
+class RedisBroker(Broker):
+    """Shares events between processes through Redis pub/sub (``CHAT_EVENT_REDIS_URL``)."""
+
+    def __init__(self) -> None:
+        try:
+            import redis
+            import redis.asyncio
+        except ImportError as exc:
+            raise ImproperlyConfigured("RedisBroker needs the redis package (pip install redis).") from exc
+        self.url = getattr(settings, "CHAT_EVENT_REDIS_URL", "redis://localhost:6379/0")
+        self._client = redis.Redis.from_url(self.url)
+        self._async_client = redis.asyncio.Redis.from_url(self.url)
+
+    @staticmethod
+    def channel(conversation_id: int) -> str:
+        return f"chat:conversation:{conversation_id}"
+
+    def publish(self, conversation_id: int) -> None:
+        self._client.publish(self.channel(conversation_id), "message")
+
+    async def subscribe(self, conversation_id: int) -> Subscription:
+        pubsub = self._async_client.pubsub()
+        await pubsub.subscribe(self.channel(conversation_id))
+        return _RedisSubscription(pubsub)
+
+
+_broker: Broker | None = None
+_broker_lock = threading.Lock()
+
+
+def get_broker() -> Broker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, "CHAT_EVENT_BROKER", "chat.events.InProcessBroker"))()
+    return _broker
+
+
+def publish(conversation_id: int) -> None:
+    get_broker().publish(conversation_id)
+
+
+class ConnectionLimit:
+    """Counts open event streams in this process and refuses new ones past ``CHAT_SSE_MAX_CONNECTIONS``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.open = 0
+
+    def acquire(self) -> bool:
+        with self._lock:
+            if self.open >= getattr(settings, "CHAT_SSE_MAX_CONNECTIONS", 500):
+                return False
+            self.open += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.open -= 1
+
+
+connections = ConnectionLimit()
+
+
+def format_event(data: str, event: str | None = None, event_id: int | None = None, retry: int | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    lines += [f"data: {line}" for line in data.splitlines() or [""]]
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+
+from django import forms
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from construction.models import ConstructionProject
+
+
+class MessageSearchForm(forms.Form):
+    q = forms.CharField(label="คำค้นหา", max_length=200, required=False)
+    project = forms.ModelChoiceField(
+        label="โครงการ",
+        queryset=ConstructionProject.objects.none(),
+        required=False,
+        empty_label="ทุกโครงการ",
+    )
+    customer = forms.ModelChoiceField(
+        label="ลูกค้า",
+        queryset=get_user_model().objects.none(),
+        required=False,
+        empty_label="ลูกค้าทั้งหมด",
+    )
+    date_from = forms.DateField(label="ตั้งแต่วันที่", required=False, widget=forms.DateInput(attrs={"type": "date"}))
+    date_to = forms.DateField(label="ถึงวันที่", required=False, widget=forms.DateInput(attrs={"type": "date"}))
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.fields["project"].queryset = ConstructionProject.objects.filter(conversation__isnull=False).select_related(
+            "owner", "quote", "quote__design", "quote__catalog_design"
+        )
+        self.fields["customer"].queryset = (
+            get_user_model().objects.filter(conversations__isnull=False).distinct().order_by("username")
+        )
+        self.fields["customer"].label_from_instance = lambda user: user.get_full_name() or user.username
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from, date_to = cleaned_data.get("date_from"), cleaned_data.get("date_to")
+        if date_from and date_to and date_from > date_to:
+            self.add_error("date_to", "วันที่สิ้นสุดต้องไม่ก่อนวันที่เริ่มต้น")
+        return cleaned_data
+
+    def filter(self, messages_qs):
+        """Apply the project, customer and date filters; dates are whole days in local time."""
+        data = self.cleaned_data
+        if data.get("project"):
+            messages_qs = messages_qs.filter(conversation__project=data["project"])
+        if data.get("customer"):
+            messages_qs = messages_qs.filter(conversation__customer=data["customer"])
+        # Compare against datetimes rather than timestamp__date so the filter stays a plain range.
+        if data.get("date_from"):
+            messages_qs = messages_qs.filter(
+                timestamp__gte=timezone.make_aware(datetime.combine(data["date_from"], time.min))
+            )
+        if data.get("date_to"):
+            messages_qs = messages_qs.filter(
+                timestamp__lt=timezone.make_aware(datetime.combine(data["date_to"] + timedelta(days=1), time.min))
+            )
+        return messages_qs
@@ -0,0 +1,92 @@
+"""Upkeep of the inbox summary stored on each :class:`~chat.models.Conversation`.
+
+Every new message bumps ``last_message_*`` and the unread count of the side that did not send
+it. A side's unread count is the number of the other side's messages past its furthest read
+cursor (the customer's, or whichever staff member has read furthest); it is recounted whenever
+cursors are written (see :mod:`chat.cursors`). The staff inbox is then a single indexed query over
+conversations (see ``INBOX_ORDERING``).
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db.models import Case, Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Substr
+
+from .models import PREVIEW_LENGTH, Conversation, Message, ReadCursor
+
+
+def preview(content: str) -> str:
+    # Same cut as the Substr() in summary_annotations(), so rebuilt summaries match.
+    return content[:PREVIEW_LENGTH]
+
+
+def record_message(message: Message) -> None:
+    """Fold a newly created message into its conversation's summary with one UPDATE."""
+    counter = "customer_unread" if message.sender.is_staff else "staff_unread"
+    # Only move the summary forward, in case two messages commit out of order.
+    newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.timestamp)
+
+    def latest(value, field: str):
+        return Case(When(newer, then=Value(value)), default=F(field), output_field=Conversation._meta.get_field(field))
+
+    Conversation.objects.filter(pk=message.conversation_id).update(
+        last_message_at=latest(message.timestamp, "last_message_at"),
+        last_message_preview=latest(preview(message.content), "last_message_preview"),
+        last_message_sender=latest(message.sender_id, "last_message_sender"),
+        **{counter: F(counter) + 1},
+    )
+
+
+def summary_annotations() -> dict:
+    """Expressions recomputing every summary field from the message table."""
+    latest = Message.objects.filter(conversation=OuterRef("pk")).order_by("-timestamp", "-pk")
+    return {
+        "last_message_at": Subquery(latest.values("timestamp")[:1]),
+        "last_message_preview": Coalesce(
+            Subquery(latest.annotate(text=Substr("content", 1, PREVIEW_LENGTH)).values("text")[:1]), Value("")
+        ),
+        "last_message_sender": Subquery(latest.values("sender")[:1]),
+        **unread_annotations(),
+    }
+
+
+def unread_annotations() -> dict:
+    """Expressions counting each side's unread messages from the read cursors."""
+
+    def unread_by(staff: bool):
+        read_up_to = (
+            ReadCursor.objects.filter(conversation=OuterRef(OuterRef("pk")), user__is_staff=staff)
+            .order_by()
+            .values("conversation")
+            .annotate(position=Max("last_read_message_id"))
+            .values("position")
+        )
+        counts = (
+            Message.objects.filter(
+                conversation=OuterRef("pk"),
+                sender__is_staff=not staff,
+                pk__gt=Coalesce(Subquery(read_up_to), 0),
+            )
+            .order_by()
+            .values("conversation")
+            .annotate(total=Count("pk"))
+            .values("total")
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    return {"customer_unread": unread_by(False), "staff_unread": unread_by(True)}
+
+
+def recount(conversation_ids: Iterable[int]) -> int:
+    """Recompute the unread counts of the given conversations from their cursors."""
+    return Conversation.objects.filter(pk__in=list(conversation_ids)).update(**unread_annotations())
+
+
+def rebuild(conversation_ids: list[int] | None = None) -> int:
+    """Recompute the summaries (of the given conversations, or all) with one UPDATE."""
+    conversations = Conversation.objects.all()
+    if conversation_ids is not None:
+        conversations = conversations.filter(pk__in=conversation_ids)
+    return conversations.update(**summary_annotations())
@@ -0,0 +1,91 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from chat.models import Conversation, Message
+from chat.views import ChatRoomView, MessageListView
+from construction.models import ConstructionProject
+
+
+class Command(BaseCommand):
+    help = (
+        "Time opening a chat room and loading one older page for conversations of increasing length. "
+        "Runs against throwaway data that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            default="100,1000,10000,50000",
+            help="Comma-separated message counts, one synthetic conversation each.",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Timed requests per conversation.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",") if size.strip()]
+        except ValueError:
+            raise CommandError("--sizes must be a comma-separated list of whole numbers.") from None
+        if not sizes or min(sizes) < 1:
+            raise CommandError("--sizes must list at least one positive message count.")
+        repeat = max(1, options["repeat"])
+
+        with transaction.atomic():
+            self.run(sizes, repeat)
+            transaction.set_rollback(True)
+
+    def run(self, sizes, repeat):
+        User = get_user_model()
+        tag = uuid.uuid4().hex[:8]
+        customer = User.objects.create_user(f"bench-customer-{tag}")
+        staff = User.objects.create_user(f"bench-staff-{tag}", is_staff=True)
+        factory = RequestFactory(SERVER_NAME="localhost")
+        today = timezone.localdate()
+
+        for size in sizes:
+            project = ConstructionProject.objects.create(owner=customer, start_date=today, expected_end_date=today)
+            conversation = Conversation.objects.create(project=project, customer=customer)
+            Message.objects.bulk_create(
+                (
+                    Message(conversation=conversation, sender=staff if index % 3 else customer, content=f"Message {index}")
+                    for index in range(size)
+                ),
+                batch_size=1000,
+            )
+            middle = conversation.messages.order_by("id").values_list("id", flat=True)[size // 2]
+
+            open_time, open_queries = self.measure(
+                factory.get(f"/chat/conversations/{conversation.pk}/"), staff, ChatRoomView, conversation.pk, repeat
+            )
+            older_time, older_queries = self.measure(
+                factory.get(f"/chat/conversations/{conversation.pk}/messages/", {"before": middle}),
+                staff,
+                MessageListView,
+                conversation.pk,
+                repeat,
+            )
+            self.stdout.write(
+                f"{size:>8} messages: open {open_time * 1000:7.1f} ms ({open_queries} queries), "
+                f"older page {older_time * 1000:7.1f} ms ({older_queries} queries)"
+            )
+
+    def measure(self, request, user, view_class, pk, repeat):
+        request.user = user
+        view = view_class.as_view()
+        timings = []
+        for _ in range(repeat + 1):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = view(request, pk=pk)
+                if hasattr(response, "render"):
+                    response.render()
+                timings.append(time.perf_counter() - started)
+        # The first request warms template and query caches and is not counted.
+        return statistics.median(timings[1:]), len(queries)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from chat import inbox
+
+
+class Command(BaseCommand):
+    help = "Recompute the last-message summary and unread counts stored on every conversation."
+
+    def handle(self, *args, **options):
+        updated = inbox.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the inbox summary of {updated} conversations."))
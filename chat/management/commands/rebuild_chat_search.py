@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from chat.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the n-gram search index over chat message content."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of messages tokenized and written per batch.",
+        )
+
+    def handle(self, *args, **options):
+        indexed = rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} chat messages."))
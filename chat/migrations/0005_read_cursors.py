@@ -0,0 +1,95 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def cursors_from_read_flags(apps, schema_editor):
+    # Each side's cursor starts at the newest message from the other side it had marked read.
+    Conversation = apps.get_model('chat', 'Conversation')
+    Message = apps.get_model('chat', 'Message')
+    ReadCursor = apps.get_model('chat', 'ReadCursor')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+
+    customers = dict(Conversation.objects.values_list('pk', 'customer_id'))
+    # Read flags were shared by all staff, so credit the staff members who took part in each
+    # conversation, or every active staff member where nobody has replied yet.
+    participants = {}
+    for conversation_id, sender_id in (
+        Message.objects.filter(sender__is_staff=True).values_list('conversation', 'sender').distinct()
+    ):
+        participants.setdefault(conversation_id, set()).add(sender_id)
+    all_staff = set(User.objects.filter(is_staff=True, is_active=True).values_list('pk', flat=True))
+
+    cursors = []
+    positions = (
+        Message.objects.filter(is_read=True)
+        .order_by()
+        .values('conversation', 'sender__is_staff')
+        .annotate(position=Max('pk'))
+    )
+    for row in positions:
+        conversation_id = row['conversation']
+        if row['sender__is_staff']:
+            readers = {customers[conversation_id]}
+        else:
+            readers = participants.get(conversation_id) or all_staff
+        cursors.extend(
+            ReadCursor(conversation_id=conversation_id, user_id=user_id, last_read_message_id=row['position'])
+            for user_id in readers
+        )
+    ReadCursor.objects.bulk_create(cursors, batch_size=1000, ignore_conflicts=True)
+
+    # Same expressions as chat.inbox.unread_annotations(), against the historical models.
+    def unread_by(staff):
+        read_up_to = (
+            ReadCursor.objects.filter(conversation=OuterRef(OuterRef('pk')), user__is_staff=staff)
+            .order_by()
+            .values('conversation')
+            .annotate(position=Max('last_read_message_id'))
+            .values('position')
+        )
+        counts = (
+            Message.objects.filter(
+                conversation=OuterRef('pk'), sender__is_staff=not staff, pk__gt=Coalesce(Subquery(read_up_to), 0)
+            )
+            .order_by()
+            .values('conversation')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    Conversation.objects.update(customer_unread=unread_by(False), staff_unread=unread_by(True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_message_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReadCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_read_message_id', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_cursors', to='chat.conversation')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chat_read_cursors', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('conversation', 'user'), name='chat_readcursor_unique')],
+            },
+        ),
+        migrations.RunPython(cursors_from_read_flags, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='message',
+            name='is_read',
+        ),
+    ]
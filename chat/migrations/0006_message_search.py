@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:13
+
+import django.db.models.deletion
+import unicodedata
+
+from django.db import migrations, models
+
+# A frozen copy of the tokenizer in catalog.search as it stood when the index was introduced, so
+# later changes to that module cannot change (or break) this migration.
+NGRAM_SIZE = 3
+MAX_TERM_LENGTH = 32
+
+
+def tokenize(text):
+    terms = []
+    clusters = []
+    for char in unicodedata.normalize('NFC', text or '').casefold() + ' ':
+        if unicodedata.category(char).startswith('M'):
+            if clusters:
+                clusters[-1] += char
+        elif char.isalnum():
+            clusters.append(char)
+        elif clusters:
+            terms.extend(
+                ''.join(clusters[start:start + NGRAM_SIZE])[:MAX_TERM_LENGTH]
+                for start in range(len(clusters))
+            )
+            clusters = []
+    return terms
+
+
+def index_existing_messages(apps, schema_editor):
+    Message = apps.get_model('chat', 'Message')
+    MessageSearchTerm = apps.get_model('chat', 'MessageSearchTerm')
+    postings = []
+    for message in Message.objects.only('pk', 'content').iterator(chunk_size=1000):
+        postings.extend(MessageSearchTerm(message_id=message.pk, term=term) for term in set(tokenize(message.content)))
+        if len(postings) >= 10000:
+            MessageSearchTerm.objects.bulk_create(postings, batch_size=1000)
+            postings = []
+    MessageSearchTerm.objects.bulk_create(postings, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_read_cursors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MessageSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=32)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='chat.message')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('term', 'message'), name='unique_chat_search_term')],
+            },
+        ),
+        migrations.RunPython(index_existing_messages, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,19 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce, Least
 
 from construction.models import ConstructionProject
 
+PREVIEW_LENGTH = 120
+# Staff inbox order: conversations with unread customer messages first, then most recent activity
+# (conversations without messages count from their creation).
+INBOX_ORDERING = (
+    Least("staff_unread", Value(1)).desc(),
+    Coalesce("last_message_at", "created_at").desc(),
+    F("id").desc(),
+)
+
 
 class Conversation(models.Model):
     customer = models.ForeignKey(
@@ -16,9 +27,27 @@ class Conversation(models.Model):
         related_name="conversation",
     )
     created_at = models.DateTimeField(auto_now_add=True)
+    # Summary of the latest message and unread counts per side, kept current by chat.inbox so the
+    # inbox never has to read the message table.
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_preview = models.CharField(max_length=PREVIEW_LENGTH, blank=True)
+    last_message_sender = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="+",
+        null=True,
+        blank=True,
+    )
+    # Messages from staff past the customer's read cursor, and customer messages past the furthest
+    # staff read cursor (see chat.cursors).
+    customer_unread = models.PositiveIntegerField(default=0)
+    staff_unread = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(*INBOX_ORDERING, name="chat_conversation_inbox_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Conversation for {self.project}"
@@ -37,13 +66,62 @@ class Message(models.Model):
     )
     content = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
 
     class Meta:
         ordering = ["timestamp"]
+        indexes = [
+            # Delta polls ask "anything in this conversation after id N?".
+            models.Index(fields=["conversation", "id"], name="chat_message_conv_id_idx"),
+            # History pages are keyed on (timestamp, id) within a conversation, newest first.
+            models.Index(fields=["conversation", "timestamp", "id"], name="chat_message_conv_ts_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Message from {self.sender} at {self.timestamp:%Y-%m-%d %H:%M}"
 
     def is_from_admin(self) -> bool:
         return bool(self.sender and self.sender.is_staff)
+
+
+class ReadCursor(models.Model):
+    """The newest message a participant has seen in a conversation; see chat.cursors."""
+
+    conversation = models.ForeignKey(
+        Conversation,
+        on_delete=models.CASCADE,
+        related_name="read_cursors",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="chat_read_cursors",
+    )
+    last_read_message_id = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["conversation", "user"], name="chat_readcursor_unique"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} read {self.conversation} up to message {self.last_read_message_id}"
+
+
+class MessageSearchTerm(models.Model):
+    """One posting of the staff message search index: an n-gram occurring in a message."""
+
+    message = models.ForeignKey(
+        Message,
+        on_delete=models.CASCADE,
+        related_name="search_terms",
+    )
+    term = models.CharField(max_length=32)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["term", "message"], name="unique_chat_search_term"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.term} → {self.message_id}"
@@ -0,0 +1,120 @@
+"""Staff search over chat messages.
+
+Messages are indexed with the catalog's Thai-aware n-grams (see :mod:`catalog.search`): each
+posting is one n-gram of a message's content, looked up through the ``(term, message)`` index.
+New and edited messages are indexed when their transaction commits, deleted ones lose their
+postings through the foreign key cascade, and ``manage.py rebuild_chat_search`` rebuilds the lot.
+"""
+
+from __future__ import annotations
+
+import re
+import unicodedata
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Count, Q, QuerySet
+from django.utils.html import escape, format_html
+from django.utils.safestring import SafeString, mark_safe
+
+from catalog.search import parse_query, runs, tokenize, whole_words_q
+
+from .models import Message, MessageSearchTerm
+
+SNIPPET_LENGTH = 160
+# Upper bound used to turn a prefix lookup into an index-friendly range scan.
+_PREFIX_SENTINEL = "\U0010ffff"
+
+
+def _prefix_q(prefix: str) -> Q:
+    return Q(term__gte=prefix, term__lt=prefix + _PREFIX_SENTINEL)
+
+
+def index_messages(messages: Iterable[Message], batch_size: int = 1000) -> int:
+    """(Re)index the given messages, replacing their previous postings."""
+    messages = list(messages)
+    if not messages:
+        return 0
+    postings = [
+        MessageSearchTerm(message_id=message.pk, term=term)
+        for message in messages
+        for term in set(tokenize(message.content))
+    ]
+    with transaction.atomic():
+        MessageSearchTerm.objects.filter(message_id__in=[message.pk for message in messages]).delete()
+        MessageSearchTerm.objects.bulk_create(postings, batch_size=batch_size)
+    return len(postings)
+
+
+def index_message(message: Message) -> int:
+    return index_messages([message])
+
+
+def rebuild_index(batch_size: int = 1000) -> int:
+    """Rebuild the whole index in batches; returns the number of messages indexed."""
+    MessageSearchTerm.objects.all().delete()
+    indexed = 0
+    batch: list[Message] = []
+    for message in Message.objects.only("pk", "content").order_by("pk").iterator(chunk_size=batch_size):
+        batch.append(message)
+        if len(batch) >= batch_size:
+            indexed += len(batch)
+            index_messages(batch)
+            batch = []
+    if batch:
+        indexed += len(batch)
+        index_messages(batch)
+    return indexed
+
+
+def search_messages(queryset: QuerySet, query: str) -> QuerySet:
+    """Filter ``queryset`` to messages containing every word of ``query``."""
+    grams, prefixes = parse_query(query)
+    if not grams and not prefixes:
+        return queryset.none()
+    if grams:
+        matching = (
+            MessageSearchTerm.objects.filter(term__in=grams)
+            .values("message")
+            .annotate(matched=Count("id"))
+            .filter(matched=len(grams))
+            .values("message")
+        )
+        queryset = queryset.filter(pk__in=matching, *whole_words_q(query, ["content"]))
+    for prefix in prefixes:
+        queryset = queryset.filter(
+            pk__in=MessageSearchTerm.objects.filter(_prefix_q(prefix)).values("message")
+        )
+    return queryset
+
+
+def _cluster_boundary(text: str, position: int) -> int:
+    # Step back off combining marks so a snippet never starts or ends inside a Thai cluster.
+    while 0 < position < len(text) and unicodedata.category(text[position]).startswith("M"):
+        position -= 1
+    return position
+
+
+def highlight(content: str, query: str, length: int = SNIPPET_LENGTH) -> SafeString:
+    """HTML snippet of ``content`` around the first match of ``query``, matches wrapped in ``<mark>``."""
+    text = unicodedata.normalize("NFC", content)
+    words = sorted({"".join(run) for run in runs(query)}, key=len, reverse=True)
+    pattern = re.compile("|".join(re.escape(word) for word in words), re.IGNORECASE) if words else None
+    first = pattern.search(text) if pattern else None
+    start = 0
+    if first is not None and len(text) > length:
+        start = _cluster_boundary(text, max(0, min(first.start() - length // 3, len(text) - length)))
+    end = _cluster_boundary(text, min(len(text), start + length))
+    window = text[start:end]
+
+    parts = ["…"] if start else []
+    position = 0
+    if pattern is not None:
+        for match in pattern.finditer(window):
+            parts.append(escape(window[position:match.start()]))
+            parts.append(format_html("<mark>{}</mark>", match.group()))
+            position = match.end()
+    parts.append(escape(window[position:]))
+    if end < len(text):
+        parts.append("…")
+    return mark_safe("".join(parts))
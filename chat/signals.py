@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from . import inbox, search
+from .models import Message
+
+
+@receiver(post_save, sender=Message)
+def summarize_new_message(sender, instance: Message, created: bool, **kwargs):
+    # Deletions are rare (admin only) and handled there, which keeps cascades fast-deletable.
+    if created:
+        inbox.record_message(instance)
+
+
+@receiver(post_save, sender=Message)
+def index_message_on_save(sender, instance: Message, update_fields=None, **kwargs):
+    # Postings of deleted messages go away through the foreign key cascade.
+    if update_fields is not None and "content" not in update_fields:
+        return
+    transaction.on_commit(lambda: search.index_message(instance))
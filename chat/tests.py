@@ -0,0 +1,162 @@
+import unicodedata
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from construction.models import ConstructionProject
+
+from . import search
+from .forms import MessageSearchForm
+from .models import Conversation, Message, MessageSearchTerm
+
+
+def make_conversation(customer) -> Conversation:
+    today = timezone.localdate()
+    project = ConstructionProject.objects.create(owner=customer, start_date=today, expected_end_date=today)
+    return Conversation.objects.create(project=project, customer=customer)
+
+
+@override_settings(CHAT_READ_CURSOR_FLUSH_INTERVAL=0)
+class MessageStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.customer = User.objects.create_user("customer")
+        cls.staff = User.objects.create_user("staff", is_staff=True)
+        cls.conversation = make_conversation(cls.customer)
+        cls.messages = [
+            Message.objects.create(conversation=cls.conversation, sender=cls.staff, content=f"Update {index}")
+            for index in range(3)
+        ]
+
+    async def read_events(self, count: int, data=None, headers=None) -> list[str]:
+        await self.async_client.aforce_login(self.customer)
+        response = await self.async_client.get(
+            reverse("chat:stream", kwargs={"pk": self.conversation.pk}), data, headers=headers
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = []
+        try:
+            async for chunk in response.streaming_content:
+                events.append(chunk.decode())
+                if len(events) == count:
+                    break
+        finally:
+            response.close()
+        return events
+
+    async def test_stream_resumes_after_last_event_id(self):
+        first = self.messages[0]
+        ready, *events = await self.read_events(3, headers={"Last-Event-ID": str(first.pk)})
+        self.assertIn("event: ready", ready)
+        self.assertEqual(
+            [event.splitlines()[0] for event in events],
+            [f"id: {message.pk}" for message in self.messages[1:]],
+        )
+        self.assertIn("Update 2", events[-1])
+
+    async def test_stream_starts_after_the_given_message(self):
+        _, event = await self.read_events(2, {"after": self.messages[1].pk})
+        self.assertTrue(event.startswith(f"id: {self.messages[2].pk}\n"))
+
+    def test_stream_is_refused_under_wsgi(self):
+        self.client.force_login(self.customer)
+        response = self.client.get(reverse("chat:stream", kwargs={"pk": self.conversation.pk}))
+        self.assertEqual(response.status_code, 503)
+
+
+class MessageSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.customer = User.objects.create_user("customer")
+        cls.other_customer = User.objects.create_user("other")
+        cls.staff = User.objects.create_user("staff", is_staff=True)
+        cls.conversation = make_conversation(cls.customer)
+        cls.other_conversation = make_conversation(cls.other_customer)
+
+    def post(self, content: str, conversation=None) -> Message:
+        with self.captureOnCommitCallbacks(execute=True):
+            return Message.objects.create(
+                conversation=conversation or self.conversation, sender=self.staff, content=content
+            )
+
+    def found(self, query: str, queryset=None) -> list[str]:
+        queryset = Message.objects.all() if queryset is None else queryset
+        return sorted(search.search_messages(queryset, query).values_list("content", flat=True))
+
+    def test_messages_are_indexed_when_saved(self):
+        message = self.post("กระเบื้องห้องน้ำ")
+        self.assertTrue(MessageSearchTerm.objects.filter(message=message).exists())
+        self.assertEqual(self.found("ห้องน้ำ"), ["กระเบื้องห้องน้ำ"])
+        message.content = "ประตูหน้าบ้าน"
+        with self.captureOnCommitCallbacks(execute=True):
+            message.save()
+        self.assertEqual(self.found("ห้องน้ำ"), [])
+        self.assertEqual(self.found("ประตู"), ["ประตูหน้าบ้าน"])
+
+    def test_saves_that_skip_the_content_are_not_reindexed(self):
+        message = self.post("Roof tiles")
+        with self.captureOnCommitCallbacks() as callbacks:
+            message.save(update_fields=["timestamp"])
+        self.assertEqual(callbacks, [])
+
+    def test_every_word_must_appear_whole(self):
+        self.post("Tiles arrive Monday")
+        self.post("Tilxiles for the bathroom")
+        # The second message holds every trigram of "tiles" but not the word.
+        self.assertEqual(self.found("tiles"), ["Tiles arrive Monday"])
+        self.assertEqual(self.found("tiles bathroom"), [])
+        self.assertEqual(self.found("mo"), ["Tiles arrive Monday"])
+        self.assertEqual(self.found("!!"), [])
+
+    def test_form_filters_by_project_customer_and_day(self):
+        today = self.post("Concrete poured")
+        other = self.post("Concrete ordered", self.other_conversation)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        Message.objects.filter(pk=other.pk).update(
+            timestamp=timezone.make_aware(datetime.combine(yesterday, time(23, 59)))
+        )
+
+        def filtered(**data) -> list[str]:
+            form = MessageSearchForm({"q": "concrete", **data})
+            self.assertTrue(form.is_valid(), form.errors)
+            return self.found("concrete", form.filter(Message.objects.all()))
+
+        self.assertEqual(filtered(), ["Concrete ordered", "Concrete poured"])
+        self.assertEqual(filtered(project=self.conversation.project_id), [today.content])
+        self.assertEqual(filtered(customer=self.other_customer.pk), [other.content])
+        self.assertEqual(filtered(date_to=yesterday.isoformat()), [other.content])
+        self.assertEqual(filtered(date_from=timezone.localdate().isoformat()), [today.content])
+        form = MessageSearchForm({"date_from": timezone.localdate().isoformat(), "date_to": yesterday.isoformat()})
+        self.assertFalse(form.is_valid())
+
+    def test_highlight_marks_matches_and_escapes_content(self):
+        snippet = search.highlight("<b>Tiles</b> and more tiles", "tiles")
+        self.assertEqual(snippet, "&lt;b&gt;<mark>Tiles</mark>&lt;/b&gt; and more <mark>tiles</mark>")
+
+    def test_highlight_never_splits_a_thai_cluster(self):
+        content = "ผู้รับเหมาแจ้งว่าน้ำท่วมหน้าบ้าน" * 6 + "ต้องเลื่อนส่งกระเบื้อง" + "ที่ไซต์งานก่อสร้างน้ำท่วม" * 6
+        for length in range(20, 60, 3):
+            with self.subTest(length=length):
+                snippet = search.highlight(content, "กระเบื้อง", length=length)
+                text = snippet.replace("<mark>", "").replace("</mark>", "").strip("…")
+                self.assertIn(text, content)
+                self.assertFalse(unicodedata.category(text[0]).startswith("M"))
+                # A window ending just before a mark would leave that mark orphaned in the next one.
+                end = content.index(text) + len(text)
+                self.assertFalse(end < len(content) and unicodedata.category(content[end]).startswith("M"))
+                self.assertIn("<mark>กระเบื้อง</mark>", snippet)
+
+    def test_search_view_is_for_staff_only(self):
+        self.post("Window frames delivered")
+        url = reverse("chat:search")
+        self.client.force_login(self.customer)
+        self.assertEqual(self.client.get(url, {"q": "window"}).status_code, 403)
+        self.client.force_login(self.staff)
+        response = self.client.get(url, {"q": "window"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "<mark>Window</mark> frames delivered", html=False)
@@ -5,15 +5,19 @@ from .views import (
     ConversationListView,
     MessageCreateView,
     MessageListView,
+    MessageSearchView,
     ProjectConversationRedirectView,
+    message_stream,
 )
 
 app_name = "chat"
 
 urlpatterns = [
     path("inbox/", ConversationListView.as_view(), name="inbox"),
+    path("search/", MessageSearchView.as_view(), name="search"),
     path("project/<int:project_pk>/", ProjectConversationRedirectView.as_view(), name="project"),
     path("conversations/<int:pk>/", ChatRoomView.as_view(), name="room"),
     path("conversations/<int:pk>/messages/", MessageListView.as_view(), name="messages"),
     path("conversations/<int:pk>/send/", MessageCreateView.as_view(), name="send"),
+    path("conversations/<int:pk>/stream/", message_stream, name="stream"),
 ]
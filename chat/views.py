@@ -1,45 +1,168 @@
 from __future__ import annotations
 
+from typing import AsyncIterator
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import Http404, HttpRequest, HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views import View
 from django.views.generic import ListView, TemplateView
 
 from construction.models import ConstructionProject
 
-from .models import Conversation, Message
+from . import cursors, events, search
+from .forms import MessageSearchForm
+from .models import INBOX_ORDERING, Conversation, Message
+
+# Messages pushed per database read when an event stream catches up.
+STREAM_BATCH = 100
+# Messages shown when a room opens and per "load older" request.
+HISTORY_PAGE = 50
+
+
+def message_cursor(value: str | None) -> int | None:
+    """Parse a message id sent as a paging cursor (``after`` or ``before``); ``None`` if absent."""
+    if value is None or not value.strip().isdigit():
+        return None
+    return int(value)
+
+
+def history_page(
+    conversation: Conversation, before: Message | None = None, size: int = HISTORY_PAGE
+) -> tuple[list[Message], int | None]:
+    """One page of history, oldest first, ending just before ``before`` (the newest page by default).
+
+    Returns the messages and the cursor for the next older page, ``None`` once the start of the
+    conversation is shown. Pages are keyed on ``(timestamp, id)`` and read backwards along the
+    ``(conversation, timestamp, id)`` index, so a page costs the same however long the history is.
+    """
+    messages_qs = conversation.messages.select_related("sender").order_by("-timestamp", "-id")
+    if before is not None:
+        messages_qs = messages_qs.filter(
+            Q(timestamp__lt=before.timestamp) | Q(pk__lt=before.pk),
+            timestamp__lte=before.timestamp,
+        )
+    page = list(messages_qs[: size + 1])
+    older = page[size - 1].pk if len(page) > size else None
+    page = page[:size]
+    page.reverse()
+    return page, older
+
+
+def history_context(conversation: Conversation, before: Message | None = None) -> dict:
+    page, older = history_page(conversation, before)
+    return {"conversation": conversation, "messages": page, "older_cursor": older}
+
+
+def history_window(conversation: Conversation, message_id: int) -> dict | None:
+    """Up to half a page of history either side of one message, for links from search results.
+
+    ``has_newer`` tells the room that the newest messages are not shown, so it should not append
+    live updates after the window; ``None`` when the message is not in this conversation.
+    """
+    target = conversation.messages.select_related("sender").filter(pk=message_id).first()
+    if target is None:
+        return None
+    half = HISTORY_PAGE // 2
+    older, older_cursor = history_page(conversation, target, size=half)
+    newer = list(
+        conversation.messages.select_related("sender")
+        .filter(Q(timestamp__gt=target.timestamp) | Q(pk__gt=target.pk), timestamp__gte=target.timestamp)
+        .order_by("timestamp", "id")[: half + 1]
+    )
+    return {
+        "conversation": conversation,
+        "messages": [*older, target, *newer[:half]],
+        "older_cursor": older_cursor,
+        "has_newer": len(newer) > half,
+        "focus_message_id": target.pk,
+    }
+
+
+def mark_seen(user, conversation: Conversation, messages: list[Message]) -> None:
+    """Advance ``user``'s read cursor to the newest of the ``messages`` just shown."""
+    if messages:
+        cursors.advance(conversation.pk, user.pk, messages[-1].pk)
+
+
+def render_older_messages(request: HttpRequest, conversation: Conversation, before: int) -> HttpResponse:
+    """Fragment that replaces the "load older" trigger with the page before message ``before``."""
+    oldest_shown = conversation.messages.filter(pk=before).only("id", "timestamp").first()
+    if oldest_shown is None:
+        # The message was deleted in the meantime; drop the trigger rather than guess a position.
+        return HttpResponse("")
+    context = {**history_context(conversation, oldest_shown), "append": True}
+    return render(request, "chat/partials/message_items.html", context)
+
+
+def render_new_messages(request: HttpRequest, conversation: Conversation, after: int) -> HttpResponse:
+    """Append fragment with the messages posted after ``after``, or 204 when there are none.
+
+    The newest message id doubles as the ETag, so a poll repeating its last ``If-None-Match`` is
+    answered with 304 from the same indexed ``(conversation, id)`` lookup.
+    """
+    latest_id = conversation.messages.order_by("-id").values_list("id", flat=True).first() or 0
+    etag = f'"{conversation.pk}-{latest_id}"'
+    response = get_conditional_response(request, etag=etag) if request.method == "GET" else None
+    if response is None and latest_id <= after:
+        response = HttpResponse(status=204)
+    if response is None:
+        new_messages = conversation.messages.filter(pk__gt=after).select_related("sender").order_by("id")
+        cursors.advance(conversation.pk, request.user.pk, latest_id)
+        response = render(
+            request,
+            "chat/partials/message_items.html",
+            {"conversation": conversation, "messages": new_messages, "append": True},
+        )
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def get_accessible_conversation(user, pk: int) -> Conversation:
+    conversation = get_object_or_404(
+        Conversation.objects.select_related("project", "customer"), pk=pk
+    )
+    if user.is_staff or conversation.customer_id == user.id:
+        return conversation
+    raise Http404
 
 
 class ConversationAccessMixin(LoginRequiredMixin):
     conversation_param = "pk"
 
     def get_conversation(self) -> Conversation:
-        pk = self.kwargs.get(self.conversation_param)
-        conversation = get_object_or_404(
-            Conversation.objects.select_related("project", "customer"), pk=pk
-        )
-        user = self.request.user
-        if user.is_staff or conversation.customer_id == user.id:
-            return conversation
-        raise Http404
+        return get_accessible_conversation(self.request.user, self.kwargs.get(self.conversation_param))
 
 
 class ConversationListView(UserPassesTestMixin, ListView):
     model = Conversation
     template_name = "chat/conversation_list.html"
     context_object_name = "conversations"
+    paginate_by = 50
 
     def test_func(self) -> bool:
         return self.request.user.is_staff
 
     def get_queryset(self):
+        # Reads only the conversation summaries (see chat.inbox), walking the inbox index.
         return Conversation.objects.select_related(
             "project",
+            "project__owner",
             "customer",
+            "last_message_sender",
             "project__quote",
             "project__quote__design",
-        ).prefetch_related("messages").order_by("-messages__timestamp", "-created_at")
+            "project__quote__catalog_design",
+        ).order_by(*INBOX_ORDERING)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -47,6 +170,43 @@ class ConversationListView(UserPassesTestMixin, ListView):
         return context
 
 
+class MessageSearchView(UserPassesTestMixin, ListView):
+    template_name = "chat/message_search.html"
+    context_object_name = "results"
+    paginate_by = 20
+
+    def test_func(self) -> bool:
+        return self.request.user.is_staff
+
+    def get_queryset(self):
+        self.form = MessageSearchForm(self.request.GET or None)
+        if not self.form.is_valid() or not self.form.cleaned_data["q"].strip():
+            return Message.objects.none()
+        messages_qs = self.form.filter(
+            Message.objects.select_related(
+                "sender",
+                "conversation__customer",
+                "conversation__project__owner",
+                "conversation__project__quote",
+                "conversation__project__quote__design",
+                "conversation__project__quote__catalog_design",
+            )
+        )
+        return search.search_messages(messages_qs, self.form.cleaned_data["q"]).order_by("-timestamp", "-id")
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["form"] = self.form
+        query = self.form.cleaned_data["q"] if self.form.is_valid() else ""
+        for message in context["results"]:
+            message.snippet = search.highlight(message.content, query)
+        # Pagination links keep the filters.
+        params = self.request.GET.copy()
+        params.pop("page", None)
+        context["query_string"] = params.urlencode()
+        return context
+
+
 class ProjectConversationRedirectView(LoginRequiredMixin, View):
     def get(self, request: HttpRequest, project_pk: int) -> HttpResponse:
         project = get_object_or_404(
@@ -68,23 +228,33 @@ class ChatRoomView(ConversationAccessMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         conversation = self.get_conversation()
-        conversation.messages.filter(is_read=False).exclude(sender=self.request.user).update(is_read=True)
-        context["conversation"] = conversation
+        focus = message_cursor(self.request.GET.get("message"))
+        window = history_window(conversation, focus) if focus is not None else None
+        context.update(window or history_context(conversation))
+        mark_seen(self.request.user, conversation, context["messages"])
         context["project"] = conversation.project
-        context["messages"] = conversation.messages.select_related("sender")
+        if getattr(settings, "CHAT_SSE_ENABLED", True) and not context.get("has_newer"):
+            context["stream_url"] = reverse("chat:stream", kwargs={"pk": conversation.pk})
         return context
 
 
 class MessageListView(ConversationAccessMixin, TemplateView):
     template_name = "chat/partials/message_list.html"
 
+    def get(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        after = message_cursor(request.GET.get("after"))
+        if after is not None:
+            return render_new_messages(request, self.get_conversation(), after)
+        before = message_cursor(request.GET.get("before"))
+        if before is not None:
+            return render_older_messages(request, self.get_conversation(), before)
+        return super().get(request, *args, **kwargs)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         conversation = self.get_conversation()
-        conversation.messages.filter(is_read=False).exclude(sender=self.request.user).update(is_read=True)
-        messages_qs = conversation.messages.select_related("sender")
-        context["conversation"] = conversation
-        context["messages"] = messages_qs
+        context.update(history_context(conversation))
+        mark_seen(self.request.user, conversation, context["messages"])
         return context
 
 
@@ -98,11 +268,90 @@ class MessageCreateView(ConversationAccessMixin, View):
                 sender=request.user,
                 content=content,
             )
-        messages_qs = conversation.messages.select_related("sender")
-        context = {
-            "conversation": conversation,
-            "messages": messages_qs,
-        }
+            transaction.on_commit(lambda: events.publish(conversation.pk))
         if request.headers.get("HX-Request"):
-            return render(request, "chat/partials/message_list.html", context)
-        return redirect("chat:room", pk=conversation.pk)
\ No newline at end of file
+            after = message_cursor(request.POST.get("after"))
+            if after is not None:
+                return render_new_messages(request, conversation, after)
+            return render(request, "chat/partials/message_list.html", history_context(conversation))
+        return redirect("chat:room", pk=conversation.pk)
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """``text/event-stream`` response that frees its connection slot when the server closes it."""
+
+    def __init__(self, streaming_content, **kwargs) -> None:
+        super().__init__(streaming_content, content_type="text/event-stream", **kwargs)
+        self["Cache-Control"] = "no-cache"
+        # Keep reverse proxies such as nginx from buffering the stream.
+        self["X-Accel-Buffering"] = "no"
+        self._slot_held = True
+
+    def close(self) -> None:
+        if self._slot_held:
+            self._slot_held = False
+            events.connections.release()
+        super().close()
+
+
+def _stream_unavailable(retry_after: int) -> HttpResponse:
+    # Any non-200 answer makes EventSource give up; the room then keeps polling.
+    response = HttpResponse(status=503)
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+def _pending_events(request: HttpRequest, conversation: Conversation, cursor: int) -> tuple[list[str], int]:
+    new_messages = list(
+        conversation.messages.filter(pk__gt=cursor).select_related("sender").order_by("id")[:STREAM_BATCH]
+    )
+    if not new_messages:
+        return [], cursor
+    cursors.advance(conversation.pk, request.user.pk, new_messages[-1].pk)
+    chunks = []
+    for message in new_messages:
+        html = render_to_string(
+            "chat/partials/message_items.html",
+            {"conversation": conversation, "messages": [message], "append": True},
+            request=request,
+        )
+        # Template indentation would otherwise become a "data:" line per source line.
+        html = "\n".join(line.strip() for line in html.splitlines() if line.strip())
+        chunks.append(events.format_event(html, event="message", event_id=message.pk))
+    return chunks, new_messages[-1].pk
+
+
+async def _event_stream(request: HttpRequest, conversation: Conversation, cursor: int) -> AsyncIterator[str]:
+    heartbeat = getattr(settings, "CHAT_SSE_HEARTBEAT", 15)
+    subscription = await events.get_broker().subscribe(conversation.pk)
+    try:
+        yield events.format_event("connected", event="ready", retry=3000)
+        while True:
+            # The database is read on every wake-up and every heartbeat, so messages published
+            # by another worker process still arrive within one heartbeat.
+            chunks, cursor = await sync_to_async(_pending_events)(request, conversation, cursor)
+            for chunk in chunks:
+                yield chunk
+            if len(chunks) == STREAM_BATCH:
+                continue
+            if not await subscription.wait(heartbeat):
+                yield ": heartbeat\n\n"
+    finally:
+        await subscription.close()
+
+
+async def message_stream(request: HttpRequest, pk: int) -> HttpResponse:
+    """Server-sent events for one conversation; only served under ASGI (``house_management.asgi``)."""
+    if not getattr(settings, "CHAT_SSE_ENABLED", True) or not isinstance(request, ASGIRequest):
+        # Under WSGI a long-lived stream would tie up a whole worker thread.
+        return _stream_unavailable(retry_after=3600)
+    user = await request.auser()
+    if not user.is_authenticated:
+        return HttpResponse(status=403)
+    conversation = await sync_to_async(get_accessible_conversation)(user, pk)
+    cursor = message_cursor(request.headers.get("Last-Event-ID"))
+    if cursor is None:
+        cursor = message_cursor(request.GET.get("after")) or 0
+    if not events.connections.acquire():
+        return _stream_unavailable(retry_after=30)
+    return EventStreamResponse(_event_stream(request, conversation, cursor))
@@ -29,6 +29,6 @@ class ConstructionProjectAdmin(admin.ModelAdmin):
 
 @admin.register(ProgressUpdate)
 class ProgressUpdateAdmin(admin.ModelAdmin):
-	list_display = ("project", "stage_name", "update_date", "created_at")
+	list_display = ("project", "stage_name", "update_date", "created_at", "notified_at")
 	list_filter = ("update_date",)
 	search_fields = ("project__owner__username", "stage_name")
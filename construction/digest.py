@@ -0,0 +1,91 @@
+"""Daily digest of construction progress updates.
+
+Owners receive one email per day covering every new :class:`~construction.models.ProgressUpdate`
+on all their projects, instead of one email per update. Owners who turned the digest off (see
+:class:`accounts.models.NotificationPreference`) are emailed as each update is posted.
+"""
+
+from __future__ import annotations
+
+from itertools import groupby
+from typing import Iterator
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.outbox import send_mail
+
+from .models import ProgressUpdate
+
+OWNER_BATCH_SIZE = 200
+
+
+def update_lines(update: ProgressUpdate) -> list[str]:
+	return [
+		f"Stage: {update.stage_name}",
+		f"Date: {update.update_date}",
+		f"Details: {update.description[:500]}",
+	]
+
+
+def notify_now(update: ProgressUpdate) -> None:
+	"""Email the owner about one update straight away (digest turned off)."""
+	owner = update.project.owner
+	recipient_list = [owner.email] if owner.email else [settings.DEFAULT_FROM_EMAIL]
+	subject = f"Construction Update: {update.stage_name}"
+	message = "Your construction project has a new update.\n" + "\n".join(update_lines(update))
+	send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipient_list)
+	ProgressUpdate.objects.filter(pk=update.pk).update(notified_at=timezone.now())
+
+
+def digest_message(updates: list[ProgressUpdate]) -> tuple[str, str]:
+	projects = len({update.project_id for update in updates})
+	subject = f"Construction updates: {len(updates)} new on {projects} project{'s' if projects != 1 else ''}"
+	sections = []
+	for project, project_updates in groupby(updates, key=lambda update: update.project):
+		title = f"{project} (#{project.pk})"
+		lines = [title, "=" * len(title)]
+		for update in project_updates:
+			lines += update_lines(update) + [""]
+		sections.append("\n".join(lines))
+	return subject, "Here is what happened on your construction projects since the last summary.\n\n" + "\n".join(sections)
+
+
+def _owner_batches(batch_size: int) -> Iterator[list[int]]:
+	owners = (
+		ProgressUpdate.objects.filter(notified_at__isnull=True)
+		.order_by('project__owner_id')
+		.values_list('project__owner_id', flat=True)
+		.distinct()
+	)
+	batch: list[int] = []
+	for owner_id in owners.iterator():
+		batch.append(owner_id)
+		if len(batch) >= batch_size:
+			yield batch
+			batch = []
+	if batch:
+		yield batch
+
+
+def send_digests(batch_size: int = OWNER_BATCH_SIZE) -> tuple[int, int]:
+	"""Email every owner with pending updates; returns ``(emails queued, updates covered)``."""
+	emails = covered = 0
+	for owner_ids in _owner_batches(batch_size):
+		# One query per batch of owners, ordered so each owner's updates are contiguous.
+		pending = list(
+			ProgressUpdate.objects.filter(notified_at__isnull=True, project__owner_id__in=owner_ids)
+			.select_related('project__owner', 'project__quote__design', 'project__quote__catalog_design')
+			.order_by('project__owner_id', 'project_id', 'update_date', 'created_at')
+		)
+		with transaction.atomic():
+			for _, owner_updates in groupby(pending, key=lambda update: update.project.owner_id):
+				owner_updates = list(owner_updates)
+				owner = owner_updates[0].project.owner
+				subject, message = digest_message(owner_updates)
+				send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [owner.email or settings.DEFAULT_FROM_EMAIL])
+				emails += 1
+			ProgressUpdate.objects.filter(pk__in=[update.pk for update in pending]).update(notified_at=timezone.now())
+		covered += len(pending)
+	return emails, covered
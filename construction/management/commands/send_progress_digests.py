@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from construction import digest
+
+
+class Command(BaseCommand):
+    help = "Email each owner one summary of the construction progress updates posted since their last digest."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=digest.OWNER_BATCH_SIZE, help="Owners whose updates are loaded per query."
+        )
+
+    def handle(self, *args, **options):
+        emails, updates = digest.send_digests(batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(f"Queued {emails} digest emails covering {updates} progress updates."))
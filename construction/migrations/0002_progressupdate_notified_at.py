@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:56
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_existing_notified(apps, schema_editor):
+    # Owners were already emailed about every existing update, one message each.
+    ProgressUpdate = apps.get_model('construction', 'ProgressUpdate')
+    ProgressUpdate.objects.filter(notified_at__isnull=True).update(notified_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('construction', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='progressupdate',
+            name='notified_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(mark_existing_notified, migrations.RunPython.noop),
+    ]
@@ -52,6 +52,8 @@ class ProgressUpdate(models.Model):
 	)
 	update_date = models.DateField(default=timezone.now)
 	created_at = models.DateTimeField(auto_now_add=True)
+	# Set once the owner has been emailed about this update; unset updates wait for the daily digest.
+	notified_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
 	class Meta:
 		ordering = ['-update_date', '-created_at']
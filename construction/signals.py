@@ -1,22 +1,18 @@
-from django.conf import settings
-from django.core.mail import send_mail
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from accounts.models import NotificationPreference
+from house_management import imaging
+
+from . import digest
 from .models import ProgressUpdate
 
+imaging.register(ProgressUpdate, "site_image")
+
 
 @receiver(post_save, sender=ProgressUpdate)
 def notify_user_on_progress_update(sender, instance: ProgressUpdate, created: bool, **kwargs):
-    if not created:
+    # Owners on the daily digest hear about this update from `manage.py send_progress_digests`.
+    if not created or NotificationPreference.wants_progress_digest(instance.project.owner_id):
         return
-    owner = instance.project.owner
-    recipient_list = [owner.email] if owner.email else [settings.DEFAULT_FROM_EMAIL]
-    subject = f"Construction Update: {instance.stage_name}"
-    message = (
-        f"Your construction project has a new update.\n"
-        f"Stage: {instance.stage_name}\n"
-        f"Date: {instance.update_date}\n"
-        f"Details: {instance.description[:500]}"
-    )
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, recipient_list)
+    digest.notify_now(instance)
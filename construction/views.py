@@ -3,6 +3,7 @@ from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, DeleteView, DetailView, ListView, UpdateView
 
+from accounts.models import NotificationPreference
 from quotes.models import Quote
 
 from .forms import ConstructionProjectForm, ProgressUpdateForm
@@ -31,6 +32,12 @@ class ConstructionProjectDetailView(LoginRequiredMixin, ProjectQuerysetMixin, De
 	def get_queryset(self):
 		return super().get_queryset().prefetch_related('updates')
 
+	def get_context_data(self, **kwargs):
+		context = super().get_context_data(**kwargs)
+		if self.object.owner_id == self.request.user.pk:
+			context['progress_digest'] = NotificationPreference.wants_progress_digest(self.request.user.pk)
+		return context
+
 
 class ConstructionProjectCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
 	model = ConstructionProject
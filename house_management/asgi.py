@@ -5,6 +5,9 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+Serve the site with an ASGI server (e.g. ``uvicorn house_management.asgi:application``) to
+enable the chat event streams (``chat:stream``); under WSGI the chat rooms fall back to polling.
 """
 
 import os
@@ -14,3 +17,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'house_management.settings')
 
 application = get_asgi_application()
+
+# Imported after setup because quotes.pdf needs the app registry.
+from quotes import pdf  # noqa: E402
+
+pdf.warm_start()
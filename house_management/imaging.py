@@ -0,0 +1,150 @@
+"""Resized WebP/JPEG derivatives for uploaded images.
+
+Derivatives live next to the original under a ``derivatives/`` folder with deterministic names
+(``catalog/covers/derivatives/house-png_640w.webp``), so templates can build ``srcset`` values
+without a lookup table. Models opt in with :func:`register` from their app's ``signals``
+module; new uploads are processed after the saving transaction commits and existing media can
+be backfilled with ``manage.py generate_image_derivatives``.
+"""
+
+from __future__ import annotations
+
+import logging
+import posixpath
+from io import BytesIO
+from pathlib import Path
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models.signals import post_init, post_save
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+WIDTHS = (320, 640, 1280)
+FORMATS = {
+    "webp": ("WEBP", "image/webp"),
+    "jpg": ("JPEG", "image/jpeg"),
+}
+QUALITY = 80
+
+# (model, field names) pairs registered by the apps; iterated by the backfill command.
+registry: list[tuple[type, tuple[str, ...]]] = []
+
+
+def derivative_name(name: str, width: int, extension: str) -> str:
+    directory, filename = posixpath.split(name)
+    stem, source_extension = posixpath.splitext(filename)
+    # Keep the source extension so house.png and house.jpg do not share derivatives.
+    if source_extension:
+        stem = f"{stem}-{source_extension[1:].lower()}"
+    return posixpath.join(directory, "derivatives", f"{stem}_{width}w.{extension}")
+
+
+def derivative_targets(name: str) -> list[tuple[str, int, str]]:
+    return [
+        (derivative_name(name, width, extension), width, extension)
+        for width in WIDTHS
+        for extension in FORMATS
+    ]
+
+
+def _encode(image: Image.Image, width: int, extension: str) -> bytes:
+    resized = image.copy()
+    # Never upscale: small sources produce derivatives at their own size.
+    resized.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+    pil_format, _ = FORMATS[extension]
+    if pil_format == "JPEG" and resized.mode not in ("RGB", "L"):
+        background = Image.new("RGB", resized.size, (255, 255, 255))
+        rgba = resized.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        resized = background
+    elif resized.mode not in ("RGB", "RGBA", "L"):
+        resized = resized.convert("RGBA")
+    buffer = BytesIO()
+    resized.save(buffer, pil_format, quality=QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def _open(source) -> Image.Image:
+    image = Image.open(source)
+    # Phone photos are usually stored sideways with an EXIF rotation flag.
+    image = ImageOps.exif_transpose(image)
+    image.load()
+    return image
+
+
+def render_file(source_path: str, targets: list[tuple[str, int, str]]) -> int:
+    """Write derivatives of a local file; free of Django state so it can run in worker processes."""
+    try:
+        image = _open(source_path)
+    except (OSError, UnidentifiedImageError):
+        logger.warning("Skipping derivatives for unreadable image %s", source_path)
+        return 0
+    for target_path, width, extension in targets:
+        target = Path(target_path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(_encode(image, width, extension))
+    return len(targets)
+
+
+def generate(name: str, storage=default_storage) -> int:
+    """Create every derivative of ``name`` through the storage API; returns the number written."""
+    if not name:
+        return 0
+    try:
+        with storage.open(name, "rb") as source:
+            image = _open(source)
+    except (OSError, UnidentifiedImageError):
+        logger.warning("Skipping derivatives for unreadable image %s", name)
+        return 0
+    written = 0
+    for target_name, width, extension in derivative_targets(name):
+        if storage.exists(target_name):
+            storage.delete(target_name)
+        storage.save(target_name, ContentFile(_encode(image, width, extension)))
+        written += 1
+    return written
+
+
+def has_derivatives(name: str, storage=default_storage) -> bool:
+    if not name:
+        return False
+    target_name, _, _ = derivative_targets(name)[-1]
+    return storage.exists(target_name)
+
+
+def _current_name(instance, field: str) -> str | None:
+    # Read the raw attribute so deferred image fields are not fetched from the database.
+    value = instance.__dict__.get(field)
+    if value is None:
+        return None
+    return getattr(value, "name", None) if not isinstance(value, str) else value
+
+
+def _remember_names(sender, instance, **kwargs):
+    instance._image_names = {field: _current_name(instance, field) for field in _fields_for(sender)}
+
+
+def _generate_changed(sender, instance, **kwargs):
+    previous = getattr(instance, "_image_names", {})
+    for field in _fields_for(sender):
+        name = _current_name(instance, field)
+        if name and name != previous.get(field):
+            transaction.on_commit(lambda name=name: generate(name))
+    _remember_names(sender, instance)
+
+
+def _fields_for(model) -> tuple[str, ...]:
+    for registered, fields in registry:
+        if registered is model:
+            return fields
+    return ()
+
+
+def register(model, *fields: str) -> None:
+    """Generate derivatives whenever one of ``fields`` on ``model`` receives a new file."""
+    registry.append((model, fields))
+    post_init.connect(_remember_names, sender=model, dispatch_uid=f"imaging-init-{model._meta.label}")
+    post_save.connect(_generate_changed, sender=model, dispatch_uid=f"imaging-save-{model._meta.label}")
@@ -71,6 +71,9 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            'libraries': {
+                'images': 'house_management.templatetags.images',
+            },
         },
     },
 ]
@@ -140,12 +143,68 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Catalog list pagination: 'offset' (numbered pages) or 'cursor' (keyset pages with next/prev
+# links). Cursor mode only counts up to CATALOG_APPROXIMATE_COUNT_LIMIT rows; None skips counting.
+CATALOG_PAGINATION = 'offset'
+CATALOG_APPROXIMATE_COUNT_LIMIT = 1000
+# Rendered catalog pages for anonymous visitors; any design change expires them immediately.
+CATALOG_PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Rendered contract PDFs, keyed by quote version; least recently downloaded files are evicted
+# once the directory grows past CONTRACT_PDF_CACHE_MAX_BYTES.
+CONTRACT_PDF_CACHE_DIR = BASE_DIR / 'var' / 'contract_pdfs'
+CONTRACT_PDF_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# With CONTRACT_PDF_ASYNC on, uncached contracts are rendered by `manage.py run_contract_worker`
+# (at most CONTRACT_PDF_WORKERS at a time) while the browser waits on a status page. Renders
+# slower than CONTRACT_PDF_RENDER_TIMEOUT seconds, or never picked up, are rendered in-request.
+CONTRACT_PDF_ASYNC = False
+# Prepare fonts, backend and template for contract rendering when a server process (wsgi.py,
+# asgi.py) or `manage.py run_contract_worker` starts instead of on the first download.
+CONTRACT_PDF_WARM_START = True
+# Subset the fonts WeasyPrint embeds in contract PDFs (see `manage.py benchmark_contracts`).
+CONTRACT_PDF_OPTIMIZE = True
+CONTRACT_PDF_WORKERS = 2
+CONTRACT_PDF_RENDER_TIMEOUT = 60
+
+# Chat rooms receive new messages over server-sent events when the site runs under ASGI
+# (`uvicorn house_management.asgi:application`); otherwise, or past CHAT_SSE_MAX_CONNECTIONS open
+# streams per process, they poll. CHAT_EVENT_BROKER = 'chat.events.RedisBroker' (with
+# CHAT_EVENT_REDIS_URL) shares events between several worker processes.
+CHAT_SSE_ENABLED = True
+CHAT_SSE_MAX_CONNECTIONS = 500
+CHAT_SSE_HEARTBEAT = 15
+CHAT_EVENT_BROKER = 'chat.events.InProcessBroker'
+CHAT_EVENT_REDIS_URL = 'redis://localhost:6379/0'
+# Read positions are buffered per process and written at most every this many seconds (0 writes
+# each one immediately); the inbox unread counts follow on each write.
+CHAT_READ_CURSOR_FLUSH_INTERVAL = 5
+
 LOGIN_URL = 'accounts:login'
 LOGIN_REDIRECT_URL = 'dashboard'
 LOGOUT_REDIRECT_URL = 'accounts:login'
 
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'accounts': {'handlers': ['console'], 'level': 'INFO'},
+        'quotes': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 DEFAULT_FROM_EMAIL = 'noreply@house-management.local'
+# Application emails are written to an outbox table in the request's transaction. With
+# EMAIL_OUTBOX_DRAIN_ON_COMMIT on, a background thread sends them once it commits; `manage.py
+# run_outbox` sends the rest: EMAIL_OUTBOX_BATCH_SIZE messages per connection, failed ones retried
+# after EMAIL_OUTBOX_RETRY_DELAY seconds, doubling each time, up to EMAIL_OUTBOX_MAX_ATTEMPTS.
+EMAIL_OUTBOX_DRAIN_ON_COMMIT = True
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_RETRY_DELAY = 30
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
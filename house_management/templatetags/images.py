@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+from house_management import imaging
+
+register = template.Library()
+
+
+def _urls(name: str, extension: str) -> list[tuple[str, int]]:
+    return [
+        (default_storage.url(imaging.derivative_name(name, width, extension)), width)
+        for width in imaging.WIDTHS
+    ]
+
+
+@register.simple_tag
+def srcset(image, extension: str = "jpg") -> str:
+    """``srcset`` value listing the derivatives of ``image``, or an empty string if none exist."""
+    if not image or not imaging.has_derivatives(image.name):
+        return ""
+    return ", ".join(f"{url} {width}w" for url, width in _urls(image.name, extension))
+
+
+@register.simple_tag
+def responsive_image(image, alt: str = "", sizes: str = "100vw", **attrs):
+    """Render ``image`` as a ``<picture>`` with WebP and JPEG derivatives.
+
+    Falls back to a plain ``<img>`` of the original upload when derivatives have not been
+    generated yet. Extra keyword arguments become attributes of the ``<img>`` tag
+    (use ``class_`` for ``class``).
+    """
+    if not image:
+        return ""
+    extra = _html_attrs(attrs)
+    if not imaging.has_derivatives(image.name):
+        return format_html('<img src="{}" alt="{}"{} loading="lazy">', image.url, alt, extra)
+    webp = ", ".join(f"{url} {width}w" for url, width in _urls(image.name, "webp"))
+    jpeg_urls = _urls(image.name, "jpg")
+    jpeg = ", ".join(f"{url} {width}w" for url, width in jpeg_urls)
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{} loading="lazy"></picture>',
+        webp,
+        sizes,
+        jpeg_urls[1][0],
+        jpeg,
+        sizes,
+        alt,
+        extra,
+    )
+
+
+def _html_attrs(attrs: dict[str, str]) -> str:
+    return format_html_join(
+        "", ' {}="{}"', ((key.rstrip("_").replace("_", "-"), value) for key, value in attrs.items())
+    )
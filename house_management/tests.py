@@ -0,0 +1,54 @@
+import shutil
+import tempfile
+from types import SimpleNamespace
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+
+from house_management import imaging
+
+
+class DerivativeNameTests(SimpleTestCase):
+    def test_sources_differing_only_by_extension_get_separate_derivatives(self):
+        png = imaging.derivative_name("catalog/covers/house.png", 640, "webp")
+        jpg = imaging.derivative_name("catalog/covers/house.jpg", 640, "webp")
+        self.assertNotEqual(png, jpg)
+        self.assertEqual(png, "catalog/covers/derivatives/house-png_640w.webp")
+
+
+class ResponsiveImageTagTests(SimpleTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_URL="/media/")
+        override.enable()
+        self.addCleanup(override.disable)
+        self.image = SimpleNamespace(name="catalog/covers/house.png", url="/media/catalog/covers/house.png")
+
+    def render(self):
+        template = Template(
+            '{% load images %}{% responsive_image image alt="บ้าน" class_="img-fluid w-100" style="height: 400px;" %}'
+        )
+        return template.render(Context({"image": self.image}))
+
+    def test_plain_img_keeps_extra_attributes(self):
+        html = self.render()
+        self.assertIn('<img src="/media/catalog/covers/house.png"', html)
+        self.assertIn(' class="img-fluid w-100" style="height: 400px;"', html)
+        self.assertNotIn("&quot;", html)
+
+    def test_picture_keeps_extra_attributes(self):
+        for name, _, _ in imaging.derivative_targets(self.image.name):
+            default_storage.save(name, ContentFile(b""))
+        html = self.render()
+        self.assertIn("<picture>", html)
+        self.assertIn("house-png_640w.jpg", html)
+        self.assertIn(' class="img-fluid w-100" style="height: 400px;"', html)
+        self.assertNotIn("&quot;", html)
+
+    def test_attribute_values_are_escaped(self):
+        template = Template('{% load images %}{% responsive_image image title=title %}')
+        html = template.render(Context({"image": self.image, "title": '"><script>'}))
+        self.assertIn('title="&quot;&gt;&lt;script&gt;"', html)
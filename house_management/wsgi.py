@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'house_management.settings')
 
 application = get_wsgi_application()
+
+# Imported after setup because quotes.pdf needs the app registry.
+from quotes import pdf  # noqa: E402
+
+pdf.warm_start()
@@ -1,6 +1,17 @@
-from django.contrib import admin
+import io
 
-from .models import EstimateInquiry, Quote
+from django.contrib import admin, messages
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+
+from . import bulk, estimator
+from .bundles import contract_zip
+from .forms import BulkPricingUploadForm
+from .models import ContractRenderJob, CostTable, EstimateInquiry, Quote
 
 
 @admin.register(Quote)
@@ -10,11 +21,76 @@ class QuoteAdmin(admin.ModelAdmin):
 	search_fields = ("design__title", "catalog_design__name", "requested_by__username")
 	autocomplete_fields = ("design", "catalog_design", "requested_by")
 	list_select_related = ("design", "catalog_design", "requested_by")
+	actions = ("download_contracts", "approve_quotes")
 
 	@admin.display(description="แบบบ้าน")
 	def reference_label(self, obj: Quote) -> str:
 		return obj.reference_name
 
+	def get_urls(self):
+		urls = [
+			path(
+				"bulk-pricing/",
+				self.admin_site.admin_view(self.bulk_pricing_view),
+				name="quotes_quote_bulk_pricing",
+			),
+		]
+		return urls + super().get_urls()
+
+	def _report_bulk_result(self, request, result: bulk.BulkResult) -> None:
+		self.message_user(request, f"Updated {result.updated} quotes ({result.unchanged} already up to date).")
+
+	def _report_bulk_errors(self, request, error: bulk.BulkPricingError) -> None:
+		self.message_user(request, "Nothing was saved: " + "; ".join(error.errors[:20]), messages.ERROR)
+		if len(error.errors) > 20:
+			self.message_user(request, f"…and {len(error.errors) - 20} more problems.", messages.ERROR)
+
+	@admin.action(description="อนุมัติใบเสนอราคาที่เลือก")
+	def approve_quotes(self, request, queryset):
+		try:
+			result = bulk.approve(queryset.values_list("pk", flat=True), actor=request.user)
+		except bulk.BulkPricingError as exc:
+			self._report_bulk_errors(request, exc)
+			return
+		self._report_bulk_result(request, result)
+
+	def bulk_pricing_view(self, request):
+		if not self.has_change_permission(request):
+			return redirect("admin:quotes_quote_changelist")
+		form = BulkPricingUploadForm(request.POST or None, request.FILES or None)
+		if request.method == "POST" and form.is_valid():
+			handle = io.TextIOWrapper(form.cleaned_data["file"].file, encoding="utf-8-sig", newline="")
+			try:
+				result = bulk.apply(bulk.read_csv(handle), actor=request.user)
+			except bulk.BulkPricingError as exc:
+				self._report_bulk_errors(request, exc)
+			except UnicodeDecodeError:
+				self.message_user(request, "The file must be a UTF-8 encoded CSV.", messages.ERROR)
+			else:
+				self._report_bulk_result(request, result)
+				return redirect("admin:quotes_quote_changelist")
+		context = {
+			**self.admin_site.each_context(request),
+			"title": "ตั้งราคาและอนุมัติใบเสนอราคาจาก CSV",
+			"opts": self.model._meta,
+			"form": form,
+			"columns": bulk.CSV_COLUMNS,
+			"max_rows": bulk.MAX_ROWS,
+		}
+		return TemplateResponse(request, "admin/quotes/quote/bulk_pricing.html", context)
+
+	@admin.action(description="ดาวน์โหลดสัญญา (ZIP)")
+	def download_contracts(self, request, queryset):
+		quotes = list(queryset.select_related("design", "design__owner", "catalog_design", "requested_by").order_by("pk"))
+		# Rendered in this process while the zip streams: a process pool started from a web worker
+		# would re-import Django and rebuild the PDF engine in every child. `manage.py
+		# render_contracts --workers N` is the parallel path for large batches.
+		chunks = contract_zip(quotes)
+		response = StreamingHttpResponse(chunks, content_type="application/zip")
+		filename = f"contracts_{timezone.localdate():%Y%m%d}.zip"
+		response["Content-Disposition"] = f'attachment; filename="{filename}"'
+		return response
+
 
 @admin.register(EstimateInquiry)
 class EstimateInquiryAdmin(admin.ModelAdmin):
@@ -25,9 +101,60 @@ class EstimateInquiryAdmin(admin.ModelAdmin):
 		"material_grade",
 		"house_size",
 		"floors",
+		"estimate_band",
 		"submitted_at",
 		"handled",
 	)
 	list_filter = ("handled", "material_grade", "submitted_at")
 	search_fields = ("name", "email", "phone")
-	readonly_fields = ("submitted_at", "user", "estimate_min", "estimate_max")
+	readonly_fields = (
+		"submitted_at",
+		"user",
+		"estimate_min",
+		"estimate_max",
+		"estimate_p10",
+		"estimate_p50",
+		"estimate_p90",
+		"cost_table",
+	)
+
+	@admin.display(description="ประมาณการ P10 / P50 / P90", ordering="estimate_p50")
+	def estimate_band(self, obj: EstimateInquiry) -> str:
+		if obj.estimate_p50 is None:
+			return "-"
+		return f"{obj.estimate_p10:,.0f} / {obj.estimate_p50:,.0f} / {obj.estimate_p90:,.0f}"
+
+
+@admin.register(ContractRenderJob)
+class ContractRenderJobAdmin(admin.ModelAdmin):
+	list_display = ("id", "quote", "status", "created_at", "started_at", "finished_at")
+	list_filter = ("status", "created_at")
+	list_select_related = ("quote",)
+	readonly_fields = ("quote", "cache_key", "status", "error", "created_at", "started_at", "finished_at")
+
+
+@admin.register(CostTable)
+class CostTableAdmin(admin.ModelAdmin):
+	list_display = ("version", "is_active", "published_at", "notes")
+	readonly_fields = ("is_active", "published_at")
+	actions = ("activate",)
+
+	def get_readonly_fields(self, request, obj=None):
+		# Published versions are immutable; only their notes can still be edited.
+		if obj is not None:
+			return self.readonly_fields + ("version", "rates")
+		return self.readonly_fields
+
+	@admin.action(description="ใช้ตารางราคานี้ในการประเมิน")
+	def activate(self, request, queryset):
+		if queryset.count() != 1:
+			self.message_user(request, "Select exactly one cost table to activate.", messages.ERROR)
+			return
+		table = queryset.get()
+		with transaction.atomic():
+			CostTable.objects.filter(is_active=True).exclude(pk=table.pk).update(is_active=False)
+			table.is_active = True
+			table.save(update_fields=["is_active"])
+		# Open inquiries are re-priced right away so staff compare them against current rates.
+		rescored = estimator.rescore_open_inquiries(estimator.CompiledTable.compile(table.pk, table.version, table.rates))
+		self.message_user(request, f"Cost table v{table.version} is now active; {rescored} open inquiries re-scored.")
@@ -0,0 +1,161 @@
+"""Pricing and approving many quotes at once.
+
+``Quote.save`` runs ``full_clean()`` (including the unique-constraint queries) and the quote
+signals for every row, which makes approving a few hundred quotes one by one slow. This module
+validates a whole batch with set-based checks instead: one query loads (and locks) every quote in
+the batch, field values are checked in memory, and the unique constraints are skipped because a
+price/status change cannot affect them. The rows are then written with one ``bulk_update`` in a
+single transaction, and the side effects the skipped signals would have had (dashboard counters,
+cached contract PDFs) are applied for the batch, followed by one summary email to the admins.
+"""
+
+from __future__ import annotations
+
+import csv
+from collections import Counter
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable, TextIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts import counters
+from accounts.outbox import admin_recipients, send_mail
+
+from . import contract_cache
+from .models import Quote
+
+CSV_COLUMNS = ('quote_id', 'price', 'status')
+MAX_ROWS = 5000
+BATCH_SIZE = 500
+
+
+@dataclass(frozen=True)
+class PriceChange:
+	"""New values for one quote; ``None`` keeps the current value."""
+
+	quote_id: int
+	price: Decimal | None = None
+	status: str | None = None
+	line: int | None = None
+
+	@property
+	def label(self) -> str:
+		return f'line {self.line}' if self.line is not None else f'quote {self.quote_id}'
+
+
+@dataclass
+class BulkResult:
+	updated: int = 0
+	unchanged: int = 0
+	statuses: Counter = field(default_factory=Counter)
+
+
+class BulkPricingError(Exception):
+	"""Raised with every problem found in a batch; nothing has been written."""
+
+	def __init__(self, errors: list[str]) -> None:
+		super().__init__(f'{len(errors)} problem(s) in the batch')
+		self.errors = errors
+
+
+def read_csv(handle: TextIO) -> list[PriceChange]:
+	"""Parse ``quote_id,price,status`` rows; empty cells keep the quote's current value."""
+	reader = csv.DictReader(handle)
+	columns = set(reader.fieldnames or [])
+	if 'quote_id' not in columns or not {'price', 'status'} & columns:
+		raise BulkPricingError([f"The CSV needs a quote_id column and a price and/or status column ({', '.join(CSV_COLUMNS)})."])
+	price_field = Quote._meta.get_field('price')
+	status_field = Quote._meta.get_field('status')
+	changes: list[PriceChange] = []
+	errors: list[str] = []
+	for row in reader:
+		line = reader.line_num
+		if len(changes) + len(errors) >= MAX_ROWS:
+			errors.append(f'At most {MAX_ROWS} rows per upload.')
+			break
+		raw_id = (row.get('quote_id') or '').strip()
+		raw_price = (row.get('price') or '').strip().replace(',', '')
+		raw_status = (row.get('status') or '').strip().lower()
+		try:
+			if not raw_id.isdigit():
+				raise ValidationError('quote_id must be a whole number.')
+			# Field.clean() runs the same per-value validation full_clean() would, without queries.
+			price = price_field.clean(raw_price, None) if raw_price else None
+			status = status_field.clean(raw_status, None) if raw_status else None
+		except ValidationError as exc:
+			errors.append(f"line {line}: {' '.join(exc.messages)}")
+			continue
+		changes.append(PriceChange(int(raw_id), price, status, line))
+	if errors:
+		raise BulkPricingError(errors)
+	return changes
+
+
+def apply(changes: Iterable[PriceChange], actor=None) -> BulkResult:
+	"""Validate and write a batch atomically; raises :class:`BulkPricingError` without writing anything."""
+	changes = list(changes)
+	errors: list[str] = []
+	seen: set[int] = set()
+	for change in changes:
+		if change.quote_id in seen:
+			errors.append(f'{change.label}: quote {change.quote_id} appears more than once.')
+		seen.add(change.quote_id)
+
+	result = BulkResult()
+	with transaction.atomic():
+		quotes = Quote.objects.select_for_update().only(
+			'pk', 'price', 'status', 'requested_by_id', 'design_id', 'catalog_design_id'
+		).in_bulk(seen)
+		changed: list[Quote] = []
+		before: list[tuple[str, int]] = []
+		after: list[tuple[str, int]] = []
+		now = timezone.now()
+		for change in changes:
+			quote = quotes.get(change.quote_id)
+			if quote is None:
+				errors.append(f'{change.label}: quote {change.quote_id} does not exist.')
+				continue
+			price = quote.price if change.price is None else change.price
+			status = change.status or quote.status
+			if status == Quote.Status.APPROVED and price is None:
+				errors.append(f'{change.label}: quote {change.quote_id} needs a price before it can be approved.')
+				continue
+			if (price, status) == (quote.price, quote.status):
+				result.unchanged += 1
+				continue
+			before += counters.quote_contributions(quote.status, quote.requested_by_id)
+			after += counters.quote_contributions(status, quote.requested_by_id)
+			quote.price, quote.status, quote.updated_at = price, status, now
+			changed.append(quote)
+			result.statuses[status] += 1
+		if errors:
+			raise BulkPricingError(errors)
+		Quote.objects.bulk_update(changed, ['price', 'status', 'updated_at'], batch_size=BATCH_SIZE)
+		# bulk_update() sends no signals, so do what the Quote signals would have done.
+		counters.move(before, after)
+		changed_ids = [quote.pk for quote in changed]
+		transaction.on_commit(lambda: purge_contracts(changed_ids))
+		result.updated = len(changed)
+		if changed:
+			transaction.on_commit(lambda: notify_admins(result, actor))
+	return result
+
+
+def approve(quote_ids: Iterable[int], actor=None) -> BulkResult:
+	return apply([PriceChange(pk, status=Quote.Status.APPROVED) for pk in quote_ids], actor)
+
+
+def purge_contracts(quote_ids: list[int]) -> None:
+	for pk in quote_ids:
+		contract_cache.purge(pk)
+
+
+def notify_admins(result: BulkResult, actor=None) -> None:
+	by = actor.get_username() if actor is not None else 'a maintenance task'
+	lines = [f'{count} quote(s) are now {Quote.Status(status).label.lower()}.' for status, count in sorted(result.statuses.items())]
+	message = f'{result.updated} quotes were updated in bulk by {by}.\n' + '\n'.join(lines)
+	send_mail(f'Bulk quote update: {result.updated} quotes', message, settings.DEFAULT_FROM_EMAIL, admin_recipients())
@@ -0,0 +1,100 @@
+"""Zip archives of many contracts, streamed while they are rendered."""
+
+from __future__ import annotations
+
+import io
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import BinaryIO, Iterable, Iterator
+
+from django.db import connections
+
+from . import contract_cache, pdf, rendering
+from .models import Quote
+
+COPY_CHUNK = 64 * 1024
+
+
+class _StreamBuffer(io.RawIOBase):
+	"""Write-only sink that hands written bytes back to a generator instead of keeping them."""
+
+	def __init__(self) -> None:
+		self._chunks: list[bytes] = []
+
+	def writable(self) -> bool:
+		return True
+
+	def write(self, data) -> int:
+		self._chunks.append(bytes(data))
+		return len(data)
+
+	def drain(self) -> bytes:
+		chunks, self._chunks = self._chunks, []
+		return b''.join(chunks)
+
+
+def contract_filename(quote_id: int) -> str:
+	return f'contract_quote_{quote_id}.pdf'
+
+
+def iter_contracts(quotes: Iterable[Quote], workers: int = 1) -> Iterator[tuple[int, BinaryIO]]:
+	"""Yield ``(quote_id, open PDF)`` for every quote, rendering cache misses in ``workers`` processes.
+
+	Contracts already in the PDF cache are yielded first without touching the pool.
+	"""
+	engine = pdf.get_engine()
+	missing = []
+	for quote in quotes:
+		handle = contract_cache.open_cached(quote.pk, contract_cache.cache_key(quote, engine))
+		if handle is None:
+			missing.append(quote)
+		else:
+			yield quote.pk, handle
+	if not missing:
+		return
+
+	def reopen(quote: Quote, key: str) -> BinaryIO:
+		handle = contract_cache.open_cached(quote.pk, key)
+		if handle is None:
+			# Evicted again before we got to it (tiny cache); render here instead.
+			handle = io.BytesIO(engine.render(quote))
+		return handle
+
+	by_id = {quote.pk: quote for quote in missing}
+	if workers <= 1:
+		for quote in missing:
+			yield quote.pk, reopen(quote, rendering.render_to_cache(quote.pk)[1])
+		return
+	# Where workers are forked (the default on Linux) they inherit this process's database
+	# connections, which must not be used from two processes; close them before the pool starts.
+	connections.close_all()
+	with ProcessPoolExecutor(max_workers=workers, initializer=rendering._init_worker) as executor:
+		futures = [executor.submit(rendering.render_to_cache, quote.pk) for quote in missing]
+		for future in as_completed(futures):
+			quote_id, key = future.result()
+			yield quote_id, reopen(by_id[quote_id], key)
+
+
+def stream_zip(files: Iterable[tuple[str, BinaryIO]]) -> Iterator[bytes]:
+	"""Yield a zip archive of ``(name, file)`` pairs piece by piece; files are closed once copied."""
+	sink = _StreamBuffer()
+	# PDFs are already compressed, so entries are stored as-is.
+	with zipfile.ZipFile(sink, 'w', zipfile.ZIP_STORED) as archive:
+		for name, handle in files:
+			with handle, archive.open(name, 'w') as entry:
+				while True:
+					chunk = handle.read(COPY_CHUNK)
+					if not chunk:
+						break
+					entry.write(chunk)
+					yield sink.drain()
+			yield sink.drain()
+	yield sink.drain()
+
+
+def contract_zip(quotes: Iterable[Quote], workers: int = 1) -> Iterator[bytes]:
+	files = (
+		(contract_filename(quote_id), handle)
+		for quote_id, handle in iter_contracts(quotes, workers=workers)
+	)
+	return (chunk for chunk in stream_zip(files) if chunk)
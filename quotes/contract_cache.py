@@ -0,0 +1,129 @@
+"""On-disk store of rendered contract PDFs.
+
+Files are content-addressed: the name carries a hash of the quote id, ``Quote.updated_at``, the
+issue date and the design and client details printed on the contract, the contract template
+source, the resolved font files and the engine's output settings, so any change that could alter
+the document produces a new key and stale files are simply never read again. The directory is kept under ``CONTRACT_PDF_CACHE_MAX_BYTES`` by evicting the least
+recently served files (reads bump the file's mtime).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO
+
+from django.conf import settings
+
+from . import pdf
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def cache_dir() -> Path:
+	return Path(getattr(settings, 'CONTRACT_PDF_CACHE_DIR', Path(settings.BASE_DIR) / 'var' / 'contract_pdfs'))
+
+
+def max_bytes() -> int:
+	return getattr(settings, 'CONTRACT_PDF_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)
+
+
+def cache_key(quote, engine: pdf.PdfEngine | None = None) -> str:
+	engine = engine or pdf.get_engine()
+	context = pdf.contract_context(quote)
+	client = context['client']
+	parts = (
+		str(quote.pk),
+		quote.updated_at.isoformat() if quote.updated_at else '',
+		# Printed from related rows (or the clock), so a change there does not touch updated_at.
+		context['issued_date'].isoformat(),
+		context['design_title'],
+		context['design_description'],
+		context['designer_name'],
+		client.get_full_name() or client.get_username(),
+		*(str(value or '') for value in context['client_contact'].values()),
+		engine.template_hash,
+		engine.font_hash,
+		engine.variant,
+	)
+	return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+
+
+def etag_for(key: str) -> str:
+	return f'"{key[:32]}"'
+
+
+def path_for(quote_id: int, key: str) -> Path:
+	# The quote id prefix lets purge() find every version of one quote without an index.
+	return cache_dir() / f'{quote_id}-{key[:32]}.pdf'
+
+
+def open_cached(quote_id: int, key: str) -> BinaryIO | None:
+	"""Open the cached PDF for ``key`` and mark it as recently used; ``None`` on a miss."""
+	path = path_for(quote_id, key)
+	try:
+		handle = path.open('rb')
+	except FileNotFoundError:
+		return None
+	try:
+		os.utime(path)
+	except OSError:
+		pass  # evicted between open() and utime(); the open handle still reads fine
+	return handle
+
+
+def store(quote_id: int, key: str, content: bytes) -> Path:
+	directory = cache_dir()
+	directory.mkdir(parents=True, exist_ok=True)
+	path = path_for(quote_id, key)
+	# Write to a temporary file and rename so concurrent readers never see a partial PDF.
+	fd, temp_name = tempfile.mkstemp(dir=directory, suffix='.tmp')
+	try:
+		with os.fdopen(fd, 'wb') as handle:
+			handle.write(content)
+		os.replace(temp_name, path)
+	except BaseException:
+		Path(temp_name).unlink(missing_ok=True)
+		raise
+	evict()
+	return path
+
+
+def evict(limit: int | None = None) -> int:
+	"""Delete least recently used PDFs until the store fits in ``limit`` bytes."""
+	limit = max_bytes() if limit is None else limit
+	entries = []
+	total = 0
+	try:
+		with os.scandir(cache_dir()) as scanner:
+			for entry in scanner:
+				if not entry.name.endswith('.pdf'):
+					continue
+				try:
+					stat = entry.stat()
+				except FileNotFoundError:
+					continue
+				entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+				total += stat.st_size
+	except FileNotFoundError:
+		return 0
+	removed = 0
+	entries.sort()
+	for _, size, path in entries:
+		if total <= limit:
+			break
+		Path(path).unlink(missing_ok=True)
+		total -= size
+		removed += 1
+	return removed
+
+
+def purge(quote_id: int) -> int:
+	"""Remove every cached version of one quote's contract."""
+	removed = 0
+	for path in cache_dir().glob(f'{quote_id}-*.pdf'):
+		path.unlink(missing_ok=True)
+		removed += 1
+	return removed
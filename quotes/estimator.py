@@ -0,0 +1,285 @@
+"""Server-side construction cost estimates.
+
+Prices come from the active :class:`~quotes.models.CostTable`. Which table is active is read
+from the database on every call (one indexed lookup of its pk and version), so publishing a new
+version reaches every process at once. A version is compiled once per process into NumPy arrays, so pricing one scenario or a few hundred is a single vectorized
+expression:
+
+    low  = house_size * grade_min * floor_factor + land_size * land_min
+    high = house_size * grade_max * floor_factor + land_size * land_max
+
+rounded outwards to the table's ``rounding`` step (1,000 baht by default).
+
+:class:`Simulation` adds P10/P50/P90 bands: it draws per-grade material and labour rates, land
+rates and a structural surcharge that grows with the number of floors, once per table version,
+and evaluates every inquiry against the same draws.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Iterable
+
+import numpy as np
+
+from .models import COST_TABLE_GRADES, CostTable, EstimateInquiry
+
+MAX_BATCH = 500
+MAX_FLOORS = 10
+# Upper bound for land and house sizes: keeps every total far inside int64 and the 12 integer
+# digits of the stored estimates.
+MAX_SIZE = 1_000_000
+DRAWS = 100_000
+BANDS = (10, 50, 90)
+# Used for tables that do not carry a "simulation" section. Sigmas are for log-normal noise on
+# the material and labour parts of the per-m² rate and normal noise per additional floor.
+DEFAULT_SIMULATION = {
+	'labour_share': 0.35,
+	'material_sigma': {'economy': 0.06, 'standard': 0.08, 'luxury': 0.12},
+	'labour_sigma': 0.10,
+	'floor_sigma': 0.04,
+}
+GRADE_INDEX = {grade: index for index, grade in enumerate(COST_TABLE_GRADES)}
+
+
+class EstimateError(ValueError):
+	pass
+
+
+@dataclass(frozen=True)
+class CompiledTable:
+	pk: int
+	version: int
+	rate_min: np.ndarray
+	rate_max: np.ndarray
+	land_min: float
+	land_max: float
+	floor_factors: np.ndarray
+	extra_floor_factor: float
+	rounding: int
+	labour_share: float
+	material_sigma: np.ndarray
+	labour_sigma: float
+	floor_sigma: float
+
+	@classmethod
+	def compile(cls, pk: int, version: int, rates: dict[str, Any]) -> CompiledTable:
+		grades = rates['grades']
+		simulation = {**DEFAULT_SIMULATION, **rates.get('simulation', {})}
+		material_sigma = {**DEFAULT_SIMULATION['material_sigma'], **simulation['material_sigma']}
+		return cls(
+			pk=pk,
+			version=version,
+			rate_min=np.array([grades[grade]['min'] for grade in COST_TABLE_GRADES], dtype=np.float64),
+			rate_max=np.array([grades[grade]['max'] for grade in COST_TABLE_GRADES], dtype=np.float64),
+			land_min=float(rates['land']['min']),
+			land_max=float(rates['land']['max']),
+			floor_factors=np.array(rates['floor_factors'], dtype=np.float64),
+			extra_floor_factor=float(rates['extra_floor_factor']),
+			rounding=int(rates.get('rounding', 1000)) or 1,
+			labour_share=float(simulation['labour_share']),
+			material_sigma=np.array([material_sigma[grade] for grade in COST_TABLE_GRADES], dtype=np.float64),
+			labour_sigma=float(simulation['labour_sigma']),
+			floor_sigma=float(simulation['floor_sigma']),
+		)
+
+
+# Published tables never change, so compiled versions can be kept for the life of the process.
+_compiled: dict[int, CompiledTable] = {}
+
+
+def active_table() -> CompiledTable:
+	row = CostTable.objects.filter(is_active=True).values_list('pk', 'version').first()
+	if row is None:
+		raise EstimateError('No active cost table has been published.')
+	pk, version = row
+	if version not in _compiled:
+		# The rates are only loaded the first time this process sees a version.
+		rates = CostTable.objects.values_list('rates', flat=True).get(pk=pk)
+		_compiled[version] = CompiledTable.compile(pk, version, rates)
+	return _compiled[version]
+
+
+def floor_factors(table: CompiledTable, floors: np.ndarray) -> np.ndarray:
+	floors = np.maximum(floors, 1)
+	listed = len(table.floor_factors)
+	factor = table.floor_factors[np.minimum(floors, listed) - 1]
+	return factor + np.maximum(floors - listed, 0) * table.extra_floor_factor
+
+
+def estimate_arrays(
+	table: CompiledTable,
+	land_size: np.ndarray,
+	house_size: np.ndarray,
+	grade: np.ndarray,
+	floors: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+	"""Vectorized ``(low, high)`` estimates; ``grade`` holds indexes into ``COST_TABLE_GRADES``."""
+	factor = floor_factors(table, floors)
+	low = house_size * table.rate_min[grade] * factor + land_size * table.land_min
+	high = house_size * table.rate_max[grade] * factor + land_size * table.land_max
+	step = table.rounding
+	return np.floor(low / step) * step, np.ceil(high / step) * step
+
+
+def _whole_number(value: Any, field: str, minimum: int, maximum: int | None = None) -> int:
+	try:
+		number = int(str(value).strip())
+	except (TypeError, ValueError):
+		raise EstimateError(f'{field} must be a whole number.') from None
+	if number < minimum or (maximum is not None and number > maximum):
+		bounds = f'between {minimum} and {maximum}' if maximum is not None else f'at least {minimum}'
+		raise EstimateError(f'{field} must be {bounds}.')
+	return number
+
+
+def parse_scenario(data: Any) -> tuple[int, int, int, int]:
+	"""Validate one scenario; returns ``(land_size, house_size, grade_index, floors)``."""
+	if not isinstance(data, dict):
+		raise EstimateError('Each scenario must be an object.')
+	grade = str(data.get('material_grade') or '').strip().lower()
+	if grade not in GRADE_INDEX:
+		raise EstimateError(f"material_grade must be one of: {', '.join(COST_TABLE_GRADES)}.")
+	return (
+		_whole_number(data.get('land_size', 0), 'land_size', 0, MAX_SIZE),
+		_whole_number(data.get('house_size'), 'house_size', 1, MAX_SIZE),
+		GRADE_INDEX[grade],
+		_whole_number(data.get('floors', 1), 'floors', 1, MAX_FLOORS),
+	)
+
+
+def price_scenarios(scenarios: Iterable[Any], table: CompiledTable | None = None) -> list[dict[str, Any]]:
+	"""Price many scenarios at once; invalid ones get an ``error`` entry in their slot."""
+	table = table or active_table()
+	results: list[dict[str, Any]] = []
+	valid: list[tuple[int, tuple[int, int, int, int]]] = []
+	for position, scenario in enumerate(scenarios):
+		try:
+			valid.append((position, parse_scenario(scenario)))
+			results.append({})
+		except EstimateError as exc:
+			results.append({'error': str(exc)})
+	if valid:
+		columns = np.array([values for _, values in valid], dtype=np.int64).T
+		low, high = estimate_arrays(table, columns[0], columns[1], columns[2], columns[3])
+		for (position, _), low_value, high_value in zip(valid, low.tolist(), high.tolist()):
+			results[position] = {'estimate_min': int(low_value), 'estimate_max': int(high_value)}
+	return results
+
+
+@dataclass(frozen=True)
+class Estimate:
+	estimate_min: Decimal
+	estimate_max: Decimal
+	table: CompiledTable
+
+
+def estimate(land_size: int, house_size: int, material_grade: str, floors: int, table: CompiledTable | None = None) -> Estimate:
+	table = table or active_table()
+	low, high = estimate_arrays(
+		table,
+		np.array([land_size]),
+		np.array([house_size]),
+		np.array([GRADE_INDEX[material_grade]]),
+		np.array([floors]),
+	)
+	return Estimate(Decimal(int(low[0])), Decimal(int(high[0])), table)
+
+
+def _triangular(rng: np.random.Generator, low: np.ndarray, high: np.ndarray, size: tuple[int, ...]) -> np.ndarray:
+	# Symmetric triangular distribution by inverse CDF; unlike Generator.triangular it accepts
+	# low == high (a fixed rate).
+	u = rng.random(size)
+	spread = (high - low)[..., None]
+	offset = np.where(u < 0.5, np.sqrt(u / 2), 1 - np.sqrt((1 - u) / 2))
+	return low[..., None] + spread * offset
+
+
+class Simulation:
+	"""Monte Carlo draws for one cost table, shared by every inquiry priced against it."""
+
+	def __init__(self, table: CompiledTable, draws: int = DRAWS, seed: int = 0) -> None:
+		self.table = table
+		# Seeded per table version so re-scoring an unchanged inquiry gives the same bands.
+		rng = np.random.default_rng([seed, table.version])
+		grades = len(COST_TABLE_GRADES)
+		base = _triangular(rng, table.rate_min, table.rate_max, (grades, draws))
+		material_sigma = table.material_sigma[:, None]
+		# Log-normal noise with mean 1, so the simulation is centred on the table rates.
+		material = base * (1 - table.labour_share) * rng.lognormal(-material_sigma ** 2 / 2, material_sigma, (grades, draws))
+		labour = base * table.labour_share * rng.lognormal(-table.labour_sigma ** 2 / 2, table.labour_sigma, draws)
+		self.rates = material + labour
+		self.land = rng.uniform(table.land_min, table.land_max, draws)
+		self.floor_noise = rng.normal(0.0, table.floor_sigma, draws)
+
+	def bands(self, land_size: int, house_size: int, grade: int, floors: int) -> np.ndarray:
+		"""Return the P10/P50/P90 totals for one scenario."""
+		floors = max(int(floors), 1)
+		factor = floor_factors(self.table, np.array([floors]))[0] * (1 + self.floor_noise * (floors - 1))
+		totals = house_size * self.rates[grade] * factor + land_size * self.land
+		step = self.table.rounding
+		return np.round(np.percentile(totals, BANDS) / step) * step
+
+
+_simulations: dict[int, Simulation] = {}
+
+
+def simulation_for(table: CompiledTable) -> Simulation:
+	if table.version not in _simulations:
+		_simulations[table.version] = Simulation(table)
+	return _simulations[table.version]
+
+
+@dataclass(frozen=True)
+class Bands:
+	p10: Decimal
+	p50: Decimal
+	p90: Decimal
+
+
+def simulate(land_size: int, house_size: int, material_grade: str, floors: int, table: CompiledTable | None = None) -> Bands:
+	table = table or active_table()
+	p10, p50, p90 = simulation_for(table).bands(land_size, house_size, GRADE_INDEX[material_grade], floors).tolist()
+	return Bands(Decimal(int(p10)), Decimal(int(p50)), Decimal(int(p90)))
+
+
+def rescore_open_inquiries(table: CompiledTable | None = None, batch_size: int = 500) -> int:
+	"""Re-price every unhandled inquiry against ``table`` (the active one by default)."""
+	table = table or active_table()
+	simulation = simulation_for(table)
+	fields = ['estimate_min', 'estimate_max', 'estimate_p10', 'estimate_p50', 'estimate_p90', 'cost_table']
+	inquiries = EstimateInquiry.objects.filter(handled=False).only(
+		'pk', 'land_size', 'house_size', 'material_grade', 'floors'
+	).order_by('pk')
+	rescored = 0
+	batch: list = []
+
+	def flush() -> None:
+		grades = np.array([GRADE_INDEX.get(inquiry.material_grade, GRADE_INDEX['standard']) for inquiry in batch])
+		low, high = estimate_arrays(
+			table,
+			np.array([inquiry.land_size for inquiry in batch]),
+			np.array([inquiry.house_size for inquiry in batch]),
+			grades,
+			np.array([inquiry.floors for inquiry in batch]),
+		)
+		for inquiry, grade, low_value, high_value in zip(batch, grades.tolist(), low.tolist(), high.tolist()):
+			p10, p50, p90 = simulation.bands(inquiry.land_size, inquiry.house_size, grade, inquiry.floors).tolist()
+			inquiry.estimate_min, inquiry.estimate_max = Decimal(int(low_value)), Decimal(int(high_value))
+			inquiry.estimate_p10, inquiry.estimate_p50, inquiry.estimate_p90 = (
+				Decimal(int(p10)), Decimal(int(p50)), Decimal(int(p90))
+			)
+			inquiry.cost_table_id = table.pk
+		EstimateInquiry.objects.bulk_update(batch, fields)
+
+	for inquiry in inquiries.iterator(chunk_size=batch_size):
+		batch.append(inquiry)
+		if len(batch) >= batch_size:
+			flush()
+			rescored += len(batch)
+			batch = []
+	if batch:
+		flush()
+		rescored += len(batch)
+	return rescored
@@ -18,3 +18,10 @@ class QuoteUpdateForm(forms.ModelForm):
     class Meta:
         model = Quote
         fields = ["price", "status"]
+
+
+class BulkPricingUploadForm(forms.Form):
+    file = forms.FileField(
+        label="ไฟล์ CSV",
+        help_text="Columns: quote_id, price, status (draft / pending / approved). Empty cells keep the current value.",
+    )
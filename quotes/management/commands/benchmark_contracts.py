@@ -0,0 +1,52 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quotes.models import Quote
+from quotes.pdf import PdfEngine
+
+
+class Command(BaseCommand):
+    help = "Compare contract PDF size and render time with fonts embedded whole and subset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quotes", type=int, default=5, help="Number of quotes to render (most recent first).")
+        parser.add_argument("--repeat", type=int, default=3, help="Renders per quote and variant.")
+
+    def handle(self, *args, **options):
+        quotes = list(
+            Quote.objects.select_related("design", "catalog_design", "requested_by")[: max(1, options["quotes"])]
+        )
+        if not quotes:
+            raise CommandError("There are no quotes to render.")
+        repeat = max(1, options["repeat"])
+
+        results = {}
+        for label, optimize in (("plain", False), ("optimized", True)):
+            engine = PdfEngine(optimize=optimize)
+            if engine.backend is None:
+                raise CommandError("Neither WeasyPrint nor xhtml2pdf is available.")
+            engine.render(quotes[0])  # warm-up: first render loads fonts into the backend
+            timings, sizes = [], []
+            for quote in quotes:
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    content = engine.render(quote)
+                    timings.append(time.perf_counter() - started)
+                    sizes.append(len(content))
+            results[label] = (statistics.mean(sizes), statistics.median(timings))
+            self.stdout.write(
+                f"{label:>10} [{engine.backend}]: {results[label][0] / 1024:8.1f} KB  "
+                f"{results[label][1] * 1000:8.1f} ms median over {len(timings)} renders"
+            )
+
+        if engine.backend != "weasyprint":
+            self.stdout.write(self.style.WARNING("Only WeasyPrint output depends on CONTRACT_PDF_OPTIMIZE."))
+        plain_size, plain_time = results["plain"]
+        size, render_time = results["optimized"]
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Size {size / plain_size:.0%} of plain, render time {render_time / plain_time:.0%} of plain."
+            )
+        )
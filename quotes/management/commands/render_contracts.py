@@ -0,0 +1,63 @@
+import os
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from quotes.bundles import contract_zip
+from quotes.models import Quote
+
+
+def parse_date(value: str):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date {value!r}; use YYYY-MM-DD.") from None
+
+
+class Command(BaseCommand):
+    help = "Render the contracts of many quotes in parallel and write them into one zip archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Path of the zip file to write.")
+        parser.add_argument(
+            "--status",
+            default=Quote.Status.APPROVED,
+            choices=Quote.Status.values,
+            help="Only quotes in this status (default: approved).",
+        )
+        parser.add_argument("--since", help="Only quotes last updated on or after this date (YYYY-MM-DD).")
+        parser.add_argument("--until", help="Only quotes last updated on or before this date (YYYY-MM-DD).")
+        parser.add_argument("--ids", nargs="+", type=int, help="Explicit quote ids (other filters still apply).")
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Number of worker processes (defaults to the CPU count).",
+        )
+
+    def handle(self, *args, **options):
+        quotes = Quote.objects.filter(status=options["status"]).select_related(
+            "design", "design__owner", "catalog_design", "requested_by"
+        ).order_by("pk")
+        if options["since"]:
+            since = timezone.make_aware(datetime.combine(parse_date(options["since"]), time.min))
+            quotes = quotes.filter(updated_at__gte=since)
+        if options["until"]:
+            until = timezone.make_aware(datetime.combine(parse_date(options["until"]), time.max))
+            quotes = quotes.filter(updated_at__lte=until)
+        if options["ids"]:
+            quotes = quotes.filter(pk__in=options["ids"])
+
+        quotes = list(quotes)
+        if not quotes:
+            self.stdout.write("No matching quotes.")
+            return
+        written = 0
+        with open(options["output"], "wb") as output:
+            for chunk in contract_zip(quotes, workers=max(1, options["workers"])):
+                output.write(chunk)
+                written += len(chunk)
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {len(quotes)} contracts ({written / 1024:.0f} KB) to {options['output']}.")
+        )
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from quotes import estimator
+
+
+class Command(BaseCommand):
+    help = "Re-price all open (unhandled) estimate inquiries against the active cost table, including P10/P50/P90 bands."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500, help="Inquiries updated per bulk_update.")
+
+    def handle(self, *args, **options):
+        try:
+            table = estimator.active_table()
+        except estimator.EstimateError as exc:
+            raise CommandError(str(exc)) from exc
+        started = time.perf_counter()
+        rescored = estimator.rescore_open_inquiries(table, batch_size=max(1, options["batch_size"]))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            self.style.SUCCESS(f"Re-scored {rescored} open inquiries with cost table v{table.version} in {elapsed:.2f}s.")
+        )
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from quotes import rendering
+
+
+class Command(BaseCommand):
+    help = "Render queued contract PDFs in a pool of worker processes (used when CONTRACT_PDF_ASYNC is on)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Maximum number of contracts rendered at once (defaults to CONTRACT_PDF_WORKERS).",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=int,
+            help="Seconds a single render may take (defaults to CONTRACT_PDF_RENDER_TIMEOUT).",
+        )
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds between queue checks when idle.")
+        parser.add_argument("--once", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        try:
+            processed = rendering.run_worker(
+                workers=options["workers"],
+                timeout=options["timeout"],
+                poll_interval=options["poll_interval"],
+                once=options["once"],
+            )
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} contract render jobs."))
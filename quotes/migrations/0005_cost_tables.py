@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:46
+
+import django.db.models.deletion
+import quotes.models
+from django.db import migrations, models
+
+# Baht per square metre of usable area by material grade, per unit of land for site preparation,
+# and multipliers for multi-storey structures (1, 2, 3 floors; +7% per floor beyond that).
+INITIAL_RATES = {
+    'grades': {
+        'economy': {'min': 9000, 'max': 11500},
+        'standard': {'min': 12000, 'max': 15500},
+        'luxury': {'min': 18000, 'max': 26000},
+    },
+    'land': {'min': 250, 'max': 450},
+    'floor_factors': [1.0, 1.06, 1.13],
+    'extra_floor_factor': 0.07,
+    'rounding': 1000,
+}
+
+
+def seed_cost_table(apps, schema_editor):
+    CostTable = apps.get_model('quotes', 'CostTable')
+    if not CostTable.objects.exists():
+        CostTable.objects.create(version=1, rates=INITIAL_RATES, is_active=True, notes='Initial rates.')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0004_contractrenderjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CostTable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveIntegerField(unique=True)),
+                ('rates', models.JSONField(validators=[quotes.models.validate_cost_rates])),
+                ('is_active', models.BooleanField(default=False)),
+                ('notes', models.TextField(blank=True)),
+                ('published_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-version'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('is_active',), name='unique_active_cost_table')],
+            },
+        ),
+        migrations.AddField(
+            model_name='estimateinquiry',
+            name='cost_table',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='inquiries', to='quotes.costtable'),
+        ),
+        migrations.RunPython(seed_cost_table, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,60 @@ from django.db import models
 
 from designs.models import HouseDesign
 
+COST_TABLE_GRADES = ('economy', 'standard', 'luxury')
+
+
+def validate_cost_rates(rates) -> None:
+	"""Check the shape of ``CostTable.rates``; see the seed in migration 0005 for an example."""
+	if not isinstance(rates, dict):
+		raise ValidationError('Rates must be a JSON object.')
+	grades = rates.get('grades')
+	if not isinstance(grades, dict) or set(grades) != set(COST_TABLE_GRADES):
+		raise ValidationError(f"'grades' must define exactly: {', '.join(COST_TABLE_GRADES)}.")
+	ranges = list(grades.items()) + [('land', rates.get('land'))]
+	for name, band in ranges:
+		if not isinstance(band, dict) or not all(isinstance(band.get(key), (int, float)) for key in ('min', 'max')):
+			raise ValidationError(f"'{name}' needs numeric 'min' and 'max' rates.")
+		if not 0 <= band['min'] <= band['max']:
+			raise ValidationError(f"'{name}' rates must satisfy 0 <= min <= max.")
+	factors = rates.get('floor_factors')
+	if not isinstance(factors, list) or not factors or not all(isinstance(value, (int, float)) and value > 0 for value in factors):
+		raise ValidationError("'floor_factors' must be a non-empty list of positive multipliers (1 floor, 2 floors, ...).")
+	if not isinstance(rates.get('extra_floor_factor'), (int, float)) or rates['extra_floor_factor'] < 0:
+		raise ValidationError("'extra_floor_factor' must be a non-negative number.")
+	if not isinstance(rates.get('simulation', {}), dict):
+		raise ValidationError("'simulation' must be an object of uncertainty parameters.")
+
+
+class CostTable(models.Model):
+	"""A published set of construction cost rates used by the estimator.
+
+	Versions are immutable once saved so every stored estimate can be traced back to the exact
+	rates that produced it; price changes are made by publishing a new version.
+	"""
+
+	version = models.PositiveIntegerField(unique=True)
+	rates = models.JSONField(validators=[validate_cost_rates])
+	is_active = models.BooleanField(default=False)
+	notes = models.TextField(blank=True)
+	published_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		ordering = ['-version']
+		constraints = [
+			models.UniqueConstraint(fields=['is_active'], condition=models.Q(is_active=True), name='unique_active_cost_table'),
+		]
+
+	def __str__(self) -> str:
+		return f"Cost table v{self.version}{' (active)' if self.is_active else ''}"
+
+	def clean(self):
+		super().clean()
+		if self.pk:
+			stored = CostTable.objects.filter(pk=self.pk).values_list('version', 'rates').first()
+			if stored and stored != (self.version, self.rates):
+				raise ValidationError('Published cost tables cannot be edited; publish a new version instead.')
+
 
 class EstimateInquiry(models.Model):
 	class MaterialGrade(models.TextChoices):
@@ -28,6 +82,17 @@ class EstimateInquiry(models.Model):
 	floors = models.PositiveSmallIntegerField()
 	estimate_min = models.DecimalField(max_digits=14, decimal_places=2)
 	estimate_max = models.DecimalField(max_digits=14, decimal_places=2)
+	# Monte Carlo percentiles of the total cost (see quotes.estimator.Simulation).
+	estimate_p10 = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+	estimate_p50 = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+	estimate_p90 = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+	cost_table = models.ForeignKey(
+		CostTable,
+		on_delete=models.PROTECT,
+		related_name='inquiries',
+		null=True,
+		blank=True,
+	)
 	submitted_at = models.DateTimeField(auto_now_add=True)
 	handled = models.BooleanField(default=False)
 	notes = models.TextField(blank=True)
@@ -128,3 +193,29 @@ class Quote(models.Model):
 	@property
 	def is_catalog_source(self) -> bool:
 		return bool(self.catalog_design_id and not self.design_id)
+
+
+class ContractRenderJob(models.Model):
+	class Status(models.TextChoices):
+		QUEUED = 'queued', 'Queued'
+		RUNNING = 'running', 'Running'
+		DONE = 'done', 'Done'
+		FAILED = 'failed', 'Failed'
+
+	quote = models.ForeignKey(Quote, on_delete=models.CASCADE, related_name='render_jobs')
+	cache_key = models.CharField(max_length=64)
+	status = models.CharField(max_length=20, choices=Status.choices, default=Status.QUEUED)
+	error = models.TextField(blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+	started_at = models.DateTimeField(null=True, blank=True)
+	finished_at = models.DateTimeField(null=True, blank=True)
+
+	class Meta:
+		ordering = ['created_at']
+		indexes = [
+			models.Index(fields=['status', 'created_at'], name='quotes_render_queue_idx'),
+			models.Index(fields=['quote', 'cache_key'], name='quotes_render_key_idx'),
+		]
+
+	def __str__(self) -> str:
+		return f"Contract render #{self.pk} for quote {self.quote_id} ({self.get_status_display()})"
@@ -0,0 +1,384 @@
+"""Contract PDF rendering.
+
+Shared by the download view and anything else that needs a quote's contract as bytes. WeasyPrint
+is used when its system libraries are available, xhtml2pdf (ReportLab) otherwise. The per-process
+:class:`PdfEngine` is built when a server or the contract worker starts (see :func:`warm_start`)
+or on first use.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from decimal import Decimal, ROUND_HALF_UP
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+from django.template.loader import get_template
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_NAME = 'quotes/contract_pdf.html'
+
+FONT_NORMAL_CANDIDATES = (
+	('Sarabun', 'Sarabun', 'fonts/Sarabun/Sarabun-Regular.ttf'),
+	('Sarabun', 'Sarabun', 'fonts/Sarabun/SarabunNew-Regular.ttf'),
+	('Sarabun', 'Sarabun', r'C:/Windows/Fonts/THSarabunNew.ttf'),
+	('Sarabun', 'Sarabun', r'C:/Windows/Fonts/THSARABUN.TTF'),
+	('Tahoma', 'Tahoma', r'C:/Windows/Fonts/Tahoma.ttf'),
+	('LeelawUI', 'LeelawUI', r'C:/Windows/Fonts/LeelawUI.ttf'),
+)
+
+FONT_BOLD_CANDIDATES = (
+	('Sarabun', 'Sarabun-Bold', 'fonts/Sarabun/Sarabun-Bold.ttf'),
+	('Sarabun', 'Sarabun-Bold', 'fonts/Sarabun/SarabunNew-Bold.ttf'),
+	('Sarabun', 'Sarabun-Bold', r'C:/Windows/Fonts/THSarabunNew Bold.ttf'),
+	('Sarabun', 'Sarabun-Bold', r'C:/Windows/Fonts/THSARABUNBOLD.TTF'),
+	('Tahoma', 'Tahoma-Bold', r'C:/Windows/Fonts/TahomaBD.TTF'),
+	('LeelawUI', 'LeelawUI-Bold', r'C:/Windows/Fonts/LeelawUIb.ttf'),
+)
+
+SCHEDULE_PLAN = (
+	{
+		'label': 'งวดที่ 1',
+		'percentage': Decimal('0.30'),
+		'description': 'ชำระ 30% เมื่อเซ็นสัญญาก่อสร้าง',
+	},
+	{
+		'label': 'งวดที่ 2',
+		'percentage': Decimal('0.40'),
+		'description': 'ชำระ 40% เมื่อก่อสร้างโครงสร้างแล้วเสร็จ',
+	},
+	{
+		'label': 'งวดที่ 3',
+		'percentage': Decimal('0.30'),
+		'description': 'ชำระ 30% ก่อนส่งมอบงานก่อสร้าง',
+	},
+)
+
+COMPANY = {
+	'name': 'บริษัท โฮมแมนเนจเมนท์ จำกัด',
+	'address': '123/45 ถนนสุขุมวิท แขวงคลองเตย เขตคลองเตย กรุงเทพมหานคร 10110',
+	'phone': '02-123-4567',
+	'email': 'contact@homemanagement.co.th',
+}
+
+
+@dataclass(frozen=True)
+class FontSet:
+	family: str | None
+	normal_name: str | None
+	regular_path: Path | None
+	bold_name: str | None
+	bold_path: Path | None
+
+	@property
+	def body_family(self) -> str:
+		return self.family or 'Helvetica'
+
+	def fingerprint(self) -> str:
+		"""Hash of the resolved font files, so replacing a font invalidates rendered contracts."""
+		digest = hashlib.sha256()
+		for name, path in ((self.normal_name, self.regular_path), (self.bold_name, self.bold_path)):
+			digest.update(f'{name}|{path}'.encode())
+			if path is not None:
+				stat = path.stat()
+				digest.update(f'|{stat.st_size}|{stat.st_mtime_ns}'.encode())
+		return digest.hexdigest()
+
+
+def _resolve_font_candidate(candidates, preferred_family: str | None = None):
+	def iter_candidates():
+		if preferred_family:
+			for entry in candidates:
+				if entry[0] == preferred_family:
+					yield entry
+			for entry in candidates:
+				if entry[0] != preferred_family:
+					yield entry
+		else:
+			for entry in candidates:
+				yield entry
+
+	for family, font_name, path_str in iter_candidates():
+		candidate_path = Path(path_str)
+		if not candidate_path.is_absolute():
+			resolved = finders.find(path_str)
+			if not resolved:
+				continue
+			candidate_path = Path(resolved)
+		if candidate_path.exists():
+			return family, font_name, candidate_path
+	return None, None, None
+
+
+def resolve_fonts() -> FontSet:
+	font_family, normal_font_name, regular_font_path = _resolve_font_candidate(FONT_NORMAL_CANDIDATES)
+	bold_family, bold_font_name, bold_font_path = _resolve_font_candidate(
+		FONT_BOLD_CANDIDATES, preferred_family=font_family
+	)
+	if not font_family and bold_family:
+		font_family = bold_family
+	if not bold_font_name and normal_font_name:
+		bold_font_name = f"{normal_font_name}-Bold"
+	if not bold_font_path:
+		bold_font_path = regular_font_path
+	return FontSet(font_family, normal_font_name, regular_font_path, bold_font_name, bold_font_path)
+
+
+def contract_context(quote) -> dict:
+	total_price = quote.price or Decimal('0.00')
+	client = quote.requested_by
+	client_profile = getattr(client, 'profile', None)
+	client_contact = {
+		'address': getattr(client_profile, 'address', None) if client_profile else None,
+		'phone': getattr(client_profile, 'phone', None) if client_profile else None,
+	}
+
+	installments = []
+	for plan in SCHEDULE_PLAN:
+		amount = None
+		if quote.price:
+			amount = (total_price * plan['percentage']).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+		installments.append({
+			'label': plan['label'],
+			'description': plan['description'],
+			'percentage_display': f"{(plan['percentage'] * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP)}%",
+			'amount': amount,
+		})
+
+	if quote.design and quote.design.owner:
+		designer_name = quote.design.owner.get_full_name() or quote.design.owner.username
+	else:
+		designer_name = 'ทีมออกแบบ Project House'
+
+	return {
+		'quote': quote,
+		'design_title': quote.reference_name,
+		'design_description': quote.reference_description,
+		'design_code': quote.reference_code,
+		'designer_name': designer_name,
+		'is_catalog_design': quote.is_catalog_source,
+		'client': client,
+		'client_contact': client_contact,
+		'issued_date': timezone.localdate(),
+		'installments': installments,
+		'total_price': total_price,
+		'has_price': bool(quote.price),
+		'company': COMPANY,
+	}
+
+
+# WeasyPrint output options when optimizing: embed only the glyphs the contract uses, drop
+# TrueType hinting (meaningless in a PDF) and keep every stream compressed. Without optimizing the
+# fonts are embedded whole. xhtml2pdf output is the same either way: ReportLab always subsets.
+WEASYPRINT_PLAIN_OPTIONS = {
+	'full_fonts': True,
+}
+WEASYPRINT_OPTIMIZE_OPTIONS = {
+	'full_fonts': False,
+	'hinting': False,
+	'uncompressed_pdf': False,
+	'optimize_images': True,
+}
+
+
+def _font_face_css(fonts: FontSet, as_uri: bool = True) -> str:
+	rules = []
+	for path, weight in ((fonts.regular_path, 'normal'), (fonts.bold_path, 'bold')):
+		if fonts.family and path:
+			src = path.as_uri() if as_uri else path.as_posix()
+			rules.append(f"@font-face {{ font-family: '{fonts.family}'; font-weight: {weight}; src: url('{src}'); }}")
+	return '\n'.join(rules)
+
+
+class PdfEngine:
+	"""Everything about contract rendering that does not depend on the quote, prepared once.
+
+	Building an engine resolves the fonts, picks the backend, loads the fonts into it and
+	compiles the template, so a render only has to fill in the template and lay out the page.
+	"""
+
+	def __init__(self, optimize: bool | None = None) -> None:
+		self.optimize = getattr(settings, 'CONTRACT_PDF_OPTIMIZE', True) if optimize is None else optimize
+		self.fonts = resolve_fonts()
+		self.font_hash = self.fonts.fingerprint()
+		self.template = get_template(TEMPLATE_NAME)
+		self.template_hash = hashlib.sha256(self.template.template.source.encode('utf-8')).hexdigest()
+		self.backend = None
+		self._weasyprint_html_cls = None
+		self._stylesheets = []
+		self._font_config = None
+		self._pisa = None
+		self._xhtml2pdf_fonts = ''
+		weasyprint_html_cls = _weasyprint_html_cls()
+		if weasyprint_html_cls:
+			try:
+				self._prepare_weasyprint(weasyprint_html_cls)
+			except OSError:
+				pass  # fall back if system libs missing
+		if self.backend is None:
+			self._prepare_xhtml2pdf()
+
+	def _prepare_weasyprint(self, weasyprint_html_cls) -> None:
+		from weasyprint import CSS
+		from weasyprint.text.fonts import FontConfiguration
+
+		# Point WeasyPrint at the bundled TTFs instead of relying on system-installed fonts; the
+		# files are parsed here, once, rather than on every render.
+		self._font_config = FontConfiguration()
+		font_css = _font_face_css(self.fonts)
+		if font_css:
+			self._stylesheets = [CSS(string=font_css, font_config=self._font_config)]
+		self._weasyprint_html_cls = weasyprint_html_cls
+		self.backend = 'weasyprint'
+
+	def _prepare_xhtml2pdf(self) -> None:
+		try:
+			from xhtml2pdf import pisa
+		except ImportError:
+			return  # render() reports the missing backend
+		from reportlab.pdfbase import pdfmetrics
+		from reportlab.pdfbase.ttfonts import TTFont
+
+		fonts = self.fonts
+
+		def register_font(font_name: str | None, font_path: Path | None):
+			if not font_name or not font_path:
+				return
+			try:
+				pdfmetrics.getFont(font_name)
+			except KeyError:
+				try:
+					pdfmetrics.registerFont(TTFont(font_name, str(font_path)))
+				except Exception:
+					pass
+
+		register_font(fonts.normal_name or 'Helvetica', fonts.regular_path)
+		register_font(fonts.bold_name, fonts.bold_path if fonts.bold_path else None)
+		try:
+			if fonts.family and fonts.normal_name and fonts.bold_name and fonts.regular_path and fonts.bold_path:
+				pdfmetrics.registerFontFamily(fonts.family, normal=fonts.normal_name, bold=fonts.bold_name)
+			elif fonts.family and fonts.normal_name and fonts.regular_path:
+				pdfmetrics.registerFontFamily(fonts.family, normal=fonts.normal_name)
+		except Exception:
+			pass
+		if fonts.regular_path and fonts.normal_name:
+			try:
+				pisa.DEFAULT_FONT = fonts.normal_name
+			except Exception:
+				pass
+		# xhtml2pdf only maps CSS font names to files declared with @font-face; without these rules
+		# the body falls back to Helvetica, which has no Thai glyphs. ReportLab embeds the subset
+		# of glyphs actually drawn.
+		font_css = _font_face_css(fonts, as_uri=False)
+		self._xhtml2pdf_fonts = f'<style>{font_css}</style>' if font_css else ''
+		self._pisa = pisa
+		self.backend = 'xhtml2pdf'
+
+	def render_html(self, quote) -> str:
+		html_string = self.template.render(contract_context(quote))
+		return html_string.replace('__BODY_FONT__', self.fonts.body_family)
+
+	@property
+	def variant(self) -> str:
+		"""Identifies the output settings; part of the PDF cache key."""
+		return f"{self.backend}:{'optimized' if self.optimize else 'plain'}"
+
+	def render(self, quote, base_url: str | None = None) -> bytes:
+		return self._render_pdf(self.render_html(quote), base_url)
+
+	def _render_pdf(self, html_string: str, base_url: str | None) -> bytes:
+		if self.backend == 'weasyprint':
+			options = WEASYPRINT_OPTIMIZE_OPTIONS if self.optimize else WEASYPRINT_PLAIN_OPTIONS
+			try:
+				return self._weasyprint_html_cls(string=html_string, base_url=base_url).write_pdf(
+					stylesheets=self._stylesheets, font_config=self._font_config, **options
+				)
+			except OSError:
+				# System libraries went missing at layout time; use xhtml2pdf from now on. Renders
+				# on other threads can fail at the same time, so switch once, under the lock.
+				with _engine_lock:
+					if self.backend == 'weasyprint':
+						self._prepare_xhtml2pdf()
+		if self.backend == 'xhtml2pdf':
+			html_string = html_string.replace('</head>', f'{self._xhtml2pdf_fonts}</head>', 1)
+			pdf_stream = BytesIO()
+			result = self._pisa.CreatePDF(html_string, dest=pdf_stream, encoding='utf-8')
+			if result.err:
+				raise ImproperlyConfigured(
+					'ไม่สามารถสร้างไฟล์ PDF ได้ กรุณาตรวจสอบการติดตั้งไลบรารี WeasyPrint หรือ xhtml2pdf.'
+				)
+			return pdf_stream.getvalue()
+		raise ImproperlyConfigured(
+			'ไม่สามารถสร้าง PDF ได้ เนื่องจาก WeasyPrint หรือ xhtml2pdf ไม่พร้อมใช้งาน โปรดติดตั้ง GTK สำหรับ WeasyPrint หรือรัน "pip install xhtml2pdf".'
+		)
+
+
+def _weasyprint_html_cls():
+	try:
+		from weasyprint import HTML as WeasyPrintHTML
+	except (ImportError, OSError):
+		return None
+	return WeasyPrintHTML
+
+
+_engine: PdfEngine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> PdfEngine:
+	"""Return this process's engine, building it on first use."""
+	global _engine
+	if _engine is None:
+		with _engine_lock:
+			if _engine is None:
+				_engine = PdfEngine()
+	return _engine
+
+
+def warm_up() -> PdfEngine | None:
+	"""Build the engine ahead of the first download and log what it cost."""
+	if _engine is not None:
+		return _engine
+	started = time.perf_counter()
+	try:
+		engine = get_engine()
+	except Exception:
+		logger.exception('Could not prepare the contract PDF engine; it will be retried on first use')
+		return None
+	logger.info(
+		'Contract PDF engine ready in %.0f ms (backend=%s, font=%s)',
+		(time.perf_counter() - started) * 1000,
+		engine.backend or 'none',
+		engine.fonts.body_family,
+	)
+	return engine
+
+
+def warm_start() -> None:
+	"""Warm up when ``CONTRACT_PDF_WARM_START`` is on; called by the WSGI and ASGI entry points.
+
+	Management commands, migrations and tests skip it so they do not pay for a PDF engine they
+	never use.
+	"""
+	if getattr(settings, 'CONTRACT_PDF_WARM_START', True):
+		warm_up()
+
+
+def reset_engine() -> None:
+	global _engine
+	with _engine_lock:
+		_engine = None
+
+
+def render_contract(quote, base_url: str | None = None) -> bytes:
+	"""Render the contract of ``quote`` to PDF bytes."""
+	return get_engine().render(quote, base_url=base_url)
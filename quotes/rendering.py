@@ -0,0 +1,207 @@
+"""Background contract rendering.
+
+With ``CONTRACT_PDF_ASYNC`` enabled, a download that misses the PDF cache enqueues a
+:class:`~quotes.models.ContractRenderJob` instead of rendering inside the request. ``manage.py
+run_contract_worker`` claims queued jobs and renders them in a pool of worker processes; the
+finished PDF lands in :mod:`quotes.contract_cache`, where the next download finds it. Jobs that
+fail, time out or are never picked up fall back to the synchronous path in the view.
+"""
+
+from __future__ import annotations
+
+import logging
+import signal
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import contract_cache, pdf
+from .models import ContractRenderJob, Quote
+
+logger = logging.getLogger(__name__)
+
+# Extra time a running job gets past the render timeout before the worker gives up on it.
+TIMEOUT_GRACE = 15
+
+
+class RenderTimeout(Exception):
+	pass
+
+
+def async_enabled() -> bool:
+	return getattr(settings, 'CONTRACT_PDF_ASYNC', False)
+
+
+def render_timeout() -> int:
+	return getattr(settings, 'CONTRACT_PDF_RENDER_TIMEOUT', 60)
+
+
+def worker_count() -> int:
+	return getattr(settings, 'CONTRACT_PDF_WORKERS', 2)
+
+
+def latest_job(quote: Quote, key: str) -> ContractRenderJob | None:
+	return ContractRenderJob.objects.filter(quote=quote, cache_key=key).order_by('-created_at').first()
+
+
+def enqueue(quote: Quote, key: str) -> ContractRenderJob:
+	"""Return the live job rendering this version of the contract, creating one if needed.
+
+	Only called once the PDF cache has missed, so a DONE job is stale too: its file has been
+	evicted or purged since, and handing it back would bounce the browser between the status
+	page and the download forever.
+	"""
+	job = latest_job(quote, key)
+	if job is not None and job.status in (ContractRenderJob.Status.QUEUED, ContractRenderJob.Status.RUNNING):
+		return job
+	return ContractRenderJob.objects.create(quote=quote, cache_key=key)
+
+
+def expire_if_stale(job: ContractRenderJob) -> bool:
+	"""Fail a job that nobody picked up (or finished) in time so the caller can render it itself."""
+	if job.status == ContractRenderJob.Status.QUEUED:
+		started, limit = job.created_at, render_timeout()
+	elif job.status == ContractRenderJob.Status.RUNNING:
+		started, limit = job.started_at or job.created_at, render_timeout() + TIMEOUT_GRACE
+	else:
+		return False
+	if timezone.now() - started < timedelta(seconds=limit):
+		return False
+	message = 'No render worker picked up the job.' if job.status == ContractRenderJob.Status.QUEUED else 'Render timed out.'
+	updated = ContractRenderJob.objects.filter(pk=job.pk, status=job.status).update(
+		status=ContractRenderJob.Status.FAILED, error=message, finished_at=timezone.now()
+	)
+	if updated:
+		job.status, job.error = ContractRenderJob.Status.FAILED, message
+	else:
+		job.refresh_from_db()
+	return job.status == ContractRenderJob.Status.FAILED
+
+
+def claim(limit: int) -> list[int]:
+	"""Mark up to ``limit`` queued jobs as running; safe with several workers polling at once."""
+	candidates = ContractRenderJob.objects.filter(status=ContractRenderJob.Status.QUEUED).order_by('created_at')
+	claimed = []
+	for pk in candidates.values_list('pk', flat=True)[:limit]:
+		if ContractRenderJob.objects.filter(pk=pk, status=ContractRenderJob.Status.QUEUED).update(
+			status=ContractRenderJob.Status.RUNNING, started_at=timezone.now()
+		):
+			claimed.append(pk)
+	return claimed
+
+
+@contextmanager
+def time_limit(seconds: int):
+	"""Raise :class:`RenderTimeout` in the current process after ``seconds``.
+
+	Uses ``SIGALRM``, so it only applies on Unix in the main thread; elsewhere the worker's
+	own deadline still marks the job as failed.
+	"""
+	if not seconds or not hasattr(signal, 'SIGALRM') or threading.current_thread() is not threading.main_thread():
+		yield
+		return
+
+	def expire(signum, frame):
+		raise RenderTimeout(f'Render took longer than {seconds}s.')
+
+	previous = signal.signal(signal.SIGALRM, expire)
+	signal.setitimer(signal.ITIMER_REAL, seconds)
+	try:
+		yield
+	finally:
+		signal.setitimer(signal.ITIMER_REAL, 0)
+		signal.signal(signal.SIGALRM, previous)
+
+
+def render_job(job_id: int, timeout: int) -> str:
+	"""Render one job; runs inside a worker process and records the outcome on the job."""
+	job = ContractRenderJob.objects.select_related(
+		'quote', 'quote__design', 'quote__design__owner', 'quote__catalog_design', 'quote__requested_by'
+	).get(pk=job_id)
+	try:
+		engine = pdf.get_engine()
+		# The quote may have changed since the job was queued; render its current version.
+		key = contract_cache.cache_key(job.quote, engine)
+		cached = contract_cache.open_cached(job.quote_id, key)
+		if cached is not None:
+			cached.close()
+		else:
+			with time_limit(timeout):
+				content = engine.render(job.quote)
+			contract_cache.store(job.quote_id, key, content)
+	except Exception as exc:
+		logger.exception('Contract render job %s failed', job_id)
+		ContractRenderJob.objects.filter(pk=job_id).update(
+			status=ContractRenderJob.Status.FAILED, error=str(exc) or exc.__class__.__name__, finished_at=timezone.now()
+		)
+		return ContractRenderJob.Status.FAILED
+	ContractRenderJob.objects.filter(pk=job_id).update(
+		status=ContractRenderJob.Status.DONE, cache_key=key, finished_at=timezone.now()
+	)
+	return ContractRenderJob.Status.DONE
+
+
+def render_to_cache(quote_id: int) -> tuple[int, str]:
+	"""Make sure the current contract of one quote is in the PDF cache; returns its cache key.
+
+	Runs in worker processes for batch rendering, so it takes an id rather than a model instance.
+	"""
+	quote = Quote.objects.select_related('design', 'design__owner', 'catalog_design', 'requested_by').get(pk=quote_id)
+	engine = pdf.get_engine()
+	key = contract_cache.cache_key(quote, engine)
+	cached = contract_cache.open_cached(quote_id, key)
+	if cached is not None:
+		cached.close()
+	else:
+		contract_cache.store(quote_id, key, engine.render(quote))
+	return quote_id, key
+
+
+def _init_worker() -> None:
+	# Spawned (non-forked) workers start without Django configured.
+	django.setup()
+
+
+def run_worker(workers: int | None = None, timeout: int | None = None, poll_interval: float = 1.0, once: bool = False) -> int:
+	"""Claim and render jobs until interrupted (or until the queue is empty with ``once``).
+
+	At most ``workers`` renders run at a time. Returns the number of jobs processed.
+	"""
+	workers = workers or worker_count()
+	timeout = timeout or render_timeout()
+	processed = 0
+	# Build the engine before forking so every worker starts warm, and make sure forked workers
+	# do not share the parent's database connections.
+	pdf.warm_up()
+	connections.close_all()
+	with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+		running: dict[Future, int] = {}
+		while True:
+			for future in [future for future in running if future.done()]:
+				job_id = running.pop(future)
+				processed += 1
+				if future.exception() is not None:
+					logger.error('Contract render job %s crashed: %s', job_id, future.exception())
+					ContractRenderJob.objects.filter(pk=job_id, status=ContractRenderJob.Status.RUNNING).update(
+						status=ContractRenderJob.Status.FAILED, error=str(future.exception()), finished_at=timezone.now()
+					)
+			stuck = ContractRenderJob.objects.filter(
+				status=ContractRenderJob.Status.RUNNING,
+				started_at__lt=timezone.now() - timedelta(seconds=timeout + TIMEOUT_GRACE),
+			)
+			stuck.update(status=ContractRenderJob.Status.FAILED, error='Render timed out.', finished_at=timezone.now())
+
+			claimed = claim(workers - len(running))
+			for job_id in claimed:
+				running[executor.submit(render_job, job_id, timeout)] = job_id
+			if once and not running:
+				return processed
+			if not claimed:
+				time.sleep(poll_interval)
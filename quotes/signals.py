@@ -1,16 +1,15 @@
 from django.conf import settings
-from django.contrib.auth import get_user_model
-from django.core.mail import send_mail
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 
-from .models import Quote
+from accounts.outbox import admin_recipients, send_mail
 
+from . import contract_cache
+from .models import Quote
 
-def _admin_recipients() -> list[str]:
-    User = get_user_model()
-    emails = [email for email in User.objects.filter(is_superuser=True).values_list("email", flat=True) if email]
-    return emails or [settings.DEFAULT_FROM_EMAIL]
+# Fields printed on the contract whose change must retire cached PDFs right away.
+CONTRACT_FIELDS = ("price", "status")
 
 
 @receiver(post_save, sender=Quote)
@@ -22,4 +21,24 @@ def notify_admin_on_quote_create(sender, instance: Quote, created: bool, **kwarg
         f"A new quote was requested for design '{instance.reference_name}'.\n"
         f"Requested by: {instance.requested_by.get_username()}"
     )
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, _admin_recipients())
+    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, admin_recipients())
+
+
+@receiver(post_init, sender=Quote)
+def remember_contract_fields(sender, instance: Quote, **kwargs):
+    instance._loaded_contract_fields = tuple(instance.__dict__.get(field) for field in CONTRACT_FIELDS)
+
+
+@receiver(post_save, sender=Quote)
+def purge_contract_on_change(sender, instance: Quote, created: bool, **kwargs):
+    current = tuple(getattr(instance, field) for field in CONTRACT_FIELDS)
+    if not created and current != instance._loaded_contract_fields:
+        pk = instance.pk
+        transaction.on_commit(lambda: contract_cache.purge(pk))
+    instance._loaded_contract_fields = current
+
+
+@receiver(post_delete, sender=Quote)
+def purge_contract_on_delete(sender, instance: Quote, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: contract_cache.purge(pk))
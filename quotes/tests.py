@@ -1,3 +1,194 @@
-from django.test import TestCase
+import io
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from datetime import date
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from designs.models import HouseDesign
+
+from . import contract_cache, estimator, pdf, rendering
+from .models import ContractRenderJob, CostTable, EstimateInquiry, Quote
+
+
+class ActiveCostTableTests(TestCase):
+	def test_newly_published_table_is_used_without_signals(self):
+		first = estimator.active_table()
+		rates = deepcopy(CostTable.objects.get(pk=first.pk).rates)
+		rates['land'] = {'min': 1000, 'max': 2000}
+		# Stands in for another process publishing a table: no signal reaches this one.
+		CostTable.objects.filter(pk=first.pk).update(is_active=False)
+		CostTable.objects.create(version=first.version + 1, rates=rates, is_active=True)
+		table = estimator.active_table()
+		self.assertEqual(table.version, first.version + 1)
+		self.assertEqual(table.land_min, 1000)
+
+	def test_no_active_table(self):
+		CostTable.objects.update(is_active=False)
+		with self.assertRaises(estimator.EstimateError):
+			estimator.active_table()
+
+
+
+class EstimateInquiryTests(TestCase):
+	def setUp(self):
+		self.client.force_login(get_user_model().objects.create_user('customer'))
+		self.url = reverse('quotes:estimator_inquiry')
+		self.data = {
+			'name': 'สมชาย',
+			'phone': '0800000000',
+			'email': 'customer@example.com',
+			'land_size': '50',
+			'house_size': '120',
+			'material_grade': 'standard',
+			'floors': '2',
+		}
+
+	def test_inquiry_is_priced_and_saved(self):
+		response = self.client.post(self.url, self.data)
+		self.assertEqual(response.status_code, 200)
+		inquiry = EstimateInquiry.objects.get()
+		self.assertEqual((inquiry.house_size, inquiry.floors), (120, 2))
+		self.assertEqual(response.json()['estimate_min'], int(inquiry.estimate_min))
+
+	def test_out_of_range_values_are_rejected(self):
+		for field, value in [('floors', '11'), ('floors', '0'), ('house_size', str(10 ** 30)), ('land_size', '-1')]:
+			with self.subTest(field=field, value=value):
+				response = self.client.post(self.url, {**self.data, field: value})
+				self.assertEqual(response.status_code, 400)
+		self.assertFalse(EstimateInquiry.objects.exists())
+
+
+class ContractCacheKeyTests(TestCase):
+	engine = SimpleNamespace(template_hash='template', font_hash='fonts', variant='default')
+
+	def setUp(self):
+		self.designer = get_user_model().objects.create_user('designer', first_name='Dao')
+		self.client_user = get_user_model().objects.create_user('client', first_name='Mali')
+		self.design = HouseDesign.objects.create(
+			title='Garden House', description='Two storeys', owner=self.designer, cover_image='designs/test.jpg'
+		)
+		self.quote = Quote.objects.create(design=self.design, requested_by=self.client_user)
+
+	def key(self) -> str:
+		quote = Quote.objects.select_related('design', 'design__owner', 'catalog_design', 'requested_by').get(pk=self.quote.pk)
+		return contract_cache.cache_key(quote, self.engine)
+
+	def test_key_is_stable_for_an_unchanged_contract(self):
+		self.assertEqual(self.key(), self.key())
+
+	def test_key_changes_with_the_issue_date(self):
+		with mock.patch('django.utils.timezone.localdate', return_value=date(2026, 1, 1)):
+			first = self.key()
+		with mock.patch('django.utils.timezone.localdate', return_value=date(2026, 1, 2)):
+			self.assertNotEqual(self.key(), first)
+
+	def test_key_changes_with_printed_related_details(self):
+		keys = {self.key()}
+		HouseDesign.objects.filter(pk=self.design.pk).update(title='Garden House II')
+		keys.add(self.key())
+		get_user_model().objects.filter(pk=self.designer.pk).update(first_name='Somchai')
+		keys.add(self.key())
+		get_user_model().objects.filter(pk=self.client_user.pk).update(last_name='Jaidee')
+		keys.add(self.key())
+		self.assertEqual(len(keys), 4)
+
+
+class ContractBundleAdminTests(TestCase):
+	def test_download_renders_in_process(self):
+		admin = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'password')
+		quotes = [
+			Quote.objects.create(
+				design=HouseDesign.objects.create(title=title, description='', owner=admin, cover_image='designs/test.jpg'),
+				requested_by=admin,
+			)
+			for title in ('Garden House', 'River House')
+		]
+		self.client.force_login(admin)
+		with tempfile.TemporaryDirectory() as directory, override_settings(CONTRACT_PDF_CACHE_DIR=directory):
+			with mock.patch('quotes.bundles.ProcessPoolExecutor') as pool:
+				response = self.client.post(
+					reverse('admin:quotes_quote_changelist'),
+					{'action': 'download_contracts', '_selected_action': [quote.pk for quote in quotes]},
+				)
+				content = b''.join(response.streaming_content)
+		pool.assert_not_called()
+		names = zipfile.ZipFile(io.BytesIO(content)).namelist()
+		self.assertEqual(sorted(names), [f'contract_quote_{quote.pk}.pdf' for quote in quotes])
+
+
+class AsyncContractDownloadTests(TestCase):
+	def setUp(self):
+		self.directory = tempfile.TemporaryDirectory()
+		self.addCleanup(self.directory.cleanup)
+		settings = override_settings(CONTRACT_PDF_ASYNC=True, CONTRACT_PDF_CACHE_DIR=self.directory.name)
+		settings.enable()
+		self.addCleanup(settings.disable)
+		owner = get_user_model().objects.create_user('owner')
+		design = HouseDesign.objects.create(title='Garden House', description='', owner=owner, cover_image='designs/test.jpg')
+		self.quote = Quote.objects.create(design=design, requested_by=owner)
+		self.client.force_login(owner)
+		self.url = reverse('quotes:contract-pdf', kwargs={'quote_id': self.quote.pk})
+
+	def download(self):
+		response = self.client.get(self.url)
+		job = ContractRenderJob.objects.order_by('-pk').first()
+		if response.status_code == 302:
+			self.assertEqual(response['Location'], reverse('quotes:contract-status', kwargs={'job_id': job.pk}))
+		return response, job
+
+	def test_evicted_contract_is_rendered_again(self):
+		response, job = self.download()
+		self.assertEqual(response.status_code, 302)
+		rendering.render_job(job.pk, timeout=60)
+		self.assertEqual(self.client.get(self.url).status_code, 200)
+
+		contract_cache.evict(0)
+		response, retry = self.download()
+		# A new job rather than the DONE one, whose status page would send the browser straight back.
+		self.assertEqual(response.status_code, 302)
+		self.assertNotEqual(retry.pk, job.pk)
+		self.assertEqual(retry.status, ContractRenderJob.Status.QUEUED)
+		rendering.render_job(retry.pk, timeout=60)
+		response = self.client.get(self.url)
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+
+class PdfEngineFallbackTests(TestCase):
+	def test_concurrent_layout_failures_switch_backend_once(self):
+		engine = pdf.PdfEngine(optimize=False)
+		prepare = engine._prepare_xhtml2pdf
+		switches = []
+
+		def slow_prepare():
+			switches.append(threading.get_ident())
+			time.sleep(0.05)
+			prepare()
+
+		def missing_libraries(**kwargs):
+			raise OSError('cannot load library pango')
+
+		# Stands in for WeasyPrint losing its system libraries after the engine was built.
+		engine.backend = 'weasyprint'
+		engine._weasyprint_html_cls = lambda **kwargs: SimpleNamespace(write_pdf=missing_libraries)
+		barrier = threading.Barrier(4)
+
+		def render(_):
+			barrier.wait()
+			return engine._render_pdf('<html><head></head><body>contract</body></html>', None)
+
+		with mock.patch.object(engine, '_prepare_xhtml2pdf', side_effect=slow_prepare):
+			with ThreadPoolExecutor(max_workers=4) as executor:
+				documents = list(executor.map(render, range(4)))
+		self.assertEqual(len(switches), 1)
+		self.assertEqual(engine.backend, 'xhtml2pdf')
+		self.assertTrue(all(document.startswith(b'%PDF') for document in documents))
@@ -6,8 +6,12 @@ from .views import (
     QuoteListView,
     QuoteUpdateView,
     QuoteDeleteView,
+    contract_render_status,
+    cost_table_detail,
     create_estimate_inquiry,
+    current_cost_table,
     download_contract_pdf,
+    estimate_prices,
 )
 
 app_name = "quotes"
@@ -19,5 +23,9 @@ urlpatterns = [
     path("<int:pk>/edit/", QuoteUpdateView.as_view(), name="update"),
     path("<int:pk>/delete/", QuoteDeleteView.as_view(), name="delete"),
     path("<int:quote_id>/contract/pdf/", download_contract_pdf, name="contract-pdf"),
+    path("contract/jobs/<int:job_id>/", contract_render_status, name="contract-status"),
     path("estimator/inquiry/", create_estimate_inquiry, name="estimator_inquiry"),
+    path("estimator/price/", estimate_prices, name="estimator_price"),
+    path("estimator/cost-tables/current/", current_cost_table, name="current_cost_table"),
+    path("estimator/cost-tables/<int:version>/", cost_table_detail, name="cost_table"),
 ]
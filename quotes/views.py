@@ -1,66 +1,27 @@
-from decimal import Decimal, ROUND_HALF_UP
+import json
 from io import BytesIO
-from pathlib import Path
 
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.contrib.staticfiles import finders
-from django.core.exceptions import ImproperlyConfigured
-from django.http import Http404, HttpResponse, JsonResponse
-from django.shortcuts import get_object_or_404
-from django.template.loader import render_to_string
-from django.urls import reverse_lazy
-from django.utils import timezone
+from django.http import FileResponse, Http404, JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response, patch_cache_control
 from django.views.generic import CreateView, DetailView, ListView, UpdateView, DeleteView
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_http_methods, require_POST
 
+from accounts import counters
 from designs.models import HouseDesign
 
+from . import contract_cache, estimator, pdf, rendering
 from .forms import QuoteRequestForm, QuoteUpdateForm
-from .models import EstimateInquiry, Quote
-
-FONT_NORMAL_CANDIDATES = (
-	('Sarabun', 'Sarabun', 'fonts/Sarabun/Sarabun-Regular.ttf'),
-	('Sarabun', 'Sarabun', 'fonts/Sarabun/SarabunNew-Regular.ttf'),
-	('Sarabun', 'Sarabun', r'C:/Windows/Fonts/THSarabunNew.ttf'),
-	('Sarabun', 'Sarabun', r'C:/Windows/Fonts/THSARABUN.TTF'),
-	('Tahoma', 'Tahoma', r'C:/Windows/Fonts/Tahoma.ttf'),
-	('LeelawUI', 'LeelawUI', r'C:/Windows/Fonts/LeelawUI.ttf'),
-)
-
-FONT_BOLD_CANDIDATES = (
-	('Sarabun', 'Sarabun-Bold', 'fonts/Sarabun/Sarabun-Bold.ttf'),
-	('Sarabun', 'Sarabun-Bold', 'fonts/Sarabun/SarabunNew-Bold.ttf'),
-	('Sarabun', 'Sarabun-Bold', r'C:/Windows/Fonts/THSarabunNew Bold.ttf'),
-	('Sarabun', 'Sarabun-Bold', r'C:/Windows/Fonts/THSARABUNBOLD.TTF'),
-	('Tahoma', 'Tahoma-Bold', r'C:/Windows/Fonts/TahomaBD.TTF'),
-	('LeelawUI', 'LeelawUI-Bold', r'C:/Windows/Fonts/LeelawUIb.ttf'),
-)
-
-
-def _resolve_font_candidate(candidates, preferred_family: str | None = None):
-	def iter_candidates():
-		if preferred_family:
-			for entry in candidates:
-				if entry[0] == preferred_family:
-					yield entry
-			for entry in candidates:
-				if entry[0] != preferred_family:
-					yield entry
-		else:
-			for entry in candidates:
-				yield entry
+from .models import ContractRenderJob, CostTable, EstimateInquiry, Quote
 
-	for family, font_name, path_str in iter_candidates():
-		candidate_path = Path(path_str)
-		if not candidate_path.is_absolute():
-			resolved = finders.find(path_str)
-			if not resolved:
-				continue
-			candidate_path = Path(resolved)
-		if candidate_path.exists():
-			return family, font_name, candidate_path
-	return None, None, None
+CONTRACT_POLL_SECONDS = 2
+# Versioned cost tables never change, so clients may cache them for a year; the pointer to the
+# current version is cached briefly so a newly published table is picked up within minutes.
+COST_TABLE_MAX_AGE = 60 * 60 * 24 * 365
+CURRENT_COST_TABLE_MAX_AGE = 60 * 5
 
 
 class QuoteQuerysetMixin:
@@ -135,41 +96,27 @@ def create_estimate_inquiry(request):
 	name = request.POST.get('name', '').strip()
 	phone = request.POST.get('phone', '').strip()
 	email = request.POST.get('email', '').strip()
-	land_size_raw = request.POST.get('land_size')
-	house_size_raw = request.POST.get('house_size')
 	material_grade = (request.POST.get('material_grade') or '').strip().lower()
-	floors_raw = request.POST.get('floors')
-	min_raw = request.POST.get('estimate_min')
-	max_raw = request.POST.get('estimate_max')
 
 	if not name or not phone or not email:
 		return JsonResponse({'status': 'error', 'message': 'กรุณากรอกข้อมูลติดต่อให้ครบถ้วน'}, status=400)
 
-	def parse_positive_int(value: str | None, field_label: str) -> int:
-		try:
-			parsed = int(value) if value is not None else 0
-		except (TypeError, ValueError):
-			raise ValueError(f'{field_label} ไม่ถูกต้อง') from None
-		if parsed < 0:
-			raise ValueError(f'{field_label} ต้องเป็นจำนวนเต็มบวก')
-		return parsed
+	if material_grade not in EstimateInquiry.MaterialGrade.values:
+		material_grade = EstimateInquiry.MaterialGrade.STANDARD
 
+	# Same validation (and bounds) as the pricing API.
+	scenario = {key: request.POST[key] for key in ('land_size', 'house_size', 'floors') if key in request.POST}
 	try:
-		land_size = parse_positive_int(land_size_raw, 'ขนาดที่ดิน')
-		house_size = parse_positive_int(house_size_raw, 'พื้นที่ใช้สอย')
-		floors = parse_positive_int(floors_raw, 'จำนวนชั้น')
-	except ValueError as exc:
+		land_size, house_size, _, floors = estimator.parse_scenario({**scenario, 'material_grade': material_grade})
+	except estimator.EstimateError as exc:
 		return JsonResponse({'status': 'error', 'message': str(exc)}, status=400)
 
-	if material_grade not in EstimateInquiry.MaterialGrade.values:
-		material_grade = EstimateInquiry.MaterialGrade.STANDARD
-
+	# The range is always computed here; estimate_min/estimate_max posted by the browser are ignored.
 	try:
-		estimate_min = Decimal(min_raw or '0')
-		estimate_max = Decimal(max_raw or '0')
-	except (ValueError, ArithmeticError):
-		estimate_min = Decimal('0')
-		estimate_max = Decimal('0')
+		estimate = estimator.estimate(land_size, house_size, material_grade, floors)
+		bands = estimator.simulate(land_size, house_size, material_grade, floors, estimate.table)
+	except estimator.EstimateError as exc:
+		return JsonResponse({'status': 'error', 'message': str(exc)}, status=503)
 
 	inquiry = EstimateInquiry.objects.create(
 		user=request.user,
@@ -180,171 +127,150 @@ def create_estimate_inquiry(request):
 		house_size=house_size,
 		material_grade=material_grade,
 		floors=floors,
-		estimate_min=estimate_min,
-		estimate_max=estimate_max,
+		estimate_min=estimate.estimate_min,
+		estimate_max=estimate.estimate_max,
+		estimate_p10=bands.p10,
+		estimate_p50=bands.p50,
+		estimate_p90=bands.p90,
+		cost_table_id=estimate.table.pk,
 	)
 
-	pending_count = EstimateInquiry.objects.filter(handled=False).count()
+	pending_count = counters.read(counters.UNHANDLED_INQUIRIES)[counters.UNHANDLED_INQUIRIES]
 	return JsonResponse(
 		{
 			'status': 'ok',
 			'message': 'บันทึกคำขอเรียบร้อยแล้ว ทีมงานจะติดต่อกลับโดยเร็วที่สุด',
 			'pending_count': pending_count,
 			'inquiry_id': inquiry.id,
+			'estimate_min': int(inquiry.estimate_min),
+			'estimate_max': int(inquiry.estimate_max),
+			'estimate_bands': {'p10': int(bands.p10), 'p50': int(bands.p50), 'p90': int(bands.p90)},
+			'cost_table_version': estimate.table.version,
 		},
 	)
 
 
+@require_http_methods(['GET', 'POST'])
+def estimate_prices(request):
+	"""Price one or many scenarios: POST ``{"scenarios": [...]}`` or GET a single one as query parameters."""
+	if request.method == 'GET':
+		scenarios = [request.GET.dict()]
+	else:
+		try:
+			payload = json.loads(request.body or b'{}')
+		except (ValueError, UnicodeDecodeError):
+			return JsonResponse({'status': 'error', 'message': 'Request body must be JSON.'}, status=400)
+		scenarios = payload.get('scenarios', [payload]) if isinstance(payload, dict) else payload
+		if not isinstance(scenarios, list):
+			return JsonResponse({'status': 'error', 'message': 'scenarios must be a list.'}, status=400)
+	if len(scenarios) > estimator.MAX_BATCH:
+		return JsonResponse(
+			{'status': 'error', 'message': f'At most {estimator.MAX_BATCH} scenarios per request.'}, status=400
+		)
+	try:
+		table = estimator.active_table()
+	except estimator.EstimateError as exc:
+		return JsonResponse({'status': 'error', 'message': str(exc)}, status=503)
+	return JsonResponse({
+		'status': 'ok',
+		'cost_table_version': table.version,
+		'results': estimator.price_scenarios(scenarios, table),
+	})
+
+
+@require_GET
+def current_cost_table(request):
+	try:
+		table = estimator.active_table()
+	except estimator.EstimateError as exc:
+		return JsonResponse({'status': 'error', 'message': str(exc)}, status=503)
+	response = JsonResponse({
+		'version': table.version,
+		'url': reverse('quotes:cost_table', kwargs={'version': table.version}),
+	})
+	patch_cache_control(response, public=True, max_age=CURRENT_COST_TABLE_MAX_AGE)
+	return response
+
+
+@require_GET
+def cost_table_detail(request, version):
+	table = get_object_or_404(CostTable, version=version)
+	response = JsonResponse({
+		'version': table.version,
+		'published_at': table.published_at.isoformat(),
+		'grades': list(estimator.GRADE_INDEX),
+		'max_floors': estimator.MAX_FLOORS,
+		'max_size': estimator.MAX_SIZE,
+		'rates': table.rates,
+	})
+	patch_cache_control(response, public=True, max_age=COST_TABLE_MAX_AGE, immutable=True)
+	return response
+
+
 @login_required
 def download_contract_pdf(request, quote_id):
 	quote = get_object_or_404(
-		Quote.objects.select_related('design', 'catalog_design', 'requested_by'),
+		Quote.objects.select_related('design', 'design__owner', 'catalog_design', 'requested_by'),
 		pk=quote_id,
 	)
 	if not (request.user.is_superuser or quote.requested_by_id == request.user.id):
 		raise Http404
 
-	weasyprint_html_cls = None
-	try:
-		from weasyprint import HTML as WeasyPrintHTML
-	except ImportError:
-		weasyprint_html_cls = None
-	except OSError:
-		weasyprint_html_cls = None
-	else:
-		weasyprint_html_cls = WeasyPrintHTML
-
-	total_price = quote.price or Decimal('0.00')
-	client = quote.requested_by
-	client_profile = getattr(client, 'profile', None)
-	client_contact = {
-		'address': getattr(client_profile, 'address', None) if client_profile else None,
-		'phone': getattr(client_profile, 'phone', None) if client_profile else None,
-	}
-	schedule_plan = [
-		{
-			'label': 'งวดที่ 1',
-			'percentage': Decimal('0.30'),
-			'description': 'ชำระ 30% เมื่อเซ็นสัญญาก่อสร้าง',
-		},
-		{
-			'label': 'งวดที่ 2',
-			'percentage': Decimal('0.40'),
-			'description': 'ชำระ 40% เมื่อก่อสร้างโครงสร้างแล้วเสร็จ',
-		},
-		{
-			'label': 'งวดที่ 3',
-			'percentage': Decimal('0.30'),
-			'description': 'ชำระ 30% ก่อนส่งมอบงานก่อสร้าง',
-		},
-	]
-
-	installments = []
-	for plan in schedule_plan:
-		amount = None
-		if quote.price:
-			amount = (total_price * plan['percentage']).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
-		installments.append({
-			'label': plan['label'],
-			'description': plan['description'],
-			'percentage_display': f"{(plan['percentage'] * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP)}%",
-			'amount': amount,
-		})
+	engine = pdf.get_engine()
+	key = contract_cache.cache_key(quote, engine)
+	etag = contract_cache.etag_for(key)
+	not_modified = get_conditional_response(request, etag=etag)
+	if not_modified is not None:
+		return not_modified
+
+	handle = contract_cache.open_cached(quote.pk, key)
+	if handle is None and rendering.async_enabled():
+		# Hand the render to the worker pool unless it already failed for this version, in which
+		# case the request renders it itself. A DONE job whose file has left the cache is replaced
+		# by a new one.
+		job = rendering.latest_job(quote, key)
+		if job is None or not (job.status == ContractRenderJob.Status.FAILED or rendering.expire_if_stale(job)):
+			job = rendering.enqueue(quote, key)
+			return redirect('quotes:contract-status', job_id=job.pk)
+	if handle is None:
+		content = engine.render(quote, base_url=request.build_absolute_uri('/'))
+		contract_cache.store(quote.pk, key, content)
+		handle = BytesIO(content)
+
+	response = FileResponse(
+		handle,
+		as_attachment=True,
+		filename=f'contract_quote_{quote.id}.pdf',
+		content_type='application/pdf',
+	)
+	response['ETag'] = etag
+	# The contract is private to its owner; browsers may keep it but must revalidate.
+	patch_cache_control(response, private=True, no_cache=True)
+	return response
 
-	design_title = quote.reference_name
-	design_description = quote.reference_description
-	design_code = quote.reference_code
-	if quote.design and quote.design.owner:
-		designer_name = quote.design.owner.get_full_name() or quote.design.owner.username
-	else:
-		designer_name = 'ทีมออกแบบ Project House'
-
-	context = {
-		'quote': quote,
-		'design_title': design_title,
-		'design_description': design_description,
-		'design_code': design_code,
-		'designer_name': designer_name,
-		'is_catalog_design': quote.is_catalog_source,
-		'client': client,
-		'client_contact': client_contact,
-		'issued_date': timezone.now(),
-		'installments': installments,
-		'total_price': total_price,
-		'has_price': bool(quote.price),
-		'company': {
-			'name': 'บริษัท โฮมแมนเนจเมนท์ จำกัด',
-			'address': '123/45 ถนนสุขุมวิท แขวงคลองเตย เขตคลองเตย กรุงเทพมหานคร 10110',
-			'phone': '02-123-4567',
-			'email': 'contact@homemanagement.co.th',
-		},
-	}
 
-	font_family, normal_font_name, regular_font_path = _resolve_font_candidate(FONT_NORMAL_CANDIDATES)
-	bold_family, bold_font_name, bold_font_path = _resolve_font_candidate(
-		FONT_BOLD_CANDIDATES, preferred_family=font_family
-	)
-	if not font_family and bold_family:
-		font_family = bold_family
-	if not bold_font_name and normal_font_name:
-		bold_font_name = f"{normal_font_name}-Bold"
-	if not bold_font_path:
-		bold_font_path = regular_font_path
-	body_font_family = font_family or 'Helvetica'
-
-	html_string = render_to_string('quotes/contract_pdf.html', context)
-	html_string = html_string.replace('__BODY_FONT__', body_font_family)
-	pdf_bytes = None
-	if weasyprint_html_cls:
-		try:
-			pdf_bytes = weasyprint_html_cls(string=html_string, base_url=request.build_absolute_uri('/')).write_pdf()
-		except OSError:
-			pdf_bytes = None  # fall back if system libs missing
+@login_required
+def contract_render_status(request, job_id):
+	job = get_object_or_404(ContractRenderJob.objects.select_related('quote'), pk=job_id)
+	if not (request.user.is_superuser or job.quote.requested_by_id == request.user.id):
+		raise Http404
 
-	if pdf_bytes is None:
-		try:
-			from xhtml2pdf import pisa
-		except ImportError as exc:
-			raise ImproperlyConfigured(
-				'ไม่สามารถสร้าง PDF ได้ เนื่องจาก WeasyPrint หรือ xhtml2pdf ไม่พร้อมใช้งาน โปรดติดตั้ง GTK สำหรับ WeasyPrint หรือรัน "pip install xhtml2pdf".'
-			) from exc
-		from reportlab.pdfbase import pdfmetrics
-		from reportlab.pdfbase.ttfonts import TTFont
-
-		def register_font(font_name: str | None, font_path: Path | None):
-			if not font_name or not font_path:
-				return
-			try:
-				pdfmetrics.getFont(font_name)
-			except KeyError:
-				try:
-					pdfmetrics.registerFont(TTFont(font_name, str(font_path)))
-				except Exception:
-					pass
-
-		register_font(normal_font_name or 'Helvetica', regular_font_path)
-		register_font(bold_font_name, bold_font_path if bold_font_path else None)
-		try:
-			if font_family and normal_font_name and bold_font_name and regular_font_path and bold_font_path:
-				pdfmetrics.registerFontFamily(font_family, normal=normal_font_name, bold=bold_font_name)
-			elif font_family and normal_font_name and regular_font_path:
-				pdfmetrics.registerFontFamily(font_family, normal=normal_font_name)
-		except Exception:
-			pass
-		if regular_font_path and normal_font_name:
-			try:
-				pisa.DEFAULT_FONT = normal_font_name
-			except Exception:
-				pass
-
-		pdf_stream = BytesIO()
-		result = pisa.CreatePDF(html_string, dest=pdf_stream, encoding='utf-8')
-		if result.err:
-			raise ImproperlyConfigured(
-				'ไม่สามารถสร้างไฟล์ PDF ได้ กรุณาตรวจสอบการติดตั้งไลบรารี WeasyPrint หรือ xhtml2pdf.'
-			)
-		pdf_bytes = pdf_stream.getvalue()
-
-	response = HttpResponse(pdf_bytes, content_type='application/pdf')
-	response['Content-Disposition'] = f'attachment; filename="contract_quote_{quote.id}.pdf"'
+	rendering.expire_if_stale(job)
+	# A failed job is also "ready": the download view then falls back to rendering synchronously.
+	ready = job.status in (ContractRenderJob.Status.DONE, ContractRenderJob.Status.FAILED)
+	download_url = reverse('quotes:contract-pdf', kwargs={'quote_id': job.quote_id})
+	if request.GET.get('format') == 'json' or 'application/json' in request.headers.get('Accept', ''):
+		response = JsonResponse({
+			'status': job.status,
+			'ready': ready,
+			'download_url': download_url if ready else None,
+			'error': job.error or None,
+		})
+	elif ready:
+		return redirect(download_url)
+	else:
+		response = render(request, 'quotes/contract_status.html', {'job': job, 'poll_seconds': CONTRACT_POLL_SECONDS})
+	if not ready:
+		response['Retry-After'] = str(CONTRACT_POLL_SECONDS)
+	patch_cache_control(response, private=True, no_store=True)
 	return response